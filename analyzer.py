@@ -1,15 +1,91 @@
+import itertools
+import logging
+import time
+from collections import namedtuple
 from textblob import TextBlob
-import re
-from collections import Counter
 from datetime import datetime, timedelta
+from processing.window import SlidingWindowCounter
+from processing.sketch import ApproximateTrendCounter
+from processing.lexicon import SentimentLexicon
+from processing.tokenizer import TrendTokenizer, phrase
+from processing.filters import TermFilter
+from processing.burst import BurstDetector
+from processing.sentiment_cache import SentimentCache
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+SENTIMENT_TIME = metrics.stage_timer('sentiment')
+SENTIMENT_BATCH_TIME = metrics.stage_timer('sentiment_batch')
+TRENDS_TIME = metrics.stage_timer('trends')
+TREND_MERGE_TIME = metrics.stage_timer('trend_merge')
+PUBLISH_TIME = metrics.stage_timer('publish')
+SENTIMENT_ERRORS = metrics.error_counter('sentiment')
+TRENDS_ERRORS = metrics.error_counter('trends')
+
+# Trend state as of one publish. Every field is immutable, so any thread
+# can hold on to a snapshot while the writers move on.
+TrendSnapshot = namedtuple('TrendSnapshot', [
+    'version', 'created', 'top_trends', 'bursting', 'bursting_minute'
+])
 
 class Analyzer:
-    def __init__(self):
-        self.trends = Counter()
-        self.trend_window = timedelta(hours=24)
-        self.trend_timestamps = []
-        self.trend_data = []
+    def __init__(self, trend_window=timedelta(hours=24), trend_bucket=timedelta(minutes=1), top_k=10,
+                 approximate=False, sketch_memory=16 * 1024 * 1024, sketch_delta=0.01,
+                 heavy_hitters=1000, ngram=3, term_filter=None, sentiment_cache_size=100000):
+        """
+        Args:
+            ngram (int): Number of consecutive words in a phrase trend
+            term_filter (TermFilter): Drops stopword, URL, number and
+                other noise phrases before they are counted; defaults to
+                ``TermFilter()``, pass False to count every n-gram
+            approximate (bool): Count trends with a windowed Count-Min Sketch
+                and a heavy-hitters table instead of an exact Counter, so
+                memory stays at ``sketch_memory`` bytes however many
+                distinct phrases arrive
+            sketch_memory (int): Sketch size in bytes (approximate mode)
+            sketch_delta (float): Probability that an estimate exceeds the
+                sketch's error bound (approximate mode)
+            heavy_hitters (int): Number of candidate trends tracked
+                (approximate mode)
+            sentiment_cache_size (int): Most distinct texts whose
+                sentiment scores are kept for repeats such as retweets;
+                0 disables the cache
+        """
+        self.trend_window = trend_window
+        self.approximate = approximate
+        if approximate:
+            self.window = ApproximateTrendCounter(
+                trend_window,
+                bucket=timedelta(hours=1),
+                top_k=top_k,
+                capacity=heavy_hitters,
+                memory_bytes=sketch_memory,
+                delta=sketch_delta
+            )
+        else:
+            self.window = SlidingWindowCounter(trend_window, trend_bucket, top_k=top_k)
+        # Per-item counts over the trend window (estimates for tracked
+        # candidates only in approximate mode)
+        self.trends = self.window.totals
+        self.lexicon = None
+        # Called with the new lexicon by reload_sentiment, such as
+        # AnalysisPool.invalidate for the workers' caches and lexicons
+        self.reload_listeners = []
+        self.sentiment_cache = SentimentCache(sentiment_cache_size) if sentiment_cache_size else None
+        if self.sentiment_cache is not None:
+            for name in ('hits', 'misses', 'evictions', 'size'):
+                metrics.gauge(f'sentiment_cache_{name}', f'Sentiment cache {name}',
+                              fn=lambda name=name: self.sentiment_cache.stats()[name])
+        if term_filter is None:
+            term_filter = TermFilter()
+        self.tokenizer = TrendTokenizer(ngram, term_filter or None)
+        # Per-minute rate baselines, for spikes rather than volume
+        self.burst = BurstDetector()
+        self._versions = itertools.count(1)
+        self._snapshot = None
         self._initialize_sample_trends()
+        self.publish_trends()
 
     def _initialize_sample_trends(self):
         """Initialize with sample trends if no data is available"""
@@ -21,6 +97,9 @@ class Analyzer:
         ]
         current_time = datetime.now()
         for trend in sample_trends:
+            if not trend.startswith(('#', '@')):
+                # Phrase trends are keyed by word tuples, like extracted n-grams
+                trend = tuple(trend.split())
             self._add_trend(trend, current_time)
             # Add multiple counts to make it look more realistic
             for _ in range(5):
@@ -31,60 +110,93 @@ class Analyzer:
         Analyze the sentiment of given text using TextBlob.
         Returns a dictionary with polarity and subjectivity scores.
         """
+        start = time.perf_counter()
         try:
-            analysis = TextBlob(text)
-            return {
-                'polarity': analysis.sentiment.polarity,
-                'subjectivity': analysis.sentiment.subjectivity,
-                'sentiment': 'positive' if analysis.sentiment.polarity > 0 else 'negative' if analysis.sentiment.polarity < 0 else 'neutral'
-            }
+            cache = self.sentiment_cache
+            if cache is not None:
+                key = cache.key(text)
+                scores = cache.get(key)
+                if scores is not None:
+                    return self.sentiment_result(*scores)
+            sentiment = TextBlob(text).sentiment
+            if cache is not None:
+                cache.put(key, (sentiment.polarity, sentiment.subjectivity))
+            return self.sentiment_result(sentiment.polarity, sentiment.subjectivity)
         except Exception as e:
-            print(f"Error in sentiment analysis: {e}")
-            return {
-                'polarity': 0,
-                'subjectivity': 0,
-                'sentiment': 'neutral'
-            }
+            SENTIMENT_ERRORS.inc()
+            logger.error(f"Error in sentiment analysis: {e}")
+            return self.sentiment_result(0, 0)
+        finally:
+            SENTIMENT_TIME.observe(time.perf_counter() - start)
+
+    def analyze_sentiment_batch(self, texts):
+        """
+        Analyze the sentiment of a list of texts in one call.
+        Scores match analyze_sentiment but come from an array-backed copy
+        of TextBlob's lexicon, so large batches avoid per-text TextBlob
+        overhead. Returns one result dictionary per text, in order.
+        """
+        start = time.perf_counter()
+        try:
+            if self.lexicon is None:
+                self.lexicon = SentimentLexicon()
+            if self.sentiment_cache is None:
+                scores = self.lexicon.score_batch(texts)
+            else:
+                # Only distinct texts the cache has not seen are scored
+                scores = self.sentiment_cache.score_batch(texts, self.lexicon.score_batch)
+            results = [self.sentiment_result(polarity, subjectivity) for polarity, subjectivity in scores]
+            SENTIMENT_BATCH_TIME.observe(time.perf_counter() - start)
+            return results
+        except Exception as e:
+            SENTIMENT_ERRORS.inc()
+            logger.error(f"Error in batch sentiment analysis: {e}")
+            return [self.analyze_sentiment(text) for text in texts]
+
+    def reload_sentiment(self, lexicon=None):
+        """
+        Switch to a new sentiment lexicon (default: rebuild TextBlob's on
+        next use) and drop every cached score, here and in any analysis
+        workers
+        """
+        self.lexicon = lexicon
+        if self.sentiment_cache is not None:
+            self.sentiment_cache.invalidate()
+        for listener in self.reload_listeners:
+            listener(lexicon)
+
+    def sentiment_result(self, polarity, subjectivity):
+        """Result dictionary for a polarity/subjectivity pair"""
+        return {
+            'polarity': polarity,
+            'subjectivity': subjectivity,
+            'sentiment': 'positive' if polarity > 0 else 'negative' if polarity < 0 else 'neutral'
+        }
 
     def analyze_trends(self, text):
         """
         Extract and analyze trends from text.
-        Includes hashtags, mentions, and common phrases.
+        Includes hashtags, mentions, and common phrases. The caller
+        publishes the new state with ``publish_trends`` after its batch.
         """
+        start = time.perf_counter()
         try:
             # Clean old trends
             self._clean_old_trends()
 
-            # Extract features
-            text = text.lower()
-            hashtags = set(re.findall(r'#(\w+)', text))
-            mentions = set(re.findall(r'@(\w+)', text))
-            
-            # Extract common phrases (3 words)
-            words = re.findall(r'\b\w+\b', text)
-            phrases = [' '.join(words[i:i+3]) for i in range(len(words)-2)]
-
-            # Update trends
+            # Extract features and update trends
+            hashtags, mentions, items = self.extract_trends(text)
             current_time = datetime.now()
-            for item in hashtags:
-                self._add_trend(f'#{item}', current_time)
-            for item in mentions:
-                self._add_trend(f'@{item}', current_time)
-            for phrase in phrases:
-                self._add_trend(phrase, current_time)
+            self.window.update(items, current_time)
+            self.burst.update(items, current_time)
 
-            # Get current trending topics
-            top_trends = dict(self.trends.most_common(10))
-
-            return {
-                'hashtags': list(hashtags),
-                'mentions': list(mentions),
-                'top_trends': top_trends,
-                'timestamp': current_time.isoformat()
-            }
+            result = self.trend_result(hashtags, mentions, current_time)
+            TRENDS_TIME.observe(time.perf_counter() - start)
+            return result
 
         except Exception as e:
-            print(f"Error in trend analysis: {e}")
+            TRENDS_ERRORS.inc()
+            logger.error(f"Error in trend analysis: {e}")
             return {
                 'hashtags': [],
                 'mentions': [],
@@ -92,22 +204,90 @@ class Analyzer:
                 'timestamp': datetime.now().isoformat()
             }
 
+    def record_trends(self, counts, timestamp=None):
+        """
+        Merge pre-counted trend items into the trend window.
+        Used by analysis workers, which extract and count trends for a
+        chunk of tweets in another process. Publishes the new state.
+        """
+        start = time.perf_counter()
+        timestamp = timestamp or datetime.now()
+        self.window.expire(timestamp)
+        self.window.update_counts(counts, timestamp)
+        self.burst.update_counts(counts, timestamp)
+        TREND_MERGE_TIME.observe(time.perf_counter() - start)
+        self.publish_trends(timestamp)
+
+    def publish_trends(self, now=None):
+        """
+        Publish the current trend state as a new ``TrendSnapshot``.
+        Writers call this once a batch is applied. Readers only ever see
+        published snapshots, so they never take the writers' lock, never
+        iterate the live counters and never see half a batch.
+        """
+        start = time.perf_counter()
+        snapshot = TrendSnapshot(
+            next(self._versions),
+            now or datetime.now(),
+            tuple(self._top_trends()),
+            tuple((phrase(term), score, count) for term, score, count in self.burst.bursting),
+            self.burst.bursting_minute
+        )
+        # A single reference swap: readers get the old snapshot or this one
+        self._snapshot = snapshot
+        PUBLISH_TIME.observe(time.perf_counter() - start)
+        return snapshot
+
+    def trend_snapshot(self):
+        """Latest published TrendSnapshot; safe to call from any thread"""
+        return self._snapshot
+
+    def trend_result(self, hashtags, mentions, timestamp):
+        """Trend dictionary for one tweet, with the current top trends"""
+        return {
+            'hashtags': list(hashtags),
+            'mentions': list(mentions),
+            'top_trends': dict(self._top_trends()),
+            'timestamp': timestamp.isoformat()
+        }
+
+    def extract_trends(self, text):
+        """
+        Extract hashtags, mentions and n-word phrases from text.
+        Returns (hashtags, mentions, items) where items are the trend keys;
+        phrases are word tuples.
+        """
+        return self.tokenizer.extract(text)
+
+    def get_top_trends(self):
+        """
+        Top trends of the latest snapshot as (text, count) pairs, highest
+        first. Safe to call from any thread.
+        """
+        return list(self._snapshot.top_trends)
+
+    def get_bursting_trends(self, k=10, now=None):
+        """
+        Terms spiking above their usual per-minute rate in the last minute,
+        from the latest snapshot. Returns (text, z-score, count) tuples,
+        highest score first. Safe to call from any thread.
+        """
+        snapshot = self._snapshot
+        if not BurstDetector.is_recent(snapshot.bursting_minute, now):
+            return []
+        return list(snapshot.bursting[:k])
+
+    def _top_trends(self):
+        """Live top trends; only for the thread applying updates"""
+        return [(phrase(item), count) for item, count in self.window.top_items()]
+
     def _clean_old_trends(self):
         """Remove trends older than the trend window"""
-        current_time = datetime.now()
-        cutoff_time = current_time - self.trend_window
-
-        # Remove old trends
-        while self.trend_timestamps and self.trend_timestamps[0] < cutoff_time:
-            old_data = self.trend_data.pop(0)
-            self.trend_timestamps.pop(0)
-            for item in old_data:
-                self.trends[item] -= 1
-                if self.trends[item] <= 0:
-                    del self.trends[item]
+        now = datetime.now()
+        self.window.expire(now)
+        self.burst.advance(now)
 
     def _add_trend(self, item, timestamp):
         """Add a new trend item with timestamp"""
-        self.trends[item] += 1
-        self.trend_timestamps.append(timestamp)
-        self.trend_data.append([item]) 
\ No newline at end of file
+        self.window.add(item, timestamp)
+ 
\ No newline at end of file
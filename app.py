@@ -1,13 +1,20 @@
-from flask import Flask, render_template_string
+from flask import Flask, Response, jsonify, render_template_string, request, send_file
+import hmac
 import os
 import threading
 import logging
 from ingestion.stream_listener import StreamListener
+from ingestion.buffer import IngestQueue
+from ingestion.loadgen import LoadGenerator, SyntheticTweets, parse_profile, replay_arrivals, synthetic_arrivals
 from processing.analyzer import Analyzer
+from processing.workers import AnalysisPool
+from processing.filters import TermFilter, CollocationScorer
 from storage.database import Database
 from visualization.dashboard import Dashboard
 from config import config
 from utils.helpers import ensure_directory_exists
+from utils import metrics
+from utils.profiler import SamplingProfiler, install_signal_handler
 
 # Set up logging
 logging.basicConfig(
@@ -16,6 +23,10 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Accepted range of POST /admin/profile?seconds=N
+MIN_PROFILE_SECONDS = 1
+MAX_PROFILE_SECONDS = 300
+
 # Global dashboard instance
 dashboard = None
 dashboard_thread = None
@@ -34,15 +45,52 @@ def create_app():
         ensure_directory_exists('src/visualization/templates')
         
         # Initialize components
+        metrics.REGISTRY.enabled = config.METRICS_ENABLED
         database = Database()
-        analyzer = Analyzer()
-        dashboard = Dashboard(analyzer)
+        if config.RETENTION_DAYS > 0:
+            database.start_retention(
+                days=config.RETENTION_DAYS,
+                interval=config.RETENTION_INTERVAL_MINUTES * 60
+            )
+        term_filter = False
+        if config.TREND_FILTER_TERMS:
+            scorer = CollocationScorer(min_pmi=config.TREND_MIN_PMI) if config.TREND_MIN_PMI > 0 else None
+            term_filter = TermFilter(scorer=scorer)
+        analyzer = Analyzer(
+            approximate=config.TREND_APPROXIMATE,
+            sketch_memory=config.TREND_SKETCH_MEMORY_MB * 1024 * 1024,
+            term_filter=term_filter,
+            sentiment_cache_size=config.SENTIMENT_CACHE_SIZE
+        )
+        pool = AnalysisPool(
+            analyzer,
+            workers=config.ANALYSIS_WORKERS,
+            chunk_size=config.ANALYSIS_CHUNK_SIZE
+        )
+        dashboard = Dashboard(analyzer, mode=config.DASHBOARD_MODE)
+        profiler = SamplingProfiler(config.PROFILE_DIR, interval=config.PROFILE_INTERVAL_MS / 1000)
+        if threading.current_thread() is threading.main_thread():
+            install_signal_handler(profiler, config.PROFILE_SECONDS)
+        if config.LOADGEN_REPLAY_PATH:
+            arrivals = replay_arrivals(config.LOADGEN_REPLAY_PATH, config.LOADGEN_REPLAY_SPEED)
+        else:
+            arrivals = synthetic_arrivals(SyntheticTweets(config.LOADGEN_SEED), parse_profile(config.LOADGEN_PROFILE))
         
         # Initialize stream listener with components
         stream_listener = StreamListener(
             api=config.twitter_config,
             analyzer=analyzer,
-            database=database
+            database=database,
+            pool=pool,
+            queue=IngestQueue(
+                maxsize=config.INGEST_QUEUE_SIZE,
+                policy=config.INGEST_OVERFLOW_POLICY,
+                spill_path=config.INGEST_SPILL_PATH,
+                block_timeout=config.INGEST_BLOCK_TIMEOUT
+            ),
+            consumers=config.INGEST_CONSUMERS,
+            batch_size=config.INGEST_BATCH_SIZE,
+            load_generator=LoadGenerator(arrivals)
         )
         
         @app.route('/')
@@ -76,6 +124,49 @@ def create_app():
                 </html>
             ''')
         
+        @app.route('/metrics')
+        def metrics_view():
+            """Pipeline metrics for Prometheus"""
+            return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+        
+        def admin_denied():
+            """Error response unless the request carries the admin token"""
+            if not config.ADMIN_TOKEN:
+                # Admin routes are off until a token is configured
+                return jsonify({'error': 'not found'}), 404
+            if not hmac.compare_digest(request.headers.get('X-Admin-Token', ''), config.ADMIN_TOKEN):
+                return jsonify({'error': 'forbidden'}), 403
+            return None
+        
+        @app.route('/admin/profile', methods=['GET', 'POST'])
+        def profile_view():
+            """Start a sampling profile (POST ?seconds=N) or show the last one (GET)"""
+            denied = admin_denied()
+            if denied:
+                return denied
+            if request.method == 'POST':
+                try:
+                    seconds = float(request.args.get('seconds', config.PROFILE_SECONDS))
+                except ValueError:
+                    return jsonify({'error': 'seconds must be a number'}), 400
+                if not MIN_PROFILE_SECONDS <= seconds <= MAX_PROFILE_SECONDS:
+                    return jsonify({'error': f'seconds must be between {MIN_PROFILE_SECONDS} '
+                                             f'and {MAX_PROFILE_SECONDS}'}), 400
+                if not profiler.start(seconds):
+                    return jsonify(dict(profiler.status(), error='a profile is already running')), 409
+                return jsonify(profiler.status()), 202
+            return jsonify(profiler.status())
+        
+        @app.route('/admin/profile/latest.collapsed')
+        def profile_download():
+            """Collapsed stacks of the last profile, for flamegraph tools"""
+            denied = admin_denied()
+            if denied:
+                return denied
+            if not profiler.last_result:
+                return jsonify({'error': 'no profile yet'}), 404
+            return send_file(os.path.abspath(profiler.last_result['path']), mimetype='text/plain')
+        
         @app.route('/dashboard')
         def dashboard_view():
             """Start the dashboard on a separate port and provide a link"""
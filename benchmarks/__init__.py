@@ -0,0 +1 @@
+"""Performance benchmarks; see benchmarks.suite for the regression-tracked scenarios"""
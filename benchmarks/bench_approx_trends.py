@@ -0,0 +1,131 @@
+"""
+Measure approximate trend mode against exact counting on replayed tweets.
+
+Tweets are replayed on a simulated clock through the trend extraction of
+``Analyzer`` into both an exact ``SlidingWindowCounter`` and an
+``ApproximateTrendCounter``. At regular checkpoints the two top-K lists
+are compared for recall and precision, and the worst overestimate is
+checked against the sketch's error bound. Tweets come from ``--db`` (the
+``text`` column of a tweets database) or, by default, a seeded synthetic
+stream with a Zipfian vocabulary. Run from the repository root:
+
+    PYTHONPATH=src python benchmarks/bench_approx_trends.py --tweets 200000 --memory-mb 16
+"""
+import argparse
+import random
+import sqlite3
+import time
+import tracemalloc
+from datetime import timedelta
+
+from processing.analyzer import Analyzer
+from processing.sketch import ApproximateTrendCounter
+from processing.window import SlidingWindowCounter
+
+
+def synthetic_tweets(count, seed=1, vocabulary=20000, hashtags=500):
+    rng = random.Random(seed)
+    weights = [1.0 / (rank + 1) for rank in range(vocabulary)]
+    words = [f"w{i}" for i in range(vocabulary)]
+    tag_weights = [1.0 / (rank + 1) for rank in range(hashtags)]
+    tags = [f"#tag{i}" for i in range(hashtags)]
+    for _ in range(count):
+        body = rng.choices(words, weights, k=rng.randint(6, 18))
+        body += rng.choices(tags, tag_weights, k=rng.randint(0, 2))
+        yield ' '.join(body)
+
+
+def db_tweets(db_path, count):
+    conn = sqlite3.connect(db_path)
+    try:
+        for (text,) in conn.execute('SELECT text FROM tweets ORDER BY id LIMIT ?', (count,)):
+            yield text
+    finally:
+        conn.close()
+
+
+def compare(exact, approx, k):
+    truth = exact.top_items()
+    got = approx.top_items()
+    true_keys = {item for item, _ in truth}
+    got_keys = {item for item, _ in got}
+    hits = len(true_keys & got_keys)
+    recall = hits / len(true_keys) if true_keys else 1.0
+    precision = hits / len(got_keys) if got_keys else 1.0
+    overcount = max((count - exact.totals.get(item, 0) for item, count in got), default=0)
+    return recall, precision, overcount
+
+
+def measure_memory(counter_factory, stream):
+    tracemalloc.start()
+    counter = counter_factory()
+    for timestamp, items in stream:
+        counter.expire(timestamp)
+        counter.update(items, timestamp)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tweets', type=int, default=200000)
+    parser.add_argument('--db', help='replay tweet texts from this database instead')
+    parser.add_argument('--rate', type=float, default=1000.0, help='tweets per simulated minute')
+    parser.add_argument('--window-minutes', type=int, default=60)
+    parser.add_argument('--memory-mb', type=float, default=16.0)
+    parser.add_argument('--capacity', type=int, default=1000)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--checkpoints', type=int, default=20)
+    args = parser.parse_args()
+
+    analyzer = Analyzer()
+    texts = db_tweets(args.db, args.tweets) if args.db else synthetic_tweets(args.tweets)
+    step = 60.0 / args.rate
+    stream = [(i * step, analyzer.extract_trends(text)[2]) for i, text in enumerate(texts)]
+    if not stream:
+        print("No tweets to replay")
+        return
+
+    window = timedelta(minutes=args.window_minutes)
+    memory_bytes = int(args.memory_mb * 1024 * 1024)
+    exact = SlidingWindowCounter(window, top_k=args.k)
+    approx = ApproximateTrendCounter(window, bucket=window / 24, top_k=args.k,
+                                     capacity=args.capacity, memory_bytes=memory_bytes)
+
+    every = max(1, len(stream) // args.checkpoints)
+    results = []
+    exact_time = approx_time = 0.0
+    for i, (timestamp, items) in enumerate(stream, start=1):
+        start = time.perf_counter()
+        exact.expire(timestamp)
+        exact.update(items, timestamp)
+        exact_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        approx.expire(timestamp)
+        approx.update(items, timestamp)
+        approx_time += time.perf_counter() - start
+
+        if i % every == 0:
+            recall, precision, overcount = compare(exact, approx, args.k)
+            results.append((recall, precision, overcount, approx.error_bound()))
+
+    exact_memory = measure_memory(lambda: SlidingWindowCounter(window, top_k=args.k), stream)
+    sketch = approx.sketch
+    print(f"tweets replayed:    {len(stream):,}")
+    print(f"exact distinct keys: {len(exact.totals):,}  (~{exact_memory / 2**20:.1f} MiB traced)")
+    print(f"sketch:             {sketch.depth} x {sketch.width} x {sketch.slices + 1} slices, "
+          f"{sketch.memory_bytes / 2**20:.1f} MiB, epsilon={sketch.epsilon:.2e}, delta={sketch.delta}")
+    print(f"throughput:         exact {len(stream) / exact_time:,.0f} tweets/s, "
+          f"approx {len(stream) / approx_time:,.0f} tweets/s")
+    print(f"top-{args.k} recall:      mean {sum(r[0] for r in results) / len(results):.3f}, "
+          f"min {min(r[0] for r in results):.3f}")
+    print(f"top-{args.k} precision:   mean {sum(r[1] for r in results) / len(results):.3f}, "
+          f"min {min(r[1] for r in results):.3f}")
+    worst = max(results, key=lambda r: r[2])
+    print(f"max overcount:      {worst[2]} (error bound at that point {worst[3]:.1f})")
+
+
+if __name__ == '__main__':
+    main()
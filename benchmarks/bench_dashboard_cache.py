@@ -0,0 +1,60 @@
+"""
+Compare dashboard refresh cost per interval with and without the snapshot cache.
+
+Every simulated viewer runs all dashboard callbacks once per interval.
+Uncached, every callback of every viewer queries the database (modelled
+as one ``_compute_snapshot`` per callback); cached, the refresher
+computes one snapshot per interval and callbacks only read it. Reports
+data-access time per interval both ways, the figure-building time the
+callbacks still spend, and the cache's hit rate. Point ``--db``
+at a populated database. Run from the repository root:
+
+    PYTHONPATH=src:. python benchmarks/bench_dashboard_cache.py --db src/default.db --viewers 1 10 50
+"""
+import argparse
+import time
+
+from processing.analyzer import Analyzer
+from storage.connection import get_pool
+from visualization.dashboard import Dashboard
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--db', default='src/default.db')
+    parser.add_argument('--viewers', type=int, nargs='+', default=[1, 10, 50])
+    parser.add_argument('--intervals', type=int, default=5)
+    args = parser.parse_args()
+
+    dashboard = Dashboard(Analyzer(), refresh_interval=3600)
+    # Refresh by hand from here on so only the timed refreshes count
+    dashboard.refresher.stop()
+    dashboard.pool = get_pool(args.db)
+    callbacks = [entry['callback'].__wrapped__ for entry in dashboard.app.callback_map.values()]
+
+    for viewers in args.viewers:
+        start = time.perf_counter()
+        for _ in range(args.intervals):
+            for _ in range(viewers * len(callbacks)):
+                dashboard._compute_snapshot()
+        uncached = (time.perf_counter() - start) / args.intervals
+
+        start = time.perf_counter()
+        for _ in range(args.intervals):
+            dashboard.refresher.refresh()
+        cached = (time.perf_counter() - start) / args.intervals
+
+        start = time.perf_counter()
+        for _ in range(args.intervals):
+            for _ in range(viewers):
+                for callback in callbacks:
+                    callback(1, None)
+        render = (time.perf_counter() - start) / args.intervals
+
+        print(f"{viewers:>3} viewers: data access per interval {uncached * 1000:8.1f} ms per-callback, "
+              f"{cached * 1000:6.1f} ms shared snapshot; figure building {render * 1000:7.1f} ms")
+    print(f"cache stats: {dashboard.cache.stats()}")
+
+
+if __name__ == '__main__':
+    main()
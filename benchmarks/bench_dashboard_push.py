@@ -0,0 +1,133 @@
+"""
+Compare bytes and CPU per dashboard update between polling and push mode.
+
+Replays a synthetic stream of snapshots: one per 5 s refresh, the
+current minute's rollup growing on every refresh and a new minute
+starting every 12 refreshes, with trend counts moving and the bursting
+list changing now and then. Polling mode runs the callbacks each
+``dcc.Interval`` would fire (the 10 s ones every other refresh) and
+serializes their outputs as Dash would send them, once sending whole
+figures every time and once keeping each client's data version so
+unchanged outputs are skipped and changed figures patched; push mode
+encodes the one server-sent event every client receives. Reports bytes
+on the wire and server CPU per refresh for one viewer. Run from the repository root:
+
+    PYTHONPATH=src:. python benchmarks/bench_dashboard_push.py --refreshes 720
+"""
+import argparse
+import json
+import random
+import time
+
+import dash
+import plotly.utils
+
+from processing.analyzer import Analyzer
+from utils.helpers import to_epoch_ms
+from visualization.dashboard import Dashboard
+from visualization.live import LiveFeed
+
+# Interval (in 5 s refreshes) of each polling callback, keyed by output id
+POLL_EVERY = {
+    'stream-status': 1,
+    'sentiment-graph': 1,
+    'trends-graph': 1,
+    'burst-graph': 2,
+    'volume-graph': 2,
+    'recent-tweets-table': 1,
+}
+
+
+def snapshots(count, seed=0):
+    """Synthetic snapshot data, one per 5 s refresh ending now"""
+    rng = random.Random(seed)
+    start_ms = to_epoch_ms() - count * 5000
+    start_ms -= start_ms % 60000
+    minutes = {}
+    trends = {f"#topic{i}": rng.randint(50, 500) for i in range(10)}
+    tweets = []
+    bursting = []
+    for i in range(count):
+        now_ms = start_ms + i * 5000
+        bucket = now_ms - now_ms % 60000
+        row = minutes.setdefault(bucket, [0, 0.0, 0.0])
+        for _ in range(rng.randint(20, 60)):
+            polarity = rng.uniform(-1, 1)
+            row[0] += 1
+            row[1] += polarity
+            row[2] += polarity * polarity
+            tweets.insert(0, {'text': f"tweet {row[0]} about #topic{rng.randint(0, 9)}",
+                              'user': f"user{rng.randint(0, 999)}",
+                              'sentiment': 'positive' if polarity > 0 else 'negative',
+                              'timestamp': time.strftime('%Y-%m-%d %H:%M:%S',
+                                                         time.localtime(now_ms / 1000))})
+            trends[f"#topic{rng.randint(0, 9)}"] += 1
+        del tweets[5:]
+        if i % 12 == 0:
+            bursting = [(f"#topic{rng.randint(0, 9)}", rng.uniform(3, 8), rng.randint(5, 50))
+                        for _ in range(rng.randint(0, 3))]
+        series = []
+        for bucket_ms in sorted(minutes)[-60:]:
+            n, total, squares = minutes[bucket_ms]
+            mean = total / n
+            series.append({'bucket_ms': bucket_ms, 'tweet_count': n, 'positive': 0,
+                           'negative': 0, 'neutral': 0, 'polarity_mean': mean,
+                           'polarity_std': max(0.0, squares / n - mean * mean) ** 0.5})
+        yield {
+            'refreshed_at': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(now_ms / 1000)),
+            'tweet_count': sum(n for n, _, _ in minutes.values()),
+            'minutes': series,
+            'recent_tweets': list(tweets),
+            'trends': sorted(trends.items(), key=lambda item: -item[1]),
+            'bursting': bursting,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--refreshes', type=int, default=720)
+    args = parser.parse_args()
+
+    dashboard = Dashboard(Analyzer(), refresh_interval=3600)
+    dashboard.refresher.stop()
+    callbacks = []
+    for key, entry in dashboard.app.callback_map.items():
+        every = max(POLL_EVERY.get(output.split('.')[0], 1) for output in key.strip('.').split('...'))
+        callbacks.append((every, entry['callback'].__wrapped__))
+    # Data version each callback's client store holds, for incremental polling
+    states = [None] * len(callbacks)
+    feed = LiveFeed(dashboard.cache, max_events=2)
+
+    totals = {mode: [0, 0.0] for mode in ('poll, whole figures', 'poll, incremental', 'push')}
+    version = 0
+    for i, data in enumerate(snapshots(args.refreshes)):
+        dashboard.cache.publish(data)
+
+        for mode in ('poll, whole figures', 'poll, incremental'):
+            start = time.process_time()
+            for j, (every, callback) in enumerate(callbacks):
+                if i % every:
+                    continue
+                incremental = mode == 'poll, incremental'
+                outputs = callback(i, states[j] if incremental else None)
+                if incremental and outputs[-1] is not dash.no_update:
+                    states[j] = outputs[-1]
+                sent = [output for output in outputs if output is not dash.no_update]
+                if sent:
+                    totals[mode][0] += len(json.dumps(sent, cls=plotly.utils.PlotlyJSONEncoder))
+            totals[mode][1] += time.process_time() - start
+
+        start = time.process_time()
+        snapshot = dashboard.cache.get()
+        totals['push'][0] += len(feed.event(snapshot, version))
+        version = snapshot.version
+        totals['push'][1] += time.process_time() - start
+
+    n = args.refreshes
+    print(f"{n} refreshes ({n * 5 / 60:.0f} minutes of updates), one viewer")
+    for mode, (size, cpu) in totals.items():
+        print(f"{mode:<20} {size / n / 1024:8.2f} KiB/update {cpu / n * 1000:8.2f} ms CPU/update")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""
+Measure how retention cleanup affects concurrent ingestion.
+
+Fills a scratch database with ``--tweets`` tweets spread over the last
+``--span-days`` days, then deletes everything older than ``--days``
+while another thread keeps committing small insert batches, as the
+ingestion writer does. Compares the chunked ``storage.retention.purge``
+with one DELETE transaction, as ``cleanup_old_data`` used to run.
+Reports rows deleted per second, the longest the cleanup held the write
+lock and the ingestion thread's worst commit latency. Run from the
+repository root:
+
+    PYTHONPATH=src:. python benchmarks/bench_retention.py --tweets 200000
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from storage import retention
+from storage.connection import get_pool
+from storage.database import Database
+from utils.helpers import to_epoch_ms
+
+
+def fill(path, tweets, span_days, seed=0):
+    rng = random.Random(seed)
+    database = Database(path, batch_size=5000)
+    now = datetime.now()
+    for i in range(tweets):
+        # Oldest first, like a live stream
+        age = span_days * (1 - i / tweets) + rng.uniform(0, 0.01)
+        database.store({
+            'text': f"tweet {i} about #topic{rng.randint(0, 99)}",
+            'timestamp': now - timedelta(days=age),
+            'user': f"user{rng.randint(0, 999)}",
+            'sentiment': {'polarity': rng.uniform(-1, 1), 'subjectivity': 0.5, 'sentiment': 'neutral'},
+            'trends': {'hashtags': [f"topic{rng.randint(0, 99)}"], 'mentions': []},
+        })
+    database.close()
+
+
+def ingest(path, stop, latencies):
+    """Commit a 50-row insert every 10 ms, recording each commit's latency"""
+    pool = get_pool(path)
+    conn = pool.writer()
+    rows = [(f"live tweet {i}", datetime.now().isoformat(), to_epoch_ms(), 'live') for i in range(50)]
+    while not stop.is_set():
+        start = time.perf_counter()
+        conn.execute('BEGIN IMMEDIATE')
+        conn.executemany('INSERT INTO tweets (text, timestamp, timestamp_ms, user) VALUES (?, ?, ?, ?)', rows)
+        conn.commit()
+        latencies.append(time.perf_counter() - start)
+        time.sleep(0.01)
+    pool.close_thread()
+
+
+def single_delete(conn, cutoff_ms):
+    start = time.perf_counter()
+    conn.execute('BEGIN IMMEDIATE')
+    conn.execute('''
+        DELETE FROM tweet_terms WHERE tweet_id IN (SELECT id FROM tweets WHERE timestamp_ms < ?)
+    ''', (cutoff_ms,))
+    deleted = conn.execute('DELETE FROM tweets WHERE timestamp_ms < ?', (cutoff_ms,)).rowcount
+    conn.commit()
+    elapsed = time.perf_counter() - start
+    return {'rows_deleted': deleted, 'elapsed': elapsed, 'max_lock_held': elapsed,
+            'rows_per_second': deleted / elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tweets', type=int, default=200000)
+    parser.add_argument('--span-days', type=float, default=30)
+    parser.add_argument('--days', type=float, default=7)
+    parser.add_argument('--chunk-size', type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        template = os.path.join(scratch, 'template.db')
+        fill(template, args.tweets, args.span_days)
+        get_pool(template).close_all()
+
+        for mode in ('single transaction', 'chunked'):
+            path = os.path.join(scratch, mode.replace(' ', '_') + '.db')
+            with open(template, 'rb') as src, open(path, 'wb') as dst:
+                dst.write(src.read())
+            conn = get_pool(path).writer()
+            cutoff_ms = to_epoch_ms() - int(args.days * retention.DAY_MS)
+
+            latencies = []
+            stop = threading.Event()
+            writer = threading.Thread(target=ingest, args=(path, stop, latencies))
+            writer.start()
+            time.sleep(0.2)
+            if mode == 'chunked':
+                stats = retention.purge(conn, cutoff_ms, chunk_size=args.chunk_size)
+            else:
+                stats = single_delete(conn, cutoff_ms)
+            time.sleep(0.2)
+            stop.set()
+            writer.join()
+
+            latencies.sort()
+            print(f"{mode:>18}: {stats['rows_deleted']} rows in {stats['elapsed']:.2f} s "
+                  f"({stats['rows_per_second']:,.0f} rows/s), longest lock "
+                  f"{stats['max_lock_held'] * 1000:.1f} ms; ingestion commit p50 "
+                  f"{latencies[len(latencies) // 2] * 1000:.1f} ms, max {latencies[-1] * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
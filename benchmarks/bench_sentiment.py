@@ -0,0 +1,97 @@
+"""
+Compare batch sentiment scoring against per-tweet TextBlob.
+
+Scores the same texts with ``Analyzer.analyze_sentiment`` (one TextBlob
+per tweet) and ``Analyzer.analyze_sentiment_batch``, reports throughput
+for both and checks that every polarity and subjectivity agrees within
+``--tolerance`` and every label matches. Texts come from ``--db`` (the
+``text`` column of a tweets database) or, by default, a seeded synthetic
+stream drawn from TextBlob's lexicon where ``--special-share`` of the
+tweets carry a negation, modifier, emoticon or exclamation. Run from the repository root:
+
+    PYTHONPATH=src python benchmarks/bench_sentiment.py --tweets 10000 --batch-size 1000
+"""
+import argparse
+import random
+import sqlite3
+import time
+
+from textblob.en import sentiment
+
+from processing.analyzer import Analyzer
+
+# Tokens that send a tweet down the order-dependent scoring path
+EXTRA_TOKENS = ["not", "never", "don't", "isn't", "very", "really", "!", "(!)", "...", ":)", ":(", ":D", ":d", "=D", "=d"]
+FILLER = ["the", "a", "is", "and", "to", "#python", "@user", "http://t.co/abc", "it's", "U.S."]
+
+
+def synthetic_tweets(count, seed=1, special_share=0.3):
+    rng = random.Random(seed)
+    if not dict.__len__(sentiment):
+        sentiment.load()
+    vocabulary = list(dict.keys(sentiment)) + FILLER * 10
+    for _ in range(count):
+        words = rng.choices(vocabulary, k=rng.randint(5, 25))
+        if rng.random() < special_share:
+            words.insert(rng.randrange(len(words) + 1), rng.choice(EXTRA_TOKENS))
+        yield ' '.join(words)
+
+
+def db_tweets(db_path, count):
+    conn = sqlite3.connect(db_path)
+    try:
+        for (text,) in conn.execute('SELECT text FROM tweets ORDER BY id LIMIT ?', (count,)):
+            yield text
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tweets', type=int, default=10000)
+    parser.add_argument('--db', help='score tweet texts from this database instead')
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--tolerance', type=float, default=1e-9)
+    parser.add_argument('--special-share', type=float, default=0.3,
+                        help='share of synthetic tweets with a negation, modifier or emoticon')
+    args = parser.parse_args()
+
+    texts = list(db_tweets(args.db, args.tweets) if args.db else synthetic_tweets(args.tweets, special_share=args.special_share))
+    if not texts:
+        print("No tweets to score")
+        return
+
+    analyzer = Analyzer()
+    analyzer.analyze_sentiment_batch(texts[:1])  # load the lexicon outside the timing
+
+    start = time.perf_counter()
+    expected = [analyzer.analyze_sentiment(text) for text in texts]
+    textblob_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    got = []
+    for offset in range(0, len(texts), args.batch_size):
+        got.extend(analyzer.analyze_sentiment_batch(texts[offset:offset + args.batch_size]))
+    batch_time = time.perf_counter() - start
+
+    max_diff = 0.0
+    mismatches = 0
+    label_mismatches = 0
+    for want, have in zip(expected, got):
+        diff = max(abs(want['polarity'] - have['polarity']),
+                   abs(want['subjectivity'] - have['subjectivity']))
+        max_diff = max(max_diff, diff)
+        mismatches += diff > args.tolerance
+        label_mismatches += want['sentiment'] != have['sentiment']
+
+    print(f"tweets scored:      {len(texts):,} (batches of {args.batch_size:,})")
+    print(f"throughput:         TextBlob {len(texts) / textblob_time:,.0f} tweets/s, "
+          f"batch {len(texts) / batch_time:,.0f} tweets/s "
+          f"({textblob_time / batch_time:.1f}x)")
+    print(f"parity:             max abs diff {max_diff:.2e}, "
+          f"{len(texts) - mismatches:,}/{len(texts):,} within {args.tolerance:g}, "
+          f"{label_mismatches} label mismatches")
+
+
+if __name__ == '__main__':
+    main()
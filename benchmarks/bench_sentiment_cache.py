@@ -0,0 +1,80 @@
+"""
+Measure the sentiment cache on a replayed stream with repeated texts.
+
+Replays ``--replay`` (an NDJSON export or spill file) or, by default, a
+seeded synthetic stream where ``--retweet-rate`` of the tweets retweet a
+recent one, written to NDJSON and read back with ``replay_arrivals``.
+Every text goes through ``analyze_sentiment`` (TextBlob) and
+``analyze_sentiment_batch``, once with the cache disabled and once with
+``--cache-size`` entries. Reports throughput both ways, the hit
+rate and whether every cached result matches the uncached one. Run from
+the repository root:
+
+    PYTHONPATH=src:. python benchmarks/bench_sentiment_cache.py --tweets 20000 --retweet-rate 0.4
+"""
+import argparse
+import itertools
+import json
+import os
+import tempfile
+import time
+
+from ingestion.loadgen import SyntheticTweets, replay_arrivals
+from processing.analyzer import Analyzer
+
+
+def replayed_texts(args):
+    if args.replay:
+        return [tweet['text'] for _, tweet in itertools.islice(replay_arrivals(args.replay, 0), args.tweets)]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'stream.ndjson')
+        with open(path, 'w', encoding='utf-8') as f:
+            for i, tweet in enumerate(itertools.islice(SyntheticTweets(args.seed, retweet_rate=args.retweet_rate),
+                                                       args.tweets)):
+                f.write(json.dumps(dict(tweet, timestamp_ms=i)) + '\n')
+        return [tweet['text'] for _, tweet in replay_arrivals(path, 0)]
+
+
+def per_tweet(analyzer, texts, batch_size):
+    return [analyzer.analyze_sentiment(text) for text in texts]
+
+
+def batched(analyzer, texts, batch_size):
+    results = []
+    for offset in range(0, len(texts), batch_size):
+        results.extend(analyzer.analyze_sentiment_batch(texts[offset:offset + batch_size]))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tweets', type=int, default=20000)
+    parser.add_argument('--replay', help='NDJSON stream to replay instead of synthetic tweets')
+    parser.add_argument('--retweet-rate', type=float, default=0.4)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--cache-size', type=int, default=100000)
+    parser.add_argument('--batch-size', type=int, default=256)
+    args = parser.parse_args()
+
+    texts = replayed_texts(args)
+    print(f"tweets replayed:    {len(texts):,} ({len(set(texts)) / len(texts):.0%} distinct texts)")
+    for name, run in (('analyze_sentiment', per_tweet), ('sentiment_batch', batched)):
+        timings = {}
+        results = {}
+        for size in (0, args.cache_size):
+            analyzer = Analyzer(sentiment_cache_size=size)
+            analyzer.analyze_sentiment_batch(['warm up'])  # load the lexicon outside the timing
+            analyzer.reload_sentiment(analyzer.lexicon)
+            start = time.perf_counter()
+            results[size] = run(analyzer, texts, args.batch_size)
+            timings[size] = time.perf_counter() - start
+            stats = analyzer.sentiment_cache.stats() if size else None
+        mismatches = sum(a != b for a, b in zip(results[0], results[args.cache_size]))
+        print(f"{name:<19} uncached {len(texts) / timings[0]:>9,.0f} tweets/s, "
+              f"cached {len(texts) / timings[args.cache_size]:>9,.0f} tweets/s "
+              f"({timings[0] / timings[args.cache_size]:.2f}x); hit rate {stats['hit_rate']:.0%}, "
+              f"{stats['evictions']:,} evictions, {mismatches} mismatches")
+
+
+if __name__ == '__main__':
+    main()
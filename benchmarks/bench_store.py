@@ -0,0 +1,85 @@
+"""
+Benchmark Database.store throughput: per-row commits vs the batched writer.
+
+Run from the repository root:
+
+    PYTHONPATH=src python benchmarks/bench_store.py --rows 20000
+"""
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+
+from storage.database import Database
+
+# Insert statement used by Database.store before it was batched
+PER_ROW_INSERT_SQL = '''
+    INSERT INTO tweets (
+        text, timestamp, user,
+        retweet_count, favorite_count,
+        sentiment, trends
+    ) VALUES (?, ?, ?, ?, ?, ?, ?)
+'''
+
+
+def sample_row(i):
+    return {
+        'text': f"Benchmark tweet number {i} about #AI and machine learning",
+        'timestamp': datetime.now().isoformat(),
+        'user': f"bench_user_{i % 1000}",
+        'retweet_count': i % 100,
+        'favorite_count': i % 200,
+        'sentiment': {'polarity': 0.1, 'subjectivity': 0.4, 'sentiment': 'positive'},
+        'trends': {'hashtags': ['ai'], 'mentions': [], 'top_trends': {}}
+    }
+
+
+def bench_per_row(db_path, rows):
+    """The original write path: connect, insert, commit and close per tweet"""
+    Database(db_path).close()
+    start = time.perf_counter()
+    for i in range(rows):
+        data = sample_row(i)
+        conn = sqlite3.connect(db_path)
+        conn.execute(PER_ROW_INSERT_SQL, (
+            data['text'], data['timestamp'], data['user'],
+            data['retweet_count'], data['favorite_count'],
+            json.dumps(data['sentiment']), json.dumps(data['trends'])
+        ))
+        conn.commit()
+        conn.close()
+    return time.perf_counter() - start
+
+
+def bench_batched(db_path, rows, batch_size, flush_interval):
+    database = Database(db_path, batch_size=batch_size, flush_interval=flush_interval)
+    start = time.perf_counter()
+    for i in range(rows):
+        database.store(sample_row(i))
+    database.close()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--flush-interval', type=float, default=0.25)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        before = bench_per_row(os.path.join(tmp, 'per_row.db'), args.rows)
+        after = bench_batched(os.path.join(tmp, 'batched.db'), args.rows,
+                              args.batch_size, args.flush_interval)
+
+    print(f"rows:        {args.rows}")
+    print(f"per-row:     {args.rows / before:,.0f} rows/sec ({before:.2f}s)")
+    print(f"batched:     {args.rows / after:,.0f} rows/sec ({after:.2f}s)")
+    print(f"speedup:     {before / after:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
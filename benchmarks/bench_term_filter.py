@@ -0,0 +1,114 @@
+"""
+Measure how term filtering cuts trend-key cardinality and memory.
+
+Replays the same tweets through the trend extraction of ``Analyzer``
+into a ``SlidingWindowCounter`` three times: without filtering, with the
+default ``TermFilter`` and with a ``TermFilter`` plus a PMI
+``CollocationScorer``. For each it reports distinct keys, memory held by
+the window (``tracemalloc``), the time of a full ``most_common`` and the
+resulting top phrases. Tweets come from ``--db`` (the ``text`` column of
+a tweets database) or, by default, seeded synthetic English-like tweets
+built from topical phrases, function words, URLs and numbers. Run from
+the repository root:
+
+    PYTHONPATH=src python benchmarks/bench_term_filter.py --tweets 100000 --min-pmi 3
+"""
+import argparse
+import random
+import sqlite3
+import time
+import tracemalloc
+
+from processing.analyzer import Analyzer
+from processing.filters import CollocationScorer, STOPWORDS, TermFilter
+from processing.tokenizer import phrase
+from processing.window import SlidingWindowCounter
+
+TOPICS = [
+    "machine learning", "deep learning models", "data science", "neural networks",
+    "natural language processing", "computer vision", "big data analytics",
+    "cloud computing", "artificial intelligence", "open source", "python developers",
+    "real time dashboards", "climate change", "stock market", "world cup final",
+]
+FUNCTION_WORDS = sorted(word for word in STOPWORDS if len(word) > 1)
+
+
+def synthetic_tweets(count, seed=1, vocabulary=20000):
+    rng = random.Random(seed)
+    words = [f"term{i}" for i in range(vocabulary)]
+    weights = [1.0 / (rank + 1) for rank in range(vocabulary)]
+    topic_weights = [1.0 / (rank + 1) for rank in range(len(TOPICS))]
+    for _ in range(count):
+        parts = []
+        for _ in range(rng.randint(3, 7)):
+            roll = rng.random()
+            if roll < 0.3:
+                parts.append(rng.choices(TOPICS, topic_weights)[0])
+            elif roll < 0.65:
+                parts.append(' '.join(rng.choices(FUNCTION_WORDS, k=rng.randint(1, 3))))
+            else:
+                parts.append(' '.join(rng.choices(words, weights, k=rng.randint(1, 3))))
+        if rng.random() < 0.3:
+            parts.append(f"https://t.co/{rng.getrandbits(32):x}")
+        if rng.random() < 0.2:
+            parts.insert(rng.randrange(len(parts)), str(rng.randint(1, 5000)))
+        if rng.random() < 0.5:
+            parts.append(f"#{rng.choice(TOPICS).split()[0]}")
+        yield ' '.join(parts)
+
+
+def db_tweets(db_path, count):
+    conn = sqlite3.connect(db_path)
+    try:
+        for (text,) in conn.execute('SELECT text FROM tweets ORDER BY id LIMIT ?', (count,)):
+            yield text
+    finally:
+        conn.close()
+
+
+def replay(texts, term_filter):
+    analyzer = Analyzer(term_filter=term_filter)
+    start = time.perf_counter()
+    tracemalloc.start()
+    window = SlidingWindowCounter(top_k=10)
+    for i, text in enumerate(texts):
+        window.update(analyzer.extract_trends(text)[2], i * 0.06)
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    elapsed = time.perf_counter() - start
+    start = time.perf_counter()
+    window.most_common()
+    sort_time = time.perf_counter() - start
+    return window, memory, elapsed, sort_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tweets', type=int, default=100000)
+    parser.add_argument('--db', help='replay tweet texts from this database instead')
+    parser.add_argument('--min-pmi', type=float, default=3.0)
+    parser.add_argument('--min-count', type=int, default=3)
+    args = parser.parse_args()
+
+    texts = list(db_tweets(args.db, args.tweets) if args.db else synthetic_tweets(args.tweets))
+    if not texts:
+        print("No tweets to replay")
+        return
+
+    modes = [
+        ('unfiltered', False),
+        ('filtered', TermFilter()),
+        (f'filtered+pmi>={args.min_pmi:g}',
+         TermFilter(scorer=CollocationScorer(min_pmi=args.min_pmi, min_count=args.min_count))),
+    ]
+    print(f"tweets replayed: {len(texts):,}")
+    for name, term_filter in modes:
+        window, memory, elapsed, sort_time = replay(texts, term_filter)
+        top = ', '.join(f"{phrase(item)} ({count})" for item, count in window.top_items()[:5])
+        print(f"{name:>18}: {len(window):9,} keys, {memory / 2**20:7.1f} MiB, "
+              f"{len(texts) / elapsed:8,.0f} tweets/s, most_common {sort_time * 1000:7.1f} ms")
+        print(f"{'':>18}  top: {top}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmark time-window queries on a large tweets table.
+
+Builds a database with ``--rows`` tweets spread over ``--days`` days, then
+compares the old function-wrapped text predicate with the epoch-millisecond
+range predicate and prints the query plan of each. Run from the repository
+root:
+
+    PYTHONPATH=src python benchmarks/bench_time_range.py --rows 10000000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime
+
+from storage.database import Database
+from utils.helpers import to_epoch_ms
+
+LABELS = ('positive', 'negative', 'neutral')
+
+# The predicate get_sentiment_stats used before timestamps were integers
+TEXT_QUERY = '''
+    SELECT sentiment_label, COUNT(*) FROM tweets
+    WHERE datetime(timestamp) > datetime('now', ?)
+    GROUP BY sentiment_label
+'''
+
+RANGE_QUERY = '''
+    SELECT sentiment_label, COUNT(*) FROM tweets
+    WHERE timestamp_ms > ?
+    GROUP BY sentiment_label
+'''
+
+
+def build(db_path, rows, days, seed=42):
+    database = Database(db_path)
+    database.close()
+    conn = database.pool.writer()
+    rng = random.Random(seed)
+    end_ms = to_epoch_ms()
+    span_ms = days * 86400 * 1000
+    chunk = 100000
+    start = time.perf_counter()
+    for offset in range(0, rows, chunk):
+        batch = []
+        for _ in range(min(chunk, rows - offset)):
+            ts_ms = end_ms - rng.randrange(span_ms)
+            polarity = rng.uniform(-1, 1)
+            batch.append((
+                "benchmark tweet", datetime.fromtimestamp(ts_ms / 1000).isoformat(), ts_ms,
+                polarity, LABELS[rng.randrange(3)]
+            ))
+        with conn:
+            conn.executemany('''
+                INSERT INTO tweets (text, timestamp, timestamp_ms, polarity, sentiment_label)
+                VALUES (?, ?, ?, ?, ?)
+            ''', batch)
+    conn.execute('ANALYZE')
+    print(f"built {rows:,} rows in {time.perf_counter() - start:.1f}s")
+    return conn
+
+
+def run(conn, label, sql, params, repeat):
+    plan = [row[-1] for row in conn.execute('EXPLAIN QUERY PLAN ' + sql, params)]
+    start = time.perf_counter()
+    for _ in range(repeat):
+        conn.execute(sql, params).fetchall()
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"{label:<12} {elapsed * 1000:10.2f} ms   plan: {'; '.join(plan)}")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10000000)
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--hours', type=int, default=24, help='query window')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = build(os.path.join(tmp, 'bench.db'), args.rows, args.days)
+        since_ms = to_epoch_ms() - args.hours * 3600 * 1000
+        before = run(conn, 'text scan', TEXT_QUERY, (f'-{args.hours} hours',), args.repeat)
+        after = run(conn, 'epoch range', RANGE_QUERY, (since_ms,), args.repeat)
+        print(f"speedup: {before / after:.1f}x")
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""
+Compare the single-pass trend tokenizer with the previous extraction.
+
+The previous ``Analyzer.extract_trends`` (three ``re.findall`` passes and
+``' '.join`` 3-gram strings) is reproduced below as ``legacy_extract``.
+For the same tweets this reports per-tweet latency percentiles, bytes
+allocated while extracting (``tracemalloc`` peak over a batch), and the
+memory held by a window's worth of distinct trend keys. It also checks
+that both produce the same hashtags, mentions and phrases. Run from the
+repository root:
+
+    PYTHONPATH=src python benchmarks/bench_tokenizer.py --tweets 20000
+"""
+import argparse
+import random
+import re
+import sqlite3
+import time
+import tracemalloc
+
+from processing.tokenizer import TrendTokenizer, phrase
+
+
+def legacy_extract(text):
+    text = text.lower()
+    hashtags = set(re.findall(r'#(\w+)', text))
+    mentions = set(re.findall(r'@(\w+)', text))
+    words = re.findall(r'\b\w+\b', text)
+    phrases = [' '.join(words[i:i+3]) for i in range(len(words)-2)]
+    items = [f'#{item}' for item in hashtags]
+    items.extend(f'@{item}' for item in mentions)
+    items.extend(phrases)
+    return hashtags, mentions, items
+
+
+def synthetic_tweets(count, seed=1, vocabulary=5000):
+    rng = random.Random(seed)
+    words = [f"word{i}" for i in range(vocabulary)]
+    weights = [1.0 / (rank + 1) for rank in range(vocabulary)]
+    for _ in range(count):
+        body = rng.choices(words, weights, k=rng.randint(8, 25))
+        body += [f"#Tag{rng.randint(0, 200)}" for _ in range(rng.randint(0, 3))]
+        body += [f"@user{rng.randint(0, 500)}" for _ in range(rng.randint(0, 1))]
+        rng.shuffle(body)
+        yield ' '.join(body) + rng.choice(['', '!', ' http://t.co/x', '...'])
+
+
+def db_tweets(db_path, count):
+    conn = sqlite3.connect(db_path)
+    try:
+        for (text,) in conn.execute('SELECT text FROM tweets ORDER BY id LIMIT ?', (count,)):
+            yield text
+    finally:
+        conn.close()
+
+
+def latencies(extract, texts):
+    timings = []
+    for text in texts:
+        start = time.perf_counter_ns()
+        extract(text)
+        timings.append(time.perf_counter_ns() - start)
+    timings.sort()
+    return timings
+
+
+def allocated(extract, texts):
+    """Peak traced bytes while extracting every text, keeping no results"""
+    tracemalloc.start()
+    for text in texts:
+        extract(text)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def retained(extract, texts):
+    """Bytes held by a dict of every distinct trend key seen"""
+    tracemalloc.start()
+    keys = {}
+    for text in texts:
+        for item in extract(text)[2]:
+            keys[item] = keys.get(item, 0) + 1
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current, len(keys)
+
+
+def percentile(timings, share):
+    return timings[min(len(timings) - 1, int(share * len(timings)))] / 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tweets', type=int, default=20000)
+    parser.add_argument('--db', help='tokenize tweet texts from this database instead')
+    args = parser.parse_args()
+
+    texts = list(db_tweets(args.db, args.tweets) if args.db else synthetic_tweets(args.tweets))
+    if not texts:
+        print("No tweets to tokenize")
+        return
+    tokenizer = TrendTokenizer(3)
+
+    for text in texts:
+        old_tags, old_mentions, old_items = legacy_extract(text)
+        tags, mentions, items = tokenizer.extract(text)
+        if (old_tags, old_mentions, old_items) != (tags, mentions, [phrase(item) for item in items]):
+            print(f"Mismatch for {text!r}")
+            return
+    print(f"parity:        {len(texts):,} tweets, identical hashtags, mentions and phrases")
+
+    for name, extract in (('legacy', legacy_extract), ('single-pass', tokenizer.extract)):
+        latencies(extract, texts[:1000])  # warm up
+        timings = latencies(extract, texts)
+        peak = allocated(extract, texts)
+        held, distinct = retained(extract, texts)
+        print(f"{name:>12}: p50 {percentile(timings, 0.5):6.2f} us, p99 {percentile(timings, 0.99):6.2f} us, "
+              f"{sum(timings) / len(timings) / 1000:6.2f} us mean | "
+              f"peak alloc {peak / 1024:7.1f} KiB | "
+              f"{distinct:,} keys hold {held / 2**20:6.1f} MiB")
+
+
+if __name__ == '__main__':
+    main()
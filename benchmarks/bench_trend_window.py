@@ -0,0 +1,103 @@
+"""
+Benchmark trend-window maintenance: list-based eviction vs SlidingWindowCounter.
+
+Replays synthetic tweets on a simulated clock at a fixed rate so that the
+window fills up and starts evicting, then reports tweets/sec for each
+implementation. The window is scaled down (``--window-minutes``) so the
+steady state is reached quickly. Run from the repository root:
+
+    PYTHONPATH=src python benchmarks/bench_trend_window.py --rates 1000 10000 100000
+"""
+import argparse
+import random
+import re
+import time
+from collections import Counter
+from datetime import timedelta
+
+from processing.window import SlidingWindowCounter
+
+VOCABULARY = [f"word{i}" for i in range(5000)]
+HASHTAGS = [f"tag{i}" for i in range(300)]
+
+
+class ListWindow:
+    """The trend window Analyzer used before SlidingWindowCounter"""
+
+    def __init__(self, window_seconds):
+        self.window_seconds = window_seconds
+        self.trends = Counter()
+        self.trend_timestamps = []
+        self.trend_data = []
+
+    def update(self, items, now):
+        cutoff = now - self.window_seconds
+        while self.trend_timestamps and self.trend_timestamps[0] < cutoff:
+            old_data = self.trend_data.pop(0)
+            self.trend_timestamps.pop(0)
+            for item in old_data:
+                self.trends[item] -= 1
+                if self.trends[item] <= 0:
+                    del self.trends[item]
+        for item in items:
+            self.trends[item] += 1
+            self.trend_timestamps.append(now)
+            self.trend_data.append([item])
+
+
+class BucketWindow:
+    def __init__(self, window_seconds):
+        self.counter = SlidingWindowCounter(timedelta(seconds=window_seconds))
+
+    def update(self, items, now):
+        self.counter.expire(now)
+        self.counter.update(items, now)
+
+
+def tweet_items(rng):
+    words = [rng.choice(VOCABULARY) for _ in range(12)]
+    text = ' '.join(words) + f" #{rng.choice(HASHTAGS)}"
+    words = re.findall(r'\b\w+\b', text)
+    items = [f'#{tag}' for tag in set(re.findall(r'#(\w+)', text))]
+    items.extend(' '.join(words[i:i + 3]) for i in range(len(words) - 2))
+    return items
+
+
+def run(window_cls, rate, window_minutes, minutes, budget, seed=7):
+    rng = random.Random(seed)
+    # Pre-generate a pool of tweets so only window maintenance is timed
+    pool = [tweet_items(rng) for _ in range(2000)]
+    window = window_cls(window_minutes * 60)
+    step = 60.0 / rate
+    total = int(rate * minutes)
+    processed = 0
+    start = time.perf_counter()
+    for i in range(total):
+        window.update(pool[i % len(pool)], i * step)
+        processed += 1
+        if processed % 1000 == 0 and time.perf_counter() - start > budget:
+            break
+    elapsed = time.perf_counter() - start
+    return processed, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rates', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help='tweets per simulated minute')
+    parser.add_argument('--window-minutes', type=int, default=5)
+    parser.add_argument('--minutes', type=int, default=10, help='simulated minutes to replay')
+    parser.add_argument('--budget', type=float, default=30.0,
+                        help='wall-clock seconds allowed per run before it is cut short')
+    args = parser.parse_args()
+
+    print(f"{'rate/min':>10} {'impl':>8} {'tweets':>10} {'tweets/sec':>12}")
+    for rate in args.rates:
+        for name, cls in (('list', ListWindow), ('bucket', BucketWindow)):
+            processed, elapsed = run(cls, rate, args.window_minutes, args.minutes, args.budget)
+            note = '' if processed == rate * args.minutes else '  (stopped at budget)'
+            print(f"{rate:>10} {name:>8} {processed:>10} {processed / elapsed:>12,.0f}{note}")
+
+
+if __name__ == '__main__':
+    main()
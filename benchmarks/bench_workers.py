@@ -0,0 +1,62 @@
+"""
+Measure analysis throughput of ``AnalysisPool`` at several worker counts.
+
+A fixed batch of synthetic tweets is analyzed in-process (``workers=0``)
+and then with 1, 2, 4 and 8 worker processes, merging trend counts into
+one ``Analyzer`` each time. Pools are warmed up before timing so process
+start-up and lexicon loading are not counted. Run from the repository
+root:
+
+    PYTHONPATH=src python benchmarks/bench_workers.py --tweets 100000 --workers 0 1 2 4 8
+"""
+import argparse
+import os
+import random
+import time
+
+from processing.analyzer import Analyzer
+from processing.workers import AnalysisPool
+
+WORDS = [
+    "great", "terrible", "love", "hate", "new", "model", "data", "really", "not", "very",
+    "happy", "sad", "python", "learning", "deep", "cloud", "fast", "slow", "the", "a",
+    "is", "and", "to", "of", "with", "amazing", "awful", "good", "bad", "today",
+]
+TAGS = ["#AI", "#Python", "#DataScience", "#MLOps", "#NLP", "@openai", "@user"]
+
+
+def synthetic_tweets(count, seed=1):
+    rng = random.Random(seed)
+    for i in range(count):
+        words = rng.choices(WORDS, k=rng.randint(8, 25)) + rng.choices(TAGS, k=rng.randint(0, 3))
+        yield {'text': ' '.join(words), 'user': f"user_{i % 1000}"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tweets', type=int, default=100000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[0, 1, 2, 4, 8])
+    parser.add_argument('--chunk-size', type=int, default=256)
+    args = parser.parse_args()
+
+    tweets = list(synthetic_tweets(args.tweets))
+    print(f"tweets per run: {len(tweets):,}, chunk size {args.chunk_size}, {os.cpu_count()} CPUs")
+    baseline = None
+    for workers in args.workers:
+        pool = AnalysisPool(Analyzer(), workers=workers, chunk_size=args.chunk_size)
+        try:
+            pool.analyze([dict(tweet) for tweet in tweets[:args.chunk_size * max(1, workers)]])
+            batch = [dict(tweet) for tweet in tweets]
+            start = time.perf_counter()
+            pool.analyze(batch)
+            elapsed = time.perf_counter() - start
+        finally:
+            pool.close()
+        rate = len(batch) / elapsed
+        baseline = baseline or rate
+        label = 'in-process' if workers == 0 else f"{workers} worker{'s' if workers > 1 else ''}"
+        print(f"{label:>12}: {rate:10,.0f} tweets/s  ({rate / baseline:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
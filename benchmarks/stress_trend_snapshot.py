@@ -0,0 +1,101 @@
+"""
+Stress the Analyzer's trend snapshots with concurrent writers and readers.
+
+Writer threads merge batches into one Analyzer under a shared lock, as
+the analysis pool and the stream consumers do. Every batch adds the same
+count to three marker hashtags plus a spread of noise terms, so in any
+consistent view the markers' counts are equal. Reader threads, which
+take no lock, check every snapshot they get: versions never go
+backwards, counts are sorted and the markers agree. With ``--unsafe``
+the readers instead iterate the live trend Counter, as the dashboard
+used to, to show the races the snapshots remove. Run from the
+repository root:
+
+    PYTHONPATH=src:. python benchmarks/stress_trend_snapshot.py --writers 4 --readers 8 --seconds 5
+"""
+import argparse
+import random
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from processing.analyzer import Analyzer
+
+MARKERS = ('#alpha', '#beta', '#gamma')
+
+
+def writer(analyzer, lock, stop, seed, stats):
+    rng = random.Random(seed)
+    while not stop.is_set():
+        counts = Counter({marker: 50 for marker in MARKERS})
+        for _ in range(200):
+            counts[f"#noise{rng.randint(0, 5000)}"] += 1
+        with lock:
+            analyzer.record_trends(counts, datetime.now())
+        stats['writes'] += 1
+
+
+def reader(analyzer, stop, unsafe, stats):
+    last_version = 0
+    while not stop.is_set():
+        try:
+            if unsafe:
+                counts = dict(analyzer.trends.most_common(10))
+            else:
+                snapshot = analyzer.trend_snapshot()
+                if snapshot.version < last_version:
+                    stats['regressions'] += 1
+                last_version = snapshot.version
+                counts = dict(snapshot.top_trends)
+                values = [count for _, count in snapshot.top_trends]
+                if values != sorted(values, reverse=True):
+                    stats['unsorted'] += 1
+            markers = {counts.get(marker) for marker in MARKERS}
+            if len(markers) > 1:
+                stats['torn'] += 1
+        except RuntimeError:
+            # "dictionary changed size during iteration"
+            stats['errors'] += 1
+        stats['reads'] += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--unsafe', action='store_true',
+                        help="read the live Counter instead of the published snapshot")
+    args = parser.parse_args()
+
+    analyzer = Analyzer(top_k=10)
+    lock = threading.Lock()
+    stop = threading.Event()
+    writer_stats = [Counter() for _ in range(args.writers)]
+    reader_stats = [Counter() for _ in range(args.readers)]
+    threads = [threading.Thread(target=writer, args=(analyzer, lock, stop, i, writer_stats[i]))
+               for i in range(args.writers)]
+    threads += [threading.Thread(target=reader, args=(analyzer, stop, args.unsafe, reader_stats[i]))
+                for i in range(args.readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    writes = sum(stats['writes'] for stats in writer_stats)
+    totals = sum(reader_stats, Counter())
+    print(f"{'live Counter' if args.unsafe else 'snapshots'}: {args.writers} writers, {args.readers} readers, "
+          f"{args.seconds:g} s")
+    print(f"  batches written  {writes:>10} ({writes / args.seconds:,.0f}/s)")
+    print(f"  reads            {totals['reads']:>10} ({totals['reads'] / args.seconds:,.0f}/s)")
+    for name in ('errors', 'torn', 'unsorted', 'regressions'):
+        print(f"  {name:<16} {totals[name]:>10}")
+    if not args.unsafe:
+        print(f"  final version    {analyzer.trend_snapshot().version:>10}")
+
+
+if __name__ == '__main__':
+    main()
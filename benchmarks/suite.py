@@ -0,0 +1,396 @@
+"""
+Reproducible pipeline benchmark suite with regression tracking.
+
+``run`` times a fixed set of seeded scenarios and writes the results as
+JSON; ``compare`` diffs two result files and exits non-zero when any
+metric got worse by more than ``--threshold`` percent. Scenarios:
+
+- ``sentiment.per_tweet`` / ``sentiment.batch``: ``analyze_sentiment``
+  one tweet at a time and ``analyze_sentiment_batch``
+- ``trends.window_<span>``: ``analyze_trends`` against a trend window
+  already filled across its whole span
+- ``store``: ``Database.store`` until every row is committed
+- ``dashboard.rows_<n>``: snapshot refresh and full figure callbacks
+  on a database of ``n`` tweets (1M and 10M in the full profile)
+- ``pipeline.max`` / ``pipeline.open``: load generator to rows readable
+  in the database, as fast as possible and at a fixed rate
+
+Every metric is the median of ``--repeat`` runs. The quick profile
+shrinks the workloads for smoke tests; compare results of the same
+profile on the same machine only. Run from the repository root:
+
+    PYTHONPATH=src:. python -m benchmarks.suite run --output before.json
+    PYTHONPATH=src:. python -m benchmarks.suite compare before.json after.json --threshold 10
+"""
+import argparse
+import fnmatch
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from ingestion.buffer import IngestQueue
+from ingestion.loadgen import (LoadGenerator, SyntheticTweets, constant, percentile,
+                               synthetic_arrivals)
+from ingestion.stream_listener import StreamListener
+from processing.analyzer import Analyzer
+from storage import rollups
+from storage.connection import get_pool
+from storage.database import Database
+from utils.helpers import to_epoch_ms
+
+PROFILES = {
+    'quick': {
+        'sentiment_tweets': 1000,
+        'batch_tweets': 10000,
+        'trend_tweets': 2000,
+        'trend_fill': 5000,
+        'store_rows': 20000,
+        'dashboard_rows': [100000],
+        'pipeline_tweets': 5000,
+        'pipeline_rate': 200,
+        'pipeline_seconds': 5,
+    },
+    'full': {
+        'sentiment_tweets': 5000,
+        'batch_tweets': 50000,
+        'trend_tweets': 10000,
+        'trend_fill': 50000,
+        'store_rows': 100000,
+        'dashboard_rows': [1000000, 10000000],
+        'pipeline_tweets': 50000,
+        'pipeline_rate': 500,
+        'pipeline_seconds': 20,
+    },
+}
+
+TREND_WINDOWS = {'1m': timedelta(minutes=1), '1h': timedelta(hours=1), '24h': timedelta(hours=24)}
+
+
+def metric(value, unit, higher_is_better):
+    return {'value': value, 'unit': unit, 'higher_is_better': higher_is_better}
+
+
+def tweets(count, seed=0):
+    return list(itertools.islice(SyntheticTweets(seed), count))
+
+
+def bench_sentiment_per_tweet(settings, scratch):
+    texts = [tweet['text'] for tweet in tweets(settings['sentiment_tweets'])]
+    analyzer = Analyzer()
+    analyzer.analyze_sentiment(texts[0])
+    start = time.perf_counter()
+    for text in texts:
+        analyzer.analyze_sentiment(text)
+    elapsed = time.perf_counter() - start
+    return {'throughput': metric(len(texts) / elapsed, 'tweets/s', True)}
+
+
+def bench_sentiment_batch(settings, scratch, batch_size=1000):
+    texts = [tweet['text'] for tweet in tweets(settings['batch_tweets'])]
+    analyzer = Analyzer()
+    analyzer.analyze_sentiment_batch(texts[:1])  # load the lexicon outside the timing
+    start = time.perf_counter()
+    for offset in range(0, len(texts), batch_size):
+        analyzer.analyze_sentiment_batch(texts[offset:offset + batch_size])
+    elapsed = time.perf_counter() - start
+    return {'throughput': metric(len(texts) / elapsed, 'tweets/s', True)}
+
+
+def trend_scenario(window):
+    def bench_trends(settings, scratch):
+        analyzer = Analyzer(trend_window=window)
+        texts = [tweet['text'] for tweet in tweets(settings['trend_tweets'] + settings['trend_fill'])]
+        # Fill the window evenly up to now so every bucket is live
+        fill = texts[settings['trend_tweets']:]
+        now = datetime.now()
+        for i, text in enumerate(fill):
+            timestamp = now - window + window * (i + 1) / (len(fill) + 1)
+            items = analyzer.extract_trends(text)[2]
+            analyzer.window.update(items, timestamp)
+            analyzer.burst.update(items, timestamp)
+        start = time.perf_counter()
+        for text in texts[:settings['trend_tweets']]:
+            analyzer.analyze_trends(text)
+        analyzer.publish_trends()
+        elapsed = time.perf_counter() - start
+        return {'throughput': metric(settings['trend_tweets'] / elapsed, 'tweets/s', True)}
+    return bench_trends
+
+
+def bench_store(settings, scratch):
+    rows = tweets(settings['store_rows'])
+    analyzer = Analyzer()
+    for tweet, sentiment in zip(rows, analyzer.analyze_sentiment_batch([tweet['text'] for tweet in rows])):
+        hashtags, mentions, _ = analyzer.extract_trends(tweet['text'])
+        tweet.update({
+            'timestamp': datetime.now().isoformat(),
+            'sentiment': sentiment,
+            'trends': {'hashtags': list(hashtags), 'mentions': list(mentions)}
+        })
+    with tempfile.TemporaryDirectory(dir=scratch) as tmp:
+        database = Database(os.path.join(tmp, 'store.db'))
+        start = time.perf_counter()
+        for tweet in rows:
+            database.store(tweet)
+        database.close()
+        elapsed = time.perf_counter() - start
+    return {'throughput': metric(len(rows) / elapsed, 'rows/s', True)}
+
+
+def build_dashboard_db(path, rows, days=30, seed=42, chunk=100000):
+    """Tweets spread over ``days`` days up to now, with their rollups"""
+    database = Database(path)
+    database.close()
+    conn = database.pool.writer()
+    rng = random.Random(seed)
+    end_ms = to_epoch_ms()
+    span_ms = days * 86400 * 1000
+    for offset in range(0, rows, chunk):
+        batch = []
+        for i in range(offset, min(offset + chunk, rows)):
+            # Ascending timestamps, like a live stream
+            ts_ms = end_ms - span_ms + span_ms * i // rows + rng.randrange(1000)
+            polarity = rng.uniform(-1, 1)
+            batch.append((
+                f"benchmark tweet {i}", datetime.fromtimestamp(ts_ms / 1000).isoformat(), ts_ms,
+                f"user{rng.randrange(10000)}", polarity,
+                'positive' if polarity > 0.1 else 'negative' if polarity < -0.1 else 'neutral'
+            ))
+        with conn:
+            conn.executemany('''
+                INSERT INTO tweets (text, timestamp, timestamp_ms, user, polarity, sentiment_label)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', batch)
+            rollups.backfill(conn, offset + 1, offset + len(batch))
+    conn.execute('ANALYZE')
+    return path
+
+
+def dashboard_scenario(rows):
+    def bench_dashboard(settings, scratch):
+        from visualization.dashboard import Dashboard
+
+        path = os.path.join(scratch, f'dashboard_{rows}.db')
+        if not os.path.exists(path):
+            build_dashboard_db(path, rows)
+        dashboard = Dashboard(Analyzer(), refresh_interval=3600)
+        dashboard.refresher.stop()
+        dashboard.pool = get_pool(path)
+        callbacks = [entry['callback'].__wrapped__ for entry in dashboard.app.callback_map.values()]
+
+        # Warm up Plotly's validators outside the timing
+        dashboard.refresher.refresh()
+        for callback in callbacks:
+            callback(1, None)
+
+        start = time.perf_counter()
+        dashboard.refresher.refresh()
+        refresh = time.perf_counter() - start
+        start = time.perf_counter()
+        for callback in callbacks:
+            callback(1, None)
+        render = time.perf_counter() - start
+        return {
+            'refresh': metric(refresh * 1000, 'ms', False),
+            'callbacks': metric(render * 1000, 'ms', False),
+        }
+    return bench_dashboard
+
+
+class _RecordingQueue(IngestQueue):
+    """IngestQueue remembering when each accepted tweet was due, in order"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.due = []
+
+    def put(self, item):
+        accepted = super().put(item)
+        if accepted:
+            self.due.append(item['due_at'])
+        return accepted
+
+
+def run_pipeline(scratch, generator):
+    """
+    Feed ``generator`` through a StreamListener into a fresh database.
+    Returns (accepted, seconds until the last row was readable, latency
+    of each tweet from due to readable).
+    """
+    with tempfile.TemporaryDirectory(dir=scratch) as tmp:
+        path = os.path.join(tmp, 'pipeline.db')
+        queue = _RecordingQueue(maxsize=10000)
+        listener = StreamListener(analyzer=Analyzer(), database=Database(path), queue=queue,
+                                  load_generator=generator)
+        conn = get_pool(path).reader()
+        # With one consumer rows get ids in queue order, so MAX(id) = k
+        # means the first k tweets are readable
+        visible_at = []
+        done = threading.Event()
+
+        def probe():
+            while True:
+                finished = done.is_set()
+                visible, = conn.execute('SELECT COALESCE(MAX(id), 0) FROM tweets').fetchone()
+                now = time.time()
+                visible_at.extend([now] * (visible - len(visible_at)))
+                if finished and visible >= len(queue.due):
+                    return
+                time.sleep(0.005)
+
+        prober = threading.Thread(target=probe, name='queryable-probe')
+        start = time.time()
+        listener.start()
+        prober.start()
+        listener.sample_thread.join()
+        listener.stop()
+        done.set()
+        prober.join()
+        get_pool(path).close_all()
+    latencies = sorted(seen - due for due, seen in zip(queue.due, visible_at))
+    return len(queue.due), visible_at[-1] - start if visible_at else 0.0, latencies
+
+
+def bench_pipeline_max(settings, scratch):
+    generator = LoadGenerator(synthetic_arrivals(SyntheticTweets(0), constant(1)), mode='max',
+                              limit=settings['pipeline_tweets'])
+    accepted, elapsed, _ = run_pipeline(scratch, generator)
+    return {'throughput': metric(accepted / elapsed, 'tweets/s', True)}
+
+
+def bench_pipeline_open(settings, scratch):
+    generator = LoadGenerator(synthetic_arrivals(SyntheticTweets(0), constant(settings['pipeline_rate'])),
+                              duration=settings['pipeline_seconds'])
+    _, _, latencies = run_pipeline(scratch, generator)
+    return {
+        'latency_p50': metric(percentile(latencies, 50) * 1000, 'ms', False),
+        'latency_p99': metric(percentile(latencies, 99) * 1000, 'ms', False),
+    }
+
+
+def scenarios(settings):
+    """(name, function) pairs in run order"""
+    found = [
+        ('sentiment.per_tweet', bench_sentiment_per_tweet),
+        ('sentiment.batch', bench_sentiment_batch),
+    ]
+    found += [(f'trends.window_{span}', trend_scenario(window)) for span, window in TREND_WINDOWS.items()]
+    found.append(('store', bench_store))
+    found += [(f'dashboard.rows_{rows}', dashboard_scenario(rows)) for rows in settings['dashboard_rows']]
+    found += [('pipeline.max', bench_pipeline_max), ('pipeline.open', bench_pipeline_open)]
+    return found
+
+
+def _git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def run(args):
+    settings = dict(PROFILES[args.profile])
+    if args.dashboard_rows:
+        settings['dashboard_rows'] = args.dashboard_rows
+    results = {}
+    with tempfile.TemporaryDirectory() as scratch:
+        for name, function in scenarios(settings):
+            if args.only and not any(fnmatch.fnmatch(name, pattern) for pattern in args.only):
+                continue
+            samples = [function(settings, scratch) for _ in range(args.repeat)]
+            for key, first in samples[0].items():
+                values = [sample[key]['value'] for sample in samples]
+                results[f'{name}.{key}'] = dict(first, value=statistics.median(values), samples=values)
+                print(f"{name + '.' + key:<40} {statistics.median(values):>12,.1f} {first['unit']}",
+                      file=sys.stderr)
+
+    report = {
+        'meta': {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'revision': _git_revision(),
+            'profile': args.profile,
+            'repeat': args.repeat,
+            'settings': settings,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    return report
+
+
+def compare(args):
+    """Print the change of every metric; returns the names of regressed ones"""
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    with open(args.current, encoding='utf-8') as f:
+        current = json.load(f)
+    for key in ('profile', 'cpus', 'platform'):
+        if baseline['meta'].get(key) != current['meta'].get(key):
+            print(f"warning: {key} differs ({baseline['meta'].get(key)} vs {current['meta'].get(key)})")
+
+    regressions = []
+    for name, new in current['results'].items():
+        old = baseline['results'].get(name)
+        if old is None or not old['value']:
+            print(f"{name:<40} {'':>12} {new['value']:>12,.1f} {new['unit']:<9} (new)")
+            continue
+        change = (new['value'] - old['value']) / old['value'] * 100
+        worse = -change if new['higher_is_better'] else change
+        flag = ''
+        if worse > args.threshold:
+            flag = 'REGRESSION'
+            regressions.append(name)
+        elif -worse > args.threshold:
+            flag = 'improved'
+        print(f"{name:<40} {old['value']:>12,.1f} {new['value']:>12,.1f} {new['unit']:<9} "
+              f"{change:+7.1f}% {flag}")
+    for name in baseline['results'].keys() - current['results'].keys():
+        print(f"{name:<40} missing from {args.current}")
+    print(f"{len(regressions)} regression(s) beyond {args.threshold:g}%")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help="run the scenarios and write JSON results")
+    run_parser.add_argument('--profile', choices=PROFILES, default='full')
+    run_parser.add_argument('--repeat', type=int, default=3)
+    run_parser.add_argument('--only', nargs='+', help="scenario name patterns, e.g. 'sentiment.*'")
+    run_parser.add_argument('--dashboard-rows', type=int, nargs='+')
+    run_parser.add_argument('--output', help="JSON file to write (default: stdout)")
+
+    compare_parser = commands.add_parser('compare', help="flag regressions between two result files")
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=10.0,
+                                help="percent change in the worse direction that counts as a regression")
+
+    args = parser.parse_args(argv)
+    if args.command == 'run':
+        run(args)
+    elif compare(args):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
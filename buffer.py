@@ -0,0 +1,220 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+
+
+class IngestQueue:
+    """Bounded FIFO between the stream callback and the processing threads.
+
+    While there is room, ``put`` only appends under a lock. When the
+    queue holds ``maxsize`` items the overflow ``policy`` decides what
+    ``put`` costs the producer (the stream socket is not read meanwhile):
+
+    - ``block``: wait for room, up to ``block_timeout`` seconds; then the
+      item is spilled to ``spill_path`` if one is given and dropped
+      otherwise, and ``block_timeouts`` counts it;
+    - ``drop_oldest``: discard the oldest queued item to make room, in
+      constant time;
+    - ``spill``: append the item as a JSON line to ``spill_path`` and read
+      it back once the in-memory queue drains, so nothing is lost. How far
+      the file has been read is kept in ``spill_path + '.offset'``, so a
+      restart does not deliver items already read back twice.
+
+    Under ``block`` and ``spill``, while any items are on disk every
+    ``put`` serializes, writes and flushes its item to the file with the
+    lock held, which also delays consumers taking a batch.
+
+    Items keep FIFO order under every policy. ``metrics`` reports depth,
+    drop, spill and block timeout counts and how long items waited before
+    being taken.
+    """
+
+    POLICIES = ('block', 'drop_oldest', 'spill')
+
+    def __init__(self, maxsize=10000, policy='block', spill_path=None, block_timeout=5.0):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown overflow policy: {policy}")
+        if policy == 'spill' and not spill_path:
+            raise ValueError("The spill policy needs a spill_path")
+        self.maxsize = maxsize
+        self.policy = policy
+        self.spill_path = spill_path
+        self.block_timeout = block_timeout
+        self._items = deque()
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._closed = False
+
+        self._spill_file = None
+        self._spill_read = 0
+        self._spill_depth = 0
+        if policy != 'drop_oldest' and spill_path and os.path.exists(spill_path):
+            # Items spilled before a crash or restart are delivered first,
+            # from where the last run had read up to
+            self._open_spill()
+            self._spill_file.seek(0, os.SEEK_END)
+            self._spill_read = self._load_offset(self._spill_file.tell())
+            self._spill_file.seek(self._spill_read)
+            while self._spill_file.readline():
+                self._spill_depth += 1
+
+        self.enqueued = 0
+        self.dequeued = 0
+        self.dropped = 0
+        self.spilled = 0
+        self.block_timeouts = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+
+    def put(self, item):
+        """Queue one item; returns False if it was dropped"""
+        with self._lock:
+            if self._closed:
+                return False
+            # Wall-clock stamps so lag stays meaningful for items spilled
+            # by a previous run
+            now = time.time()
+            if self._spill_depth or (self.policy == 'spill' and len(self._items) >= self.maxsize):
+                # Once anything is on disk, newer items go there too to keep order
+                self._spill(now, item)
+            elif len(self._items) >= self.maxsize:
+                if self.policy == 'drop_oldest':
+                    self._items.popleft()
+                    self.dropped += 1
+                    self._items.append((now, item))
+                else:
+                    has_room = self._not_full.wait_for(
+                        lambda: self._closed or len(self._items) < self.maxsize,
+                        self.block_timeout)
+                    if self._closed:
+                        self.dropped += 1
+                        return False
+                    if not has_room:
+                        self.block_timeouts += 1
+                        if not self.spill_path:
+                            self.dropped += 1
+                            return False
+                    if not has_room or self._spill_depth:
+                        # Timed out, or another producer spilled while we waited
+                        self._spill(now, item)
+                    else:
+                        self._items.append((now, item))
+            else:
+                self._items.append((now, item))
+            self.enqueued += 1
+            self._not_empty.notify()
+            return True
+
+    def get_batch(self, max_items=256, timeout=None):
+        """
+        Take up to ``max_items`` items, oldest first.
+        Waits up to ``timeout`` seconds for the first one; returns an empty
+        list on timeout or once the queue is closed and drained.
+        """
+        with self._lock:
+            if not self._not_empty.wait_for(lambda: self._closed or self._depth(), timeout):
+                return []
+            if not self._items and self._spill_depth:
+                self._unspill()
+            if not self._items:
+                return []
+            # Lag is how long the oldest item of the batch waited
+            self.last_lag = time.time() - self._items[0][0]
+            batch = []
+            while self._items and len(batch) < max_items:
+                batch.append(self._items.popleft()[1])
+            if batch:
+                self.max_lag = max(self.max_lag, self.last_lag)
+                self.dequeued += len(batch)
+                self._not_full.notify_all()
+            return batch
+
+    def close(self):
+        """Stop accepting items and wake every waiting thread"""
+        with self._lock:
+            self._closed = True
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def __len__(self):
+        with self._lock:
+            return self._depth()
+
+    def metrics(self):
+        """Snapshot of queue depth, drop/spill counts and lag in seconds"""
+        with self._lock:
+            oldest = self._items[0][0] if self._items else None
+            return {
+                'depth': len(self._items),
+                'spill_depth': self._spill_depth,
+                'maxsize': self.maxsize,
+                'policy': self.policy,
+                'enqueued': self.enqueued,
+                'dequeued': self.dequeued,
+                'dropped': self.dropped,
+                'spilled': self.spilled,
+                'block_timeouts': self.block_timeouts,
+                'oldest_age': time.time() - oldest if oldest is not None else 0.0,
+                'last_lag': self.last_lag,
+                'max_lag': self.max_lag
+            }
+
+    def _depth(self):
+        return len(self._items) + self._spill_depth
+
+    def _spill(self, enqueued_at, item):
+        if self._spill_file is None:
+            self._open_spill()
+        self._spill_file.seek(0, os.SEEK_END)
+        self._spill_file.write(json.dumps([enqueued_at, item]) + '\n')
+        self._spill_file.flush()
+        self._spill_depth += 1
+        self.spilled += 1
+
+    def _open_spill(self):
+        directory = os.path.dirname(self.spill_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._spill_file = open(self.spill_path, 'a+', encoding='utf-8')
+        self._spill_read = 0
+
+    def _unspill(self):
+        """Move up to ``maxsize`` spilled items back into memory, in order"""
+        self._spill_file.seek(self._spill_read)
+        while self._spill_depth and len(self._items) < self.maxsize:
+            line = self._spill_file.readline()
+            if not line:
+                break
+            enqueued_at, item = json.loads(line)
+            self._items.append((enqueued_at, item))
+            self._spill_depth -= 1
+        self._spill_read = self._spill_file.tell()
+        if not self._spill_depth:
+            # Everything is back in memory; start the file over
+            self._spill_file.seek(0)
+            self._spill_file.truncate()
+            self._spill_read = 0
+        self._save_offset()
+
+    def _load_offset(self, size):
+        """Read offset saved by the last run, or 0 if missing or past the end"""
+        try:
+            with open(self.spill_path + '.offset', encoding='utf-8') as f:
+                offset = int(f.read())
+        except (OSError, ValueError):
+            return 0
+        # Past the end when a run truncated the file but died before saving 0
+        return offset if 0 <= offset <= size else 0
+
+    def _save_offset(self):
+        path = self.spill_path + '.offset'
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            f.write(str(self._spill_read))
+        os.replace(path + '.tmp', path)
@@ -0,0 +1,192 @@
+import heapq
+from datetime import datetime
+
+import numpy as np
+
+
+class BurstDetector:
+    """Flags terms whose per-minute rate jumps above their own baseline.
+
+    Every term gets a slot in flat NumPy arrays holding an exponentially
+    weighted moving average and variance of its per-minute count, plus
+    the minute it was last updated. Counts for the current minute are
+    collected in a dict; when the minute closes, only the terms seen in
+    it are scored and folded into their baselines, so a tick costs
+    O(active terms). The minutes a term was silent are applied lazily in
+    closed form when it next appears:
+
+        mean_k = keep mean
+        var_k  = keep (var + mean^2 (1 - keep))
+
+    The j-th minute since a term was first seen is folded in with weight
+    ``max(a, 1/j)``: the baseline is the plain mean and variance of the
+    term's history until that is one time constant long, then an EWMA.
+    For a silent stretch this makes ``keep`` the product of ``1 - 1/j``
+    and ``1 - a`` over the minutes skipped, which telescopes.
+
+    A term's burst score for a minute is its z-score against the baseline
+    before that minute, ``(count - mean) / max(std, min_std)``. Terms are
+    only scored once their history covers ``warmup`` minutes, so a term
+    first seen at volume (or every term, right after startup) does not
+    burst against an empty baseline. Terms whose decayed mean has fallen
+    below ``prune_below`` are dropped every ``prune_every`` minutes so
+    the arrays track the live vocabulary.
+    """
+
+    def __init__(self, halflife_minutes=30, min_count=5, min_std=1.0, threshold=3.0,
+                 warmup=10, prune_every=60, prune_below=0.01, capacity=1024):
+        self.alpha = 1.0 - 0.5 ** (1.0 / halflife_minutes)
+        # History length after which minutes get the EWMA weight alpha
+        self._settled = int(1.0 / self.alpha)
+        self.warmup = warmup
+        self.min_count = min_count
+        self.min_std = min_std
+        self.threshold = threshold
+        self.prune_every = prune_every
+        self.prune_below = prune_below
+        self.index = {}
+        self.terms = []
+        self.mean = np.zeros(capacity)
+        self.var = np.zeros(capacity)
+        self.last_minute = np.zeros(capacity, dtype=np.int64)
+        self.first_minute = np.zeros(capacity, dtype=np.int64)
+        self._current = None
+        self._counts = {}
+        self._ticks = 0
+        # (term, z-score, count) of the last closed minute, highest first
+        self.bursting = []
+        self.bursting_minute = None
+
+    def update(self, items, timestamp=None, count=1):
+        """Count every item in ``items`` at the same time"""
+        counts = self._counts_for(timestamp)
+        for item in items:
+            counts[item] = counts.get(item, 0) + count
+
+    def update_counts(self, counts, timestamp=None):
+        """Add a mapping of item -> count, all at the same time"""
+        current = self._counts_for(timestamp)
+        for item, count in counts.items():
+            current[item] = current.get(item, 0) + count
+
+    def advance(self, now=None):
+        """Close every minute before ``now``"""
+        self._counts_for(now)
+
+    def get_bursting(self, k=10, now=None):
+        """
+        Top ``k`` (term, z-score, count) of the last closed minute.
+        Read-only, so other threads may call it; returns nothing when no
+        minute has closed since the one before ``now``.
+        """
+        if not self.is_recent(self.bursting_minute, now):
+            return []
+        return self.bursting[:k]
+
+    @classmethod
+    def is_recent(cls, minute, now=None):
+        """Whether ``minute`` is still the last closed minute as of ``now``"""
+        return minute is not None and minute >= cls._minute(now) - 2
+
+    def __len__(self):
+        return len(self.terms)
+
+    def _counts_for(self, timestamp):
+        minute = self._minute(timestamp)
+        if self._current is None:
+            self._current = minute
+        elif minute > self._current:
+            self._tick()
+            self._current = minute
+        # Late events count towards the open minute
+        return self._counts
+
+    def _tick(self):
+        """Score the closed minute's terms and fold them into their baselines"""
+        minute = self._current
+        counts = self._counts
+        self._counts = {}
+        self._ticks += 1
+        slots = np.fromiter((self._slot(term, minute) for term in counts),
+                            dtype=np.intp, count=len(counts))
+        observed = np.fromiter(counts.values(), dtype=np.float64, count=len(counts))
+
+        if len(slots):
+            a = self.alpha
+            settled = self._settled
+            # Minutes of history as of each term's last update, and before this one
+            first = self.first_minute[slots]
+            before = self.last_minute[slots] - first + 1
+            history = minute - first
+            # Silent minutes in between: 1 - 1/j up to settled, 1 - a after
+            keep = (np.minimum(before, settled) / np.maximum(np.minimum(history, settled), 1)
+                    * (1.0 - a) ** (np.maximum(history, settled) - np.maximum(before, settled)))
+            mean = self.mean[slots]
+            var = keep * (self.var[slots] + mean * mean * (1.0 - keep))
+            mean = keep * mean
+
+            z = (observed - mean) / np.maximum(np.sqrt(var), self.min_std)
+            diff = observed - mean
+            weight = np.maximum(a, 1.0 / (history + 1))
+            increment = weight * diff
+            self.mean[slots] = mean + increment
+            self.var[slots] = (1.0 - weight) * (var + diff * increment)
+            self.last_minute[slots] = minute
+
+            hot = np.flatnonzero((z >= self.threshold) & (observed >= self.min_count)
+                                 & (history >= self.warmup))
+            terms = list(counts)
+            self.bursting = heapq.nlargest(
+                len(hot), ((terms[i], float(z[i]), int(observed[i])) for i in hot.tolist()),
+                key=lambda entry: entry[1]
+            )
+        else:
+            self.bursting = []
+        self.bursting_minute = minute
+
+        if self._ticks % self.prune_every == 0:
+            self._prune(minute)
+
+    def _slot(self, term, minute):
+        slot = self.index.get(term)
+        if slot is None:
+            slot = len(self.terms)
+            if slot == len(self.mean):
+                self._grow()
+            self.index[term] = slot
+            self.terms.append(term)
+            self.mean[slot] = 0.0
+            self.var[slot] = 0.0
+            self.last_minute[slot] = minute - 1
+            self.first_minute[slot] = minute
+        return slot
+
+    def _grow(self):
+        size = 2 * len(self.mean)
+        for name in ('mean', 'var', 'last_minute', 'first_minute'):
+            old = getattr(self, name)
+            new = np.zeros(size, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def _prune(self, minute):
+        """Drop terms whose decayed baseline rate is negligible"""
+        used = len(self.terms)
+        silent = minute - self.last_minute[:used]
+        decayed = self.mean[:used] * (1.0 - self.alpha) ** silent
+        live = np.flatnonzero(decayed >= self.prune_below)
+        if len(live) == used:
+            return
+        self.terms = [self.terms[i] for i in live.tolist()]
+        self.index = {term: slot for slot, term in enumerate(self.terms)}
+        for name in ('mean', 'var', 'last_minute', 'first_minute'):
+            array = getattr(self, name)
+            array[:len(live)] = array[live]
+
+    @staticmethod
+    def _minute(timestamp):
+        if timestamp is None:
+            timestamp = datetime.now()
+        if isinstance(timestamp, datetime):
+            timestamp = timestamp.timestamp()
+        return int(timestamp // 60)
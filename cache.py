@@ -0,0 +1,159 @@
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from types import MappingProxyType
+
+# One published version of the cached data; ``data`` is read-only and, for
+# dict data, ``versions`` maps each key to the version its value last changed
+Snapshot = namedtuple('Snapshot', ['version', 'created', 'data', 'versions'])
+
+
+def freeze(value):
+    """Read-only copy of nested dicts/lists: mapping proxies and tuples"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+class SnapshotCache:
+    """Versioned cache of immutable snapshots shared by every reader.
+
+    A writer ``publish``es a whole new snapshot; readers ``get`` the
+    latest one without locking beyond a reference read, and since
+    snapshots are frozen, every reader can use the same object. For
+    dict data each key also gets the version its value last changed in,
+    so a reader can tell whether the part it shows is out of date. The last
+    ``max_versions`` snapshots are kept so a reader can still fetch the
+    version it started from; older ones are evicted, and any snapshot
+    older than ``ttl`` seconds is treated as missing so a stalled writer
+    shows up as misses instead of silently stale charts.
+    """
+
+    def __init__(self, ttl=30.0, max_versions=3):
+        self.ttl = ttl
+        self.max_versions = max_versions
+        self._versions = OrderedDict()
+        self._latest = None
+        self._lock = threading.Lock()
+        self._published = threading.Condition(self._lock)
+        self._next_version = 1
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def publish(self, data):
+        """Freeze ``data`` and make it the latest snapshot; returns it"""
+        data = freeze(data)
+        with self._lock:
+            version = self._next_version
+            self._next_version += 1
+            versions = {}
+            if isinstance(data, MappingProxyType):
+                previous = self._latest
+                for key, value in data.items():
+                    # Unchanged values keep their version, so readers can skip them
+                    if previous is not None and key in previous.versions and previous.data[key] == value:
+                        versions[key] = previous.versions[key]
+                    else:
+                        versions[key] = version
+            snapshot = Snapshot(version, time.time(), data, MappingProxyType(versions))
+            self._versions[snapshot.version] = snapshot
+            while len(self._versions) > self.max_versions:
+                self._versions.popitem(last=False)
+                self.evictions += 1
+            self._latest = snapshot
+            self._published.notify_all()
+            return snapshot
+
+    def get(self, version=None):
+        """The latest (or a given) snapshot, or None if missing or expired"""
+        if version is None:
+            snapshot = self._latest
+        else:
+            snapshot = self._versions.get(version)
+        if snapshot is None or time.time() - snapshot.created > self.ttl:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return snapshot
+
+    def wait(self, version=0, timeout=None):
+        """
+        Block until a snapshot newer than ``version`` is published.
+        Returns the latest snapshot, or None if ``timeout`` ran out first.
+        """
+        with self._published:
+            ready = self._published.wait_for(
+                lambda: self._latest is not None and self._latest.version > version, timeout
+            )
+            if not ready:
+                return None
+            self.hits += 1
+            return self._latest
+
+    @property
+    def version(self):
+        snapshot = self._latest
+        return snapshot.version if snapshot else 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        latest = self._latest
+        return {
+            'version': latest.version if latest else 0,
+            'age': time.time() - latest.created if latest else None,
+            'versions_held': len(self._versions),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+        }
+
+
+class SnapshotRefresher:
+    """Background thread that recomputes a snapshot every ``interval`` seconds.
+
+    ``compute()`` returns the data to publish; it is the only place that
+    does I/O, so the cost no longer depends on how many readers there are.
+    A failed refresh is logged and retried on the next tick, leaving the
+    previous snapshot in place until it expires.
+    """
+
+    def __init__(self, cache, compute, interval=5.0, name='snapshot-refresher'):
+        self.cache = cache
+        self.compute = compute
+        self.interval = interval
+        self.refreshes = 0
+        self.errors = 0
+        self.last_duration = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=name)
+        self._thread.daemon = True
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def refresh(self):
+        """Compute and publish one snapshot now"""
+        start = time.perf_counter()
+        snapshot = self.cache.publish(self.compute())
+        self.last_duration = time.perf_counter() - start
+        self.refreshes += 1
+        return snapshot
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                self.errors += 1
+                print(f"Error refreshing snapshot: {e}")
+            self._stop.wait(self.interval)
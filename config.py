@@ -30,6 +30,50 @@ class Config:
         self.DEBUG = os.getenv('DEBUG', 'False').lower() == 'true'
         self.FLASK_PORT = int(os.getenv('FLASK_PORT', '5000'))
         self.DASH_PORT = int(os.getenv('DASH_PORT', '8050'))
+        # 'poll' rebuilds figures on a timer, 'push' streams new points over SSE
+        self.DASHBOARD_MODE = os.getenv('DASHBOARD_MODE', 'poll').lower()
+        
+        # Trend Detection Configuration
+        self.TREND_APPROXIMATE = os.getenv('TREND_APPROXIMATE', 'False').lower() == 'true'
+        self.TREND_SKETCH_MEMORY_MB = int(os.getenv('TREND_SKETCH_MEMORY_MB', '16'))
+        self.TREND_FILTER_TERMS = os.getenv('TREND_FILTER_TERMS', 'True').lower() == 'true'
+        self.TREND_MIN_PMI = float(os.getenv('TREND_MIN_PMI', '0'))  # 0 disables phrase scoring
+        
+        # Sentiment Cache Configuration (distinct texts kept, per analysis
+        # worker when ANALYSIS_WORKERS > 0; 0 disables)
+        self.SENTIMENT_CACHE_SIZE = int(os.getenv('SENTIMENT_CACHE_SIZE', '100000'))
+        
+        # Analysis Configuration (0 analyzes in the ingestion thread)
+        self.ANALYSIS_WORKERS = int(os.getenv('ANALYSIS_WORKERS', str(min(4, os.cpu_count() or 1))))
+        self.ANALYSIS_CHUNK_SIZE = int(os.getenv('ANALYSIS_CHUNK_SIZE', '256'))
+        
+        # Ingestion Queue Configuration (policy: block, drop_oldest or spill;
+        # block spills, or drops without a spill path, after the timeout)
+        self.INGEST_QUEUE_SIZE = int(os.getenv('INGEST_QUEUE_SIZE', '10000'))
+        self.INGEST_OVERFLOW_POLICY = os.getenv('INGEST_OVERFLOW_POLICY', 'block').lower()
+        self.INGEST_SPILL_PATH = os.getenv('INGEST_SPILL_PATH', 'src/storage/data/ingest_spill.ndjson')
+        self.INGEST_BLOCK_TIMEOUT = float(os.getenv('INGEST_BLOCK_TIMEOUT', '5'))
+        self.INGEST_CONSUMERS = int(os.getenv('INGEST_CONSUMERS', '1'))
+        self.INGEST_BATCH_SIZE = int(os.getenv('INGEST_BATCH_SIZE', '256'))
+        
+        # Load Generator Configuration (feeds the pipeline when there is no Twitter stream)
+        self.LOADGEN_PROFILE = os.getenv('LOADGEN_PROFILE', 'constant:0.5')  # tweets per second
+        self.LOADGEN_SEED = int(os.getenv('LOADGEN_SEED', '0'))
+        self.LOADGEN_REPLAY_PATH = os.getenv('LOADGEN_REPLAY_PATH')  # NDJSON file replayed instead
+        self.LOADGEN_REPLAY_SPEED = float(os.getenv('LOADGEN_REPLAY_SPEED', '1'))
+        
+        # Metrics Configuration (served at /metrics in the Prometheus text format)
+        self.METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True').lower() == 'true'
+        
+        # Profiler Configuration (POST /admin/profile or SIGUSR1 samples every thread's stack)
+        self.PROFILE_DIR = os.getenv('PROFILE_DIR', 'src/storage/data/profiles')
+        self.PROFILE_SECONDS = float(os.getenv('PROFILE_SECONDS', '30'))
+        self.PROFILE_INTERVAL_MS = float(os.getenv('PROFILE_INTERVAL_MS', '10'))
+        self.ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')  # sent as X-Admin-Token; /admin routes are off without it
+        
+        # Retention Configuration (0 days keeps everything)
+        self.RETENTION_DAYS = float(os.getenv('RETENTION_DAYS', '0'))
+        self.RETENTION_INTERVAL_MINUTES = float(os.getenv('RETENTION_INTERVAL_MINUTES', '60'))
         
         # Streaming Configuration
         self.DEFAULT_KEYWORDS = [
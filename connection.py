@@ -0,0 +1,138 @@
+import os
+import sqlite3
+import threading
+import weakref
+import logging
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Pragmas applied to every connection handed out by a pool. WAL lets readers
+# run alongside the writer; NORMAL sync is durable across application
+# crashes in WAL mode and avoids an fsync per commit.
+DEFAULT_PRAGMAS = {
+    'synchronous': 'NORMAL',
+    'cache_size': -65536,        # 64 MiB page cache (negative = KiB)
+    'mmap_size': 268435456,      # 256 MiB memory-mapped I/O
+    'temp_store': 'MEMORY',
+    'busy_timeout': 5000         # ms to wait on a locked database
+}
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class ConnectionPool:
+    """Per-thread SQLite connections shared by every module using a database.
+
+    Each thread gets at most one read-write and one read-only connection,
+    created on first use and kept open across calls; connections left
+    behind by threads that have exited are closed on the next open. The
+    database is switched to WAL mode the first time it is opened so that
+    read-only connections never block the writer.
+    """
+
+    def __init__(self, db_path, pragmas=None):
+        self.db_path = db_path
+        self.pragmas = dict(DEFAULT_PRAGMAS, **(pragmas or {}))
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []  # (weakref to owning thread, connection)
+        self._wal_ready = False
+
+    def writer(self):
+        """Return this thread's read-write connection"""
+        conn = getattr(self._local, 'writer', None)
+        if conn is None:
+            conn = self._open(read_only=False)
+            self._local.writer = conn
+        return conn
+
+    def reader(self):
+        """Return this thread's read-only connection"""
+        conn = getattr(self._local, 'reader', None)
+        if conn is None:
+            conn = self._open(read_only=True)
+            self._local.reader = conn
+        return conn
+
+    def close_thread(self):
+        """Close the connections owned by the calling thread"""
+        for role in ('writer', 'reader'):
+            conn = getattr(self._local, role, None)
+            if conn is not None:
+                setattr(self._local, role, None)
+                self._close(conn)
+
+    def close_all(self):
+        """Close every connection the pool has handed out"""
+        with self._lock:
+            connections = [conn for _, conn in self._connections]
+            self._connections = []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error as e:
+                logger.warning(f"Error closing connection: {e}")
+        self._local = threading.local()
+
+    def _open(self, read_only):
+        self._ensure_wal()
+        if read_only:
+            uri = Path(self.db_path).resolve().as_uri() + '?mode=ro'
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        else:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name}={value}')
+        with self._lock:
+            self._reap()
+            self._connections.append((weakref.ref(threading.current_thread()), conn))
+        return conn
+
+    def _close(self, conn):
+        with self._lock:
+            self._connections = [(t, c) for t, c in self._connections if c is not conn]
+        conn.close()
+
+    def _reap(self):
+        """Close connections whose owning thread has finished; needs the lock"""
+        alive = []
+        for thread_ref, conn in self._connections:
+            thread = thread_ref()
+            if thread is not None and thread.is_alive():
+                alive.append((thread_ref, conn))
+            else:
+                conn.close()
+        self._connections = alive
+
+    def _ensure_wal(self):
+        """Switch the database file to WAL mode once per pool"""
+        if self._wal_ready:
+            return
+        with self._lock:
+            if self._wal_ready:
+                return
+            conn = sqlite3.connect(self.db_path)
+            try:
+                # Lets retention hand freed pages back a few at a time. Only
+                # takes effect on a new file, and has to precede the WAL switch.
+                conn.execute('PRAGMA auto_vacuum=INCREMENTAL')
+                mode = conn.execute('PRAGMA journal_mode=WAL').fetchone()[0]
+                if mode.lower() != 'wal':
+                    logger.warning(f"Could not enable WAL mode for {self.db_path} (journal_mode={mode})")
+            finally:
+                conn.close()
+            self._wal_ready = True
+
+
+def get_pool(db_path='src/default.db', pragmas=None):
+    """Return the process-wide connection pool for a database file"""
+    key = os.path.abspath(db_path)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(db_path, pragmas)
+            _pools[key] = pool
+            logger.info(f"Connection pool created for {db_path}")
+        return pool
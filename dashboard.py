@@ -1,29 +1,67 @@
 import dash
 from dash import html, dcc
 import dash_bootstrap_components as dbc
-from dash.dependencies import Input, Output
+from dash.dependencies import Input, Output, State
 import plotly.graph_objs as go
-import plotly.express as px
 from datetime import datetime, timedelta
+import numpy as np
 import pandas as pd
-import sqlite3
 import os
-from flask import Flask
+from flask import Flask, Response, request
 import socket
+from storage.connection import get_pool
+from storage import rollups
+from visualization.cache import SnapshotCache, SnapshotRefresher
+from visualization.live import LiveFeed, LIVE_SCRIPT, SENTIMENT_MINUTES, VOLUME_MINUTES
+from utils.helpers import to_epoch_ms
+
+no_update = dash.no_update
+try:
+    from dash import Patch
+except ImportError:  # Dash < 2.9: changed figures are sent whole
+    Patch = None
 
 class Dashboard:
-    def __init__(self, analyzer):
+    MODES = ('poll', 'push')
+    STREAM_PATH = '/live/updates'
+    SCRIPT_PATH = '/live/dashboard.js'
+
+    def __init__(self, analyzer, refresh_interval=5, mode='poll'):
+        """
+        Args:
+            analyzer (Analyzer): Source of trending and bursting topics
+            refresh_interval (float): Seconds between snapshot refreshes;
+                callbacks only read the latest snapshot, so every open
+                tab shares one set of queries per interval
+            mode (str): 'poll' rebuilds each figure from a dcc.Interval
+                callback; 'push' streams only new points to the browser
+                over server-sent events (see visualization.live)
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown dashboard mode: {mode}")
         self.analyzer = analyzer
+        self.mode = mode
         # Initialize Dash app with minimal configuration
         self.app = dash.Dash(
             __name__,
-            external_stylesheets=[dbc.themes.BOOTSTRAP]
+            external_stylesheets=[dbc.themes.BOOTSTRAP],
+            external_scripts=[self.SCRIPT_PATH] if mode == 'push' else []
         )
         self.db_path = os.path.join('src', 'default.db')
+        self.pool = get_pool(self.db_path)
+        self.cache = SnapshotCache(ttl=6 * refresh_interval)
+        self.refresher = SnapshotRefresher(
+            self.cache, self._compute_snapshot, interval=refresh_interval, name='dashboard-refresher'
+        ).start()
         
         # Initialize the dashboard layout
         self.app.layout = self._create_layout()
-        self._setup_callbacks()
+        if mode == 'push':
+            self.live = LiveFeed(self.cache)
+            self._setup_live_routes()
+        else:
+            self.live = None
+            self._setup_callbacks()
 
     def _create_layout(self):
         """Create the dashboard layout"""
@@ -87,8 +125,8 @@ class Dashboard:
                             "Sentiment Analysis"
                         ], className="d-flex align-items-center"),
                         dbc.CardBody([
-                            dcc.Graph(id='sentiment-graph'),
-                            dcc.Interval(id='sentiment-update', interval=5000)
+                            self._graph('sentiment-graph'),
+                            *self._poll(['sentiment-state', 'status-state'], 'sentiment-update', 5000)
                         ])
                     ], className="shadow-sm")
                 ], width=6),
@@ -101,13 +139,29 @@ class Dashboard:
                             "Trending Topics"
                         ], className="d-flex align-items-center"),
                         dbc.CardBody([
-                            dcc.Graph(id='trends-graph'),
-                            dcc.Interval(id='trends-update', interval=5000)
+                            self._graph('trends-graph'),
+                            *self._poll(['trends-state'], 'trends-update', 5000)
                         ])
                     ], className="shadow-sm")
                 ], width=6)
             ]),
 
+            # Bursting Topics Row
+            dbc.Row([
+                dbc.Col([
+                    dbc.Card([
+                        dbc.CardHeader([
+                            html.I(className="fas fa-bolt me-2"),
+                            "Bursting Topics"
+                        ], className="d-flex align-items-center"),
+                        dbc.CardBody([
+                            self._graph('burst-graph'),
+                            *self._poll(['burst-state'], 'burst-update', 10000)
+                        ])
+                    ], className="shadow-sm mt-4")
+                ], width=12)
+            ]),
+
             # Tweet Volume Row
             dbc.Row([
                 dbc.Col([
@@ -117,8 +171,8 @@ class Dashboard:
                             "Tweet Volume"
                         ], className="d-flex align-items-center"),
                         dbc.CardBody([
-                            dcc.Graph(id='volume-graph'),
-                            dcc.Interval(id='volume-update', interval=10000)
+                            self._graph('volume-graph'),
+                            *self._poll(['volume-state'], 'volume-update', 10000)
                         ])
                     ], className="shadow-sm mt-4")
                 ], width=12)
@@ -133,7 +187,7 @@ class Dashboard:
                             "Recent Tweets"
                         ], className="d-flex align-items-center"),
                         dbc.CardBody(id='recent-tweets-table'),
-                        dcc.Interval(id='table-update', interval=5000)
+                        *self._poll(['table-state'], 'table-update', 5000)
                     ], className="shadow-sm mt-4 mb-4")
                 ], width=12)
             ]),
@@ -150,191 +204,360 @@ class Dashboard:
             ])
         ], fluid=True)
 
+    def _graph(self, graph_id):
+        """Graph that push mode fills in from the browser, or polling callbacks replace"""
+        if self.mode == 'push':
+            return dcc.Graph(id=graph_id, figure=self._live_figure(graph_id))
+        return dcc.Graph(id=graph_id)
+
+    def _poll(self, state_ids, interval_id, interval):
+        """
+        The polling timer driving callbacks, plus a store per callback for
+        the data version its client shows; none of them in push mode
+        """
+        if self.mode == 'push':
+            return []
+        return [dcc.Store(id=state_id) for state_id in state_ids] + \
+            [dcc.Interval(id=interval_id, interval=interval)]
+
+    @staticmethod
+    def _live_figure(graph_id):
+        """Empty figure with the trace the live script extends"""
+        fig = go.Figure()
+        if graph_id == 'sentiment-graph':
+            fig.add_trace(go.Scatter(
+                x=[], y=[], customdata=[],
+                mode='lines+markers',
+                name='Average Polarity',
+                error_y=dict(type='data', array=[], visible=True, thickness=1),
+                hovertemplate='%{x}<br>polarity %{y:.3f}<br>%{customdata} tweets<extra></extra>',
+                marker=dict(color=[])
+            ))
+            fig.update_layout(title='Average Sentiment per Minute (last hour)',
+                              xaxis_title='Time', yaxis_title='Sentiment Polarity')
+        elif graph_id == 'trends-graph':
+            fig.add_trace(go.Bar(x=[], y=[], orientation='h'))
+            fig.update_layout(title='Top Trending Topics', xaxis_title='Count',
+                              yaxis={'categoryorder': 'total ascending'})
+        elif graph_id == 'burst-graph':
+            fig.add_trace(go.Bar(x=[], y=[], text=[], orientation='h', textposition='outside'))
+            fig.update_layout(title='Topics Spiking Above Their Usual Rate (last minute)',
+                              xaxis_title='Burst Score (standard deviations above baseline)',
+                              yaxis={'categoryorder': 'total ascending'})
+        elif graph_id == 'volume-graph':
+            fig.add_trace(go.Scatter(x=[], y=[], mode='lines'))
+            fig.update_layout(title='Tweet Volume Over Time',
+                              xaxis_title='Time', yaxis_title='Number of Tweets')
+        fig.update_layout(template='plotly_white')
+        return fig
+
+    def _setup_live_routes(self):
+        """Serve the update stream and the script applying it on the Dash server"""
+        server = self.app.server
+        script = LIVE_SCRIPT % {
+            'sentiment_minutes': SENTIMENT_MINUTES,
+            'volume_minutes': VOLUME_MINUTES,
+            'stream_path': self.STREAM_PATH,
+        }
+
+        @server.route(self.STREAM_PATH)
+        def live_updates():
+            # EventSource sends the id of the last event it got when reconnecting
+            since = request.headers.get('Last-Event-ID') or request.args.get('since') or 0
+            try:
+                since = int(since)
+            except ValueError:
+                since = 0
+            return Response(
+                self.live.stream(since),
+                mimetype='text/event-stream',
+                headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+            )
+
+        @server.route(self.SCRIPT_PATH)
+        def live_script():
+            return Response(script, mimetype='application/javascript')
+
+    def _compute_snapshot(self):
+        """Query everything the callbacks show, once per refresh interval"""
+        conn = self.pool.reader()
+        since_ms = to_epoch_ms() - 60 * 60 * 1000
+        recent = conn.execute("""
+            SELECT text, user, sentiment_label as sentiment, timestamp
+            FROM tweets
+            ORDER BY timestamp_ms DESC
+            LIMIT 5
+        """).fetchall()
+        return {
+            'refreshed_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'tweet_count': rollups.totals(conn, 'day')['tweet_count'],
+            'minutes': rollups.series(conn, 'minute', since_ms),
+            'recent_tweets': [
+                {'text': text, 'user': user, 'sentiment': sentiment, 'timestamp': timestamp}
+                for text, user, sentiment, timestamp in recent
+            ],
+            'trends': self.analyzer.get_top_trends(),
+            'bursting': self.analyzer.get_bursting_trends(),
+        }
+
+    @staticmethod
+    def _minutes_window(data, minutes):
+        """Per-minute rollup rows of the last ``minutes`` minutes"""
+        since_ms = to_epoch_ms() - minutes * 60 * 1000
+        since_ms -= since_ms % 60000
+        return [row for row in data['minutes'] if row['bucket_ms'] >= since_ms]
+
+    @staticmethod
+    def _minute_times(rows):
+        """Local-time datetime64 x values of per-minute rows"""
+        offset_ms = int(datetime.now().astimezone().utcoffset().total_seconds() * 1000)
+        buckets = np.fromiter((row['bucket_ms'] for row in rows), dtype=np.int64, count=len(rows))
+        return (buckets + offset_ms).astype('datetime64[ms]')
+
+    def _sentiment_columns(self, data):
+        rows = [row for row in self._minutes_window(data, 60) if row['polarity_mean'] is not None]
+        if not rows:
+            return None
+        mean = np.fromiter((row['polarity_mean'] for row in rows), dtype=np.float64, count=len(rows))
+        return {
+            'x': self._minute_times(rows),
+            'y': mean,
+            'error_y.array': np.fromiter((row['polarity_std'] for row in rows),
+                                         dtype=np.float64, count=len(rows)),
+            'customdata': np.fromiter((row['tweet_count'] for row in rows),
+                                      dtype=np.int64, count=len(rows)),
+            'marker.color': np.where(mean > 0, 'green', np.where(mean < 0, 'red', 'gray')),
+        }
+
+    @staticmethod
+    def _sentiment_figure(columns):
+        fig = go.Figure(go.Scatter(
+            x=columns['x'],
+            y=columns['y'],
+            mode='lines+markers',
+            name='Average Polarity',
+            error_y=dict(type='data', array=columns['error_y.array'], visible=True, thickness=1),
+            customdata=columns['customdata'],
+            hovertemplate='%{x}<br>polarity %{y:.3f}<br>%{customdata} tweets<extra></extra>',
+            marker=dict(color=columns['marker.color'])
+        ))
+        fig.update_layout(
+            title='Average Sentiment per Minute (last hour)',
+            xaxis_title='Time',
+            yaxis_title='Sentiment Polarity',
+            template='plotly_white'
+        )
+        return fig
+
+    @staticmethod
+    def _trends_columns(data):
+        trends = data['trends']
+        if not trends:
+            return None
+        return {
+            'x': np.fromiter((count for _, count in trends), dtype=np.int64, count=len(trends)),
+            'y': [topic for topic, _ in trends],
+        }
+
+    @staticmethod
+    def _trends_figure(columns):
+        fig = go.Figure(go.Bar(x=columns['x'], y=columns['y'], orientation='h'))
+        fig.update_layout(
+            title='Top Trending Topics',
+            xaxis_title='Count',
+            yaxis_title='Topic',
+            template='plotly_white',
+            yaxis={'categoryorder': 'total ascending'}
+        )
+        return fig
+
+    @staticmethod
+    def _burst_columns(data):
+        bursting = data['bursting']
+        if not bursting:
+            return None
+        return {
+            'x': np.fromiter((score for _, score, _ in bursting), dtype=np.float64, count=len(bursting)),
+            'y': [topic for topic, _, _ in bursting],
+            'text': np.fromiter((count for _, _, count in bursting), dtype=np.int64, count=len(bursting)),
+        }
+
+    @staticmethod
+    def _burst_figure(columns):
+        fig = go.Figure(go.Bar(
+            x=columns['x'],
+            y=columns['y'],
+            text=columns['text'],
+            orientation='h',
+            texttemplate='%{text} mentions',
+            textposition='outside'
+        ))
+        fig.update_layout(
+            title='Topics Spiking Above Their Usual Rate (last minute)',
+            xaxis_title='Burst Score (standard deviations above baseline)',
+            yaxis_title='Topic',
+            template='plotly_white',
+            yaxis={'categoryorder': 'total ascending'}
+        )
+        return fig
+
+    def _volume_columns(self, data):
+        rows = self._minutes_window(data, 30)
+        if not rows:
+            return None
+        return {
+            'x': self._minute_times(rows),
+            'y': np.fromiter((row['tweet_count'] for row in rows), dtype=np.int64, count=len(rows)),
+        }
+
+    @staticmethod
+    def _volume_figure(columns):
+        fig = go.Figure(go.Scatter(x=columns['x'], y=columns['y'], mode='lines'))
+        fig.update_layout(
+            title='Tweet Volume Over Time',
+            xaxis_title='Time',
+            yaxis_title='Number of Tweets',
+            template='plotly_white'
+        )
+        return fig
+
+    @staticmethod
+    def _patch(columns):
+        """Patch replacing the first trace's arrays with ``columns``"""
+        patch = Patch()
+        for path, values in columns.items():
+            *parents, name = path.split('.')
+            target = patch['data'][0]
+            for parent in parents:
+                target = target[parent]
+            target[name] = values
+        return patch
+
+    def _data_version(self, snapshot, keys):
+        """Version in which any of the snapshot's ``keys`` last changed"""
+        return max(snapshot.versions.get(key, snapshot.version) for key in keys)
+
+    def _figure_callback(self, keys, columns, figure, empty_message, name):
+        """
+        Callback body for one graph and the dcc.Store remembering what its
+        client shows. Returns no_update when that is still current, a Patch
+        of the trace arrays when the client shows an older figure of the
+        same shape (and Patch is available), and a whole figure otherwise.
+        """
+        def update(n, state):
+            try:
+                snapshot = self.cache.get()
+                if snapshot is None:
+                    return self._create_empty_figure("Waiting for data..."), None
+                version = self._data_version(snapshot, keys)
+                if state and state['version'] == version:
+                    return no_update, no_update
+
+                data = columns(snapshot.data)
+                if data is None:
+                    return self._create_empty_figure(empty_message), {'version': version, 'patchable': False}
+                new_state = {'version': version, 'patchable': True}
+                if Patch is not None and state and state['patchable']:
+                    return self._patch(data), new_state
+                return figure(data), new_state
+            except Exception as e:
+                print(f"Error updating {name}: {e}")
+                return self._create_empty_figure(f"Error loading {name}"), None
+        return update
+
     def _setup_callbacks(self):
         """Set up all the dashboard callbacks"""
         
         @self.app.callback(
             [Output('stream-status', 'children'),
-             Output('last-update-time', 'children')],
-            [Input('sentiment-update', 'n_intervals')]
+             Output('last-update-time', 'children'),
+             Output('status-state', 'data')],
+            [Input('sentiment-update', 'n_intervals')],
+            [State('status-state', 'data')]
         )
-        def update_status(n):
+        def update_status(n, state):
             try:
-                conn = sqlite3.connect(self.db_path)
-                df = pd.read_sql_query("SELECT COUNT(*) as count FROM tweets", conn)
-                conn.close()
-                
-                if df['count'].iloc[0] > 0:
+                snapshot = self.cache.get()
+                if snapshot is None:
+                    return [
+                        "Twitter Stream Status: Waiting for data...",
+                        "Last Updated: Never",
+                        None
+                    ]
+                version = self._data_version(snapshot, ('tweet_count', 'refreshed_at'))
+                if state == version:
+                    return [no_update, no_update, no_update]
+
+                if snapshot.data['tweet_count'] > 0:
                     return [
                         "Twitter Stream Status: Connected (Twitter API Error - Using Sample Data)",
-                        f"Last Updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+                        f"Last Updated: {snapshot.data['refreshed_at']}",
+                        version
                     ]
                 else:
                     return [
                         "Twitter Stream Status: Waiting for data...",
-                        "Last Updated: Never"
+                        "Last Updated: Never",
+                        version
                     ]
             except Exception:
                 return [
                     "Twitter Stream Status: Error connecting to database",
-                    "Last Updated: Never"
+                    "Last Updated: Never",
+                    None
                 ]
-        
-        @self.app.callback(
-            Output('sentiment-graph', 'figure'),
-            Input('sentiment-update', 'n_intervals')
-        )
-        def update_sentiment_graph(n):
-            try:
-                conn = sqlite3.connect(self.db_path)
-                df = pd.read_sql_query(
-                    """
-                    SELECT timestamp, 
-                           sentiment->>'polarity' as polarity,
-                           sentiment->>'sentiment' as sentiment_label
-                    FROM tweets 
-                    ORDER BY timestamp DESC 
-                    LIMIT 100
-                    """, 
-                    conn
-                )
-                conn.close()
-
-                if len(df) == 0:
-                    return self._create_empty_figure("No sentiment data available")
-
-                fig = go.Figure()
-                fig.add_trace(go.Scatter(
-                    x=df['timestamp'],
-                    y=df['polarity'],
-                    mode='lines+markers',
-                    name='Sentiment Polarity',
-                    marker=dict(
-                        color=df['polarity'].apply(
-                            lambda x: 'green' if x > 0 else 'red' if x < 0 else 'gray'
-                        )
-                    )
-                ))
-
-                fig.update_layout(
-                    title='Sentiment Analysis Over Time',
-                    xaxis_title='Time',
-                    yaxis_title='Sentiment Polarity',
-                    template='plotly_white'
-                )
-
-                return fig
-            except Exception as e:
-                print(f"Error updating sentiment graph: {e}")
-                return self._create_empty_figure("Error loading sentiment data")
-
-        @self.app.callback(
-            Output('trends-graph', 'figure'),
-            Input('trends-update', 'n_intervals')
-        )
-        def update_trends_graph(n):
-            try:
-                trends = self.analyzer.trends.most_common(10)
-                if not trends:
-                    return self._create_empty_figure("No trending topics available")
-
-                df = pd.DataFrame(trends, columns=['Topic', 'Count'])
-
-                fig = px.bar(
-                    df,
-                    x='Count',
-                    y='Topic',
-                    orientation='h',
-                    title='Top Trending Topics'
-                )
-
-                fig.update_layout(
-                    template='plotly_white',
-                    yaxis={'categoryorder': 'total ascending'}
-                )
-
-                return fig
-            except Exception as e:
-                print(f"Error updating trends graph: {e}")
-                return self._create_empty_figure("Error loading trending topics")
-
-        @self.app.callback(
-            Output('volume-graph', 'figure'),
-            Input('volume-update', 'n_intervals')
-        )
-        def update_volume_graph(n):
-            try:
-                conn = sqlite3.connect(self.db_path)
-                df = pd.read_sql_query(
-                    """
-                    SELECT strftime('%Y-%m-%d %H:%M', timestamp) as time_bucket,
-                           COUNT(*) as tweet_count
-                    FROM tweets
-                    GROUP BY time_bucket
-                    ORDER BY time_bucket DESC
-                    LIMIT 30
-                    """,
-                    conn
-                )
-                conn.close()
 
-                if len(df) == 0:
-                    return self._create_empty_figure("No tweet volume data available")
-
-                fig = px.line(
-                    df,
-                    x='time_bucket',
-                    y='tweet_count',
-                    title='Tweet Volume Over Time'
-                )
-
-                fig.update_layout(
-                    xaxis_title='Time',
-                    yaxis_title='Number of Tweets',
-                    template='plotly_white'
-                )
-
-                return fig
-            except Exception as e:
-                print(f"Error updating volume graph: {e}")
-                return self._create_empty_figure("Error loading tweet volume data")
+        graphs = [
+            ('sentiment', ('minutes',), self._sentiment_columns, self._sentiment_figure,
+             "No sentiment data available", "sentiment data"),
+            ('trends', ('trends',), self._trends_columns, self._trends_figure,
+             "No trending topics available", "trending topics"),
+            ('burst', ('bursting',), self._burst_columns, self._burst_figure,
+             "No topics bursting right now", "bursting topics"),
+            ('volume', ('minutes',), self._volume_columns, self._volume_figure,
+             "No tweet volume data available", "tweet volume data"),
+        ]
+        for graph, keys, columns, figure, empty_message, name in graphs:
+            self.app.callback(
+                [Output(f'{graph}-graph', 'figure'),
+                 Output(f'{graph}-state', 'data')],
+                [Input(f'{graph}-update', 'n_intervals')],
+                [State(f'{graph}-state', 'data')]
+            )(self._figure_callback(keys, columns, figure, empty_message, name))
 
         @self.app.callback(
-            Output('recent-tweets-table', 'children'),
-            Input('table-update', 'n_intervals')
+            [Output('recent-tweets-table', 'children'),
+             Output('table-state', 'data')],
+            [Input('table-update', 'n_intervals')],
+            [State('table-state', 'data')]
         )
-        def update_recent_tweets(n):
+        def update_recent_tweets(n, state):
             try:
-                conn = sqlite3.connect(self.db_path)
-                df = pd.read_sql_query(
-                    """
-                    SELECT text, 
-                           user,
-                           sentiment->>'sentiment' as sentiment,
-                           timestamp
-                    FROM tweets
-                    ORDER BY timestamp DESC
-                    LIMIT 5
-                    """,
-                    conn
-                )
-                conn.close()
+                snapshot = self.cache.get()
+                if snapshot is not None:
+                    version = self._data_version(snapshot, ('recent_tweets',))
+                    if state == version:
+                        return [no_update, no_update]
+                else:
+                    version = None
+                df = pd.DataFrame([dict(row) for row in snapshot.data['recent_tweets']] if snapshot else [],
+                                  columns=['text', 'user', 'sentiment', 'timestamp'])
 
                 if len(df) == 0:
-                    return html.Div("No tweets available yet. Waiting for data...", 
-                                  className="text-center text-muted my-4")
+                    return [html.Div("No tweets available yet. Waiting for data...", 
+                                     className="text-center text-muted my-4"), version]
 
-                return dbc.Table.from_dataframe(
+                return [dbc.Table.from_dataframe(
                     df,
                     striped=True,
                     bordered=True,
                     hover=True,
                     responsive=True
-                )
+                ), version]
             except Exception as e:
                 print(f"Error updating recent tweets table: {e}")
-                return html.Div("Error loading recent tweets", 
-                              className="text-center text-danger my-4")
+                return [html.Div("Error loading recent tweets", 
+                                 className="text-center text-danger my-4"), None]
 
     def _create_empty_figure(self, message="No data available"):
         """Create an empty figure with a message"""
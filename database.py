@@ -1,26 +1,198 @@
 import sqlite3
-import json
-from datetime import datetime
 import os
+import queue
+import threading
+import time
 import logging
-from utils.helpers import ensure_directory_exists
+from utils.helpers import ensure_directory_exists, to_epoch_ms, from_epoch_ms
+from utils import metrics
+from storage.connection import get_pool
+from storage import migrations
+from storage import rollups
+from storage import export
+from storage.retention import RetentionManager
 
 logger = logging.getLogger(__name__)
 
+COMMIT_TIME = metrics.stage_timer('commit')
+COMMIT_ERRORS = metrics.error_counter('commit')
+STORE_ERRORS = metrics.error_counter('store')
+ROWS_WRITTEN = metrics.counter('db_rows_written_total', 'Tweets committed by the batched writer')
+ROWS_FAILED = metrics.counter('db_rows_failed_total', 'Tweets in batches that failed to commit')
+
+INSERT_TWEET_SQL = '''
+    INSERT INTO tweets (
+        id, text, timestamp, timestamp_ms, user,
+        retweet_count, favorite_count,
+        polarity, subjectivity, sentiment_label
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+INSERT_TERM_SQL = '''
+    INSERT OR IGNORE INTO tweet_terms (tweet_id, term, kind) VALUES (?, ?, ?)
+'''
+
+
+class BatchWriter:
+    """Buffer rows in a bounded queue and write them in batches from one thread.
+
+    A batch is flushed when it reaches ``batch_size`` rows or when its oldest
+    row has waited ``flush_interval`` seconds, whichever comes first. Each
+    batch is handed to ``write_batch(conn, rows)`` inside a single
+    ``BEGIN IMMEDIATE`` transaction on the writer thread's pooled connection.
+    """
+
+    _STOP = object()
+
+    def __init__(self, pool, write_batch, batch_size=500, flush_interval=0.25, max_queue=10000):
+        self.pool = pool
+        self.write_batch = write_batch
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.rows_written = 0
+        self.rows_failed = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._closed = False
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name='db-writer')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def put(self, row):
+        """Queue a row for writing; blocks while the queue is full"""
+        if self._closed or self._stopped:
+            raise RuntimeError("BatchWriter is closed")
+        self._queue.put(row)
+
+    def flush(self, timeout=None):
+        """Block until every row queued so far has been committed"""
+        if self._stopped:
+            return False
+        done = threading.Event()
+        self._queue.put(done)
+        if self._stopped:
+            # The writer stopped around our put and may not see the event
+            self._release()
+        return done.wait(timeout)
+
+    def close(self, timeout=None):
+        """Flush buffered rows and stop the writer thread"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread.is_alive():
+            self._queue.put(self._STOP)
+            self._thread.join(timeout)
+
+    @property
+    def pending(self):
+        """Approximate number of rows waiting to be written"""
+        return self._queue.qsize()
+
+    def _run(self):
+        pending = []
+        waiters = []
+        deadline = None
+        stopping = False
+        try:
+            conn = self.pool.writer()
+            while not stopping:
+                timeout = None if not pending else max(0.0, deadline - time.monotonic())
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    item = None
+
+                if item is self._STOP:
+                    stopping = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                elif item is not None:
+                    if not pending:
+                        deadline = time.monotonic() + self.flush_interval
+                    pending.append(item)
+
+                if pending and (stopping or waiters
+                                or len(pending) >= self.batch_size
+                                or time.monotonic() >= deadline):
+                    self._write(conn, pending)
+                    pending = []
+
+                for waiter in waiters:
+                    waiter.set()
+                waiters = []
+        except Exception as e:
+            logger.error(f"Batched writer stopped: {e}")
+        finally:
+            # Never leave flush() callers waiting on a writer that is gone
+            self._stopped = True
+            for waiter in waiters:
+                waiter.set()
+            self._fail(len(pending) + self._release())
+            self.pool.close_thread()
+
+    def _release(self):
+        """Drain the queue, waking flush() callers; returns the rows dropped"""
+        dropped = 0
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return dropped
+            if isinstance(item, threading.Event):
+                item.set()
+            elif item is not self._STOP:
+                dropped += 1
+
+    def _fail(self, count):
+        if count:
+            self.rows_failed += count
+            ROWS_FAILED.inc(count)
+
+    def _write(self, conn, rows):
+        start = time.perf_counter()
+        try:
+            with conn:
+                conn.execute('BEGIN IMMEDIATE')
+                self.write_batch(conn, rows)
+            COMMIT_TIME.observe(time.perf_counter() - start)
+            self.rows_written += len(rows)
+            ROWS_WRITTEN.inc(len(rows))
+            logger.debug(f"Wrote batch of {len(rows)} rows")
+        except Exception as e:
+            # A bad row must not take the writer thread down with it
+            self._fail(len(rows))
+            COMMIT_ERRORS.inc()
+            logger.error(f"Error writing batch of {len(rows)} rows: {e}")
+
+
 class Database:
-    def __init__(self, db_path='src/default.db'):
+    def __init__(self, db_path='src/default.db', batch_size=500, flush_interval=0.25, max_queue=10000):
         # Ensure the directory exists
         db_dir = os.path.dirname(db_path)
         ensure_directory_exists(db_dir)
         
         self.db_path = db_path
+        self.pool = get_pool(db_path)
         self._create_tables()
+        migrations.migrate(self.pool.writer())
+        migrations.start_backfill(self.pool)
+        self._writer = BatchWriter(
+            self.pool,
+            self._write_batch,
+            batch_size=batch_size,
+            flush_interval=flush_interval,
+            max_queue=max_queue
+        )
+        self.retention = None
+        metrics.gauge('db_writer_pending', 'Tweets queued for the batched writer',
+                      fn=lambda: self._writer.pending)
         logger.info(f"Database initialized at {db_path}")
 
     def _create_tables(self):
         """Create necessary tables if they don't exist"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self.pool.writer()
             cursor = conn.cursor()
 
             # Create tweets table with proper indices
@@ -37,8 +209,8 @@ class Database:
                 )
             ''')
 
-            # Create indices for better query performance
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_timestamp ON tweets(timestamp)')
+            # Create indices for better query performance; time-range
+            # indices are managed by storage.migrations
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_user ON tweets(user)')
 
             conn.commit()
@@ -46,128 +218,163 @@ class Database:
         except sqlite3.Error as e:
             logger.error(f"Error creating tables: {e}")
             raise
-        finally:
-            if conn:
-                conn.close()
 
     def store(self, data):
-        """Store processed tweet data in the database"""
+        """Queue processed tweet data for the batched writer"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-
             # Ensure data is properly formatted
-            sentiment_json = json.dumps(data.get('sentiment', {}))
-            trends_json = json.dumps(data.get('trends', {}))
-            timestamp = data.get('timestamp', datetime.now().isoformat())
+            sentiment = data.get('sentiment') or {}
+            trends = data.get('trends') or {}
+            # Every writer ends up with the same ISO text and epoch-ms value
+            timestamp_ms = to_epoch_ms(data.get('timestamp'))
+            timestamp = from_epoch_ms(timestamp_ms).isoformat(timespec='milliseconds')
+            terms = [(tag, 'hashtag') for tag in trends.get('hashtags', [])]
+            terms.extend((mention, 'mention') for mention in trends.get('mentions', []))
 
-            cursor.execute('''
-                INSERT INTO tweets (
-                    text, timestamp, user, 
-                    retweet_count, favorite_count,
-                    sentiment, trends
-                ) VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (
+            self._writer.put(((
                 data.get('text', ''),
                 timestamp,
+                timestamp_ms,
                 data.get('user', 'unknown'),
                 int(data.get('retweet_count', 0)),
                 int(data.get('favorite_count', 0)),
-                sentiment_json,
-                trends_json
-            ))
-
-            conn.commit()
-            logger.debug(f"Stored tweet from user {data.get('user', 'unknown')}")
+                sentiment.get('polarity'),
+                sentiment.get('subjectivity'),
+                sentiment.get('sentiment')
+            ), terms))
             return True
 
-        except sqlite3.Error as e:
-            logger.error(f"Error storing data: {e}")
-            return False
         except Exception as e:
+            STORE_ERRORS.inc()
             logger.error(f"Unexpected error storing data: {e}")
             return False
-        finally:
-            if conn:
-                conn.close()
+
+    def _write_batch(self, conn, rows):
+        """Insert a batch of tweets and their terms inside the writer's transaction"""
+        # Ids are assigned up front so the term rows can reference them
+        # without a round trip per tweet; the write lock is already held.
+        next_id = conn.execute('''
+            SELECT MAX(
+                COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'tweets'), 0),
+                COALESCE((SELECT MAX(id) FROM tweets), 0)
+            ) + 1
+        ''').fetchone()[0]
+
+        tweet_rows = []
+        term_rows = []
+        for tweet_id, (values, terms) in enumerate(rows, start=next_id):
+            tweet_rows.append((tweet_id,) + values)
+            term_rows.extend((tweet_id, term, kind) for term, kind in terms)
+
+        conn.executemany(INSERT_TWEET_SQL, tweet_rows)
+        if term_rows:
+            conn.executemany(INSERT_TERM_SQL, term_rows)
+        # values: (text, timestamp, timestamp_ms, user, retweets, favorites,
+        #          polarity, subjectivity, sentiment_label)
+        rollups.apply(conn, ((values[2], values[6], values[8], terms) for values, terms in rows))
+
+    def flush(self, timeout=None):
+        """Wait until all queued tweets have been committed"""
+        return self._writer.flush(timeout)
+
+    def start_retention(self, days=7, interval=3600, **kwargs):
+        """
+        Delete data older than ``days`` every ``interval`` seconds on a
+        background thread (see storage.retention.RetentionManager)
+        """
+        if self.retention is None:
+            self.retention = RetentionManager(self.pool, days=days, interval=interval, **kwargs).start()
+        return self.retention
+
+    def close(self, timeout=None):
+        """Flush queued tweets and stop the background writer"""
+        if self.retention is not None:
+            self.retention.stop(timeout)
+        self._writer.close(timeout)
+        logger.info("Database writer closed")
 
     def get_recent_tweets(self, limit=100):
         """Retrieve recent tweets from the database"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self.pool.reader()
             cursor = conn.cursor()
 
             cursor.execute('''
-                SELECT * FROM tweets 
-                ORDER BY timestamp DESC 
+                SELECT id, text, timestamp, user,
+                       retweet_count, favorite_count,
+                       polarity, subjectivity, sentiment_label
+                FROM tweets 
+                ORDER BY timestamp_ms DESC 
                 LIMIT ?
             ''', (limit,))
 
-            columns = [description[0] for description in cursor.description]
             tweets = []
-
+            by_id = {}
             for row in cursor.fetchall():
-                tweet = dict(zip(columns, row))
-                try:
-                    tweet['sentiment'] = json.loads(tweet['sentiment'])
-                    tweet['trends'] = json.loads(tweet['trends'])
-                except json.JSONDecodeError:
-                    tweet['sentiment'] = {}
-                    tweet['trends'] = {}
+                tweet = {
+                    'id': row[0],
+                    'text': row[1],
+                    'timestamp': row[2],
+                    'user': row[3],
+                    'retweet_count': row[4],
+                    'favorite_count': row[5],
+                    'sentiment': {
+                        'polarity': row[6],
+                        'subjectivity': row[7],
+                        'sentiment': row[8]
+                    },
+                    'trends': {'hashtags': [], 'mentions': []}
+                }
                 tweets.append(tweet)
+                by_id[tweet['id']] = tweet
+
+            if by_id:
+                placeholders = ','.join('?' * len(by_id))
+                cursor.execute(f'''
+                    SELECT tweet_id, term, kind FROM tweet_terms
+                    WHERE tweet_id IN ({placeholders})
+                ''', list(by_id))
+                for tweet_id, term, kind in cursor.fetchall():
+                    by_id[tweet_id]['trends'][kind + 's'].append(term)
 
             return tweets
 
         except sqlite3.Error as e:
             logger.error(f"Error retrieving tweets: {e}")
             return []
-        finally:
-            if conn:
-                conn.close()
+
+    def export_batches(self, since=None, until=None, batch_size=10000):
+        """
+        Stream stored tweets with since <= timestamp < until, oldest first,
+        as lists of row tuples (columns in storage.export.COLUMNS).
+        Memory use is one batch however large the range.
+        """
+        since_ms = None if since is None else to_epoch_ms(since)
+        until_ms = None if until is None else to_epoch_ms(until)
+        return export.iter_batches(self.pool.reader(), since_ms, until_ms, batch_size)
 
     def get_sentiment_stats(self, hours=24):
-        """Get sentiment statistics for the last n hours"""
+        """Get sentiment statistics for the last n hours (to the minute, or
+        to the hour beyond two days)"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-
-            cursor.execute('''
-                SELECT 
-                    json_extract(sentiment, '$.sentiment') as sentiment_label,
-                    COUNT(*) as count
-                FROM tweets 
-                WHERE datetime(timestamp) > datetime('now', '-? hours')
-                GROUP BY sentiment_label
-            ''', (hours,))
-
-            stats = dict(cursor.fetchall())
-            return stats
+            since_ms = to_epoch_ms() - int(hours * 3600 * 1000)
+            period = 'minute' if hours <= 48 else 'hour'
+            totals = rollups.totals(self.pool.reader(), period, since_ms)
+            return {label: totals[label] for label in ('positive', 'negative', 'neutral')
+                    if totals[label]}
 
         except sqlite3.Error as e:
             logger.error(f"Error retrieving sentiment stats: {e}")
             return {}
-        finally:
-            if conn:
-                conn.close()
 
     def cleanup_old_data(self, days=7):
-        """Remove tweets older than specified days"""
+        """Remove tweets and per-minute rollups older than specified days;
+        hourly and daily rollups are kept. Deletes in short id-range
+        transactions (see storage.retention) so ingestion keeps going."""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-
-            cursor.execute('''
-                DELETE FROM tweets 
-                WHERE datetime(timestamp) < datetime('now', '-? days')
-            ''', (days,))
-
-            conn.commit()
-            logger.info(f"Removed tweets older than {days} days")
+            RetentionManager(self.pool, days=days).run_once()
             return True
 
         except sqlite3.Error as e:
             logger.error(f"Error cleaning up old data: {e}")
             return False
-        finally:
-            if conn:
-                conn.close() 
\ No newline at end of file
@@ -0,0 +1,179 @@
+"""
+Streaming export of stored tweets for offline analysis.
+
+Rows are read in pages with keyset pagination on ``(timestamp_ms, id)``:
+each page starts right after the last key of the previous one, so every
+page is an index range scan however deep into the table it is, and only
+one page is in memory at a time. Tweets whose ``timestamp_ms`` has not
+been backfilled yet are skipped.
+
+Export a month of tweets with:
+
+    python -m storage.export src/default.db tweets.parquet --since 2025-01-01 --until 2025-02-01
+"""
+import argparse
+import logging
+import sys
+from utils.helpers import to_epoch_ms
+from storage.connection import get_pool
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet export is optional
+    pa = None
+
+# Column order of the row tuples from iter_batches; hashtags and mentions
+# are space-separated (terms are single words), or None
+COLUMNS = (
+    'id', 'timestamp_ms', 'timestamp', 'user', 'text', 'retweet_count', 'favorite_count',
+    'polarity', 'subjectivity', 'sentiment_label', 'hashtags', 'mentions',
+)
+
+ROW_SQL = '''
+    id, timestamp_ms, timestamp, user, text, retweet_count, favorite_count,
+    polarity, subjectivity, sentiment_label,
+    (SELECT group_concat(term, ' ') FROM tweet_terms
+     WHERE tweet_id = tweets.id AND kind = 'hashtag'),
+    (SELECT group_concat(term, ' ') FROM tweet_terms
+     WHERE tweet_id = tweets.id AND kind = 'mention')
+'''
+
+# REAL as JSON with 17 significant digits; json_object's own 15 don't round-trip
+_EXACT_REAL = "CASE WHEN {0} IS NULL THEN NULL ELSE json(printf('%!.17g', {0})) END"
+
+# One finished NDJSON line per row, built by SQLite, then the page key
+NDJSON_SQL = f'''
+    json_object(
+        'id', id, 'timestamp_ms', timestamp_ms, 'timestamp', timestamp, 'user', user,
+        'text', text, 'retweet_count', retweet_count, 'favorite_count', favorite_count,
+        'polarity', {_EXACT_REAL.format('polarity')},
+        'subjectivity', {_EXACT_REAL.format('subjectivity')},
+        'sentiment_label', sentiment_label,
+        'hashtags', json((SELECT json_group_array(term) FROM tweet_terms
+                          WHERE tweet_id = tweets.id AND kind = 'hashtag')),
+        'mentions', json((SELECT json_group_array(term) FROM tweet_terms
+                          WHERE tweet_id = tweets.id AND kind = 'mention'))
+    ), timestamp_ms, id
+'''
+
+
+def _pages(conn, columns, since_ms=None, until_ms=None, batch_size=10000):
+    """Pages of rows selecting ``columns``, whose last two are timestamp_ms and id"""
+    since_ms = -2 ** 63 if since_ms is None else since_ms
+    until_ms = 2 ** 63 - 1 if until_ms is None else until_ms
+    rows = conn.execute(f'''
+        SELECT {columns} FROM tweets
+        WHERE timestamp_ms >= ? AND timestamp_ms < ?
+        ORDER BY timestamp_ms, id
+        LIMIT ?
+    ''', (since_ms, until_ms, batch_size)).fetchall()
+    while rows:
+        yield rows
+        if len(rows) < batch_size:
+            return
+        last_ms, last_id = rows[-1][-2:]
+        rows = conn.execute(f'''
+            SELECT {columns} FROM tweets
+            WHERE (timestamp_ms, id) > (?, ?) AND timestamp_ms < ?
+            ORDER BY timestamp_ms, id
+            LIMIT ?
+        ''', (last_ms, last_id, until_ms, batch_size)).fetchall()
+
+
+def iter_batches(conn, since_ms=None, until_ms=None, batch_size=10000):
+    """
+    Yield lists of up to ``batch_size`` row tuples (see COLUMNS) with
+    ``since_ms <= timestamp_ms < until_ms``, oldest first.
+    """
+    # The keyset columns have to come last for _pages
+    for rows in _pages(conn, ROW_SQL + ', timestamp_ms, id', since_ms, until_ms, batch_size):
+        yield [row[:-2] for row in rows]
+
+
+def iter_ndjson(conn, since_ms=None, until_ms=None, batch_size=10000):
+    """Like iter_batches, but every row is one JSON object string"""
+    for rows in _pages(conn, NDJSON_SQL, since_ms, until_ms, batch_size):
+        yield [row[0] for row in rows]
+
+
+def write_ndjson(conn, path, since_ms=None, until_ms=None, batch_size=10000):
+    """Write matching tweets to ``path`` as NDJSON; returns the row count"""
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        for lines in iter_ndjson(conn, since_ms, until_ms, batch_size):
+            f.write('\n'.join(lines))
+            f.write('\n')
+            count += len(lines)
+    return count
+
+
+def _arrow_schema():
+    terms = pa.list_(pa.string())
+    return pa.schema([
+        ('id', pa.int64()), ('timestamp_ms', pa.int64()), ('timestamp', pa.string()),
+        ('user', pa.string()), ('text', pa.string()), ('retweet_count', pa.int64()),
+        ('favorite_count', pa.int64()), ('polarity', pa.float64()),
+        ('subjectivity', pa.float64()), ('sentiment_label', pa.string()),
+        ('hashtags', terms), ('mentions', terms),
+    ])
+
+
+def _arrow_table(rows, schema):
+    columns = []
+    no_terms = pa.scalar([], type=pa.list_(pa.string()))
+    for index, field in enumerate(schema):
+        values = [row[index] for row in rows]
+        if field.name in ('hashtags', 'mentions'):
+            column = pc.split_pattern(pa.array(values, type=pa.string()), ' ')
+            columns.append(pc.fill_null(column, no_terms))
+        else:
+            columns.append(pa.array(values, type=field.type))
+    return pa.Table.from_arrays(columns, schema=schema)
+
+
+def write_parquet(conn, path, since_ms=None, until_ms=None, batch_size=50000, compression='zstd'):
+    """
+    Write matching tweets to ``path`` as Parquet, one row group per batch;
+    returns the row count. Needs pyarrow.
+    """
+    if pa is None:
+        raise ImportError("Parquet export requires pyarrow (pip install pyarrow)")
+    schema = _arrow_schema()
+    count = 0
+    with pq.ParquetWriter(path, schema, compression=compression) as writer:
+        for rows in iter_batches(conn, since_ms, until_ms, batch_size):
+            writer.write_table(_arrow_table(rows, schema))
+            count += len(rows)
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export stored tweets to NDJSON or Parquet")
+    parser.add_argument('db_path')
+    parser.add_argument('output')
+    parser.add_argument('--since', help="first timestamp to export (ISO date/time or epoch ms)")
+    parser.add_argument('--until', help="export timestamps before this (ISO date/time or epoch ms)")
+    parser.add_argument('--format', choices=('ndjson', 'parquet'),
+                        help="defaults to parquet for .parquet outputs, otherwise ndjson")
+    parser.add_argument('--batch-size', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    def timestamp(value):
+        if value is None:
+            return None
+        return to_epoch_ms(int(value) if value.isdigit() else value)
+
+    output_format = args.format or ('parquet' if args.output.endswith('.parquet') else 'ndjson')
+    writer = write_parquet if output_format == 'parquet' else write_ndjson
+    kwargs = {'batch_size': args.batch_size} if args.batch_size else {}
+    conn = get_pool(args.db_path).reader()
+    count = writer(conn, args.output, timestamp(args.since), timestamp(args.until), **kwargs)
+    print(f"Exported {count} tweets to {args.output}")
+    return count
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main(sys.argv[1:])
@@ -0,0 +1,141 @@
+import heapq
+import math
+from collections import Counter
+from operator import itemgetter
+
+# Function words that make a phrase meaningless when it starts or ends
+# with one, plus Twitter boilerplate
+STOPWORDS = frozenset("""
+a about above after again against all am an and any are as at be because been before
+being below between both but by can could did do does doing down during each few for
+from further had has have having he her here hers herself him himself his how i if in
+into is it its itself just let me more most my myself no nor not now of off on once
+only or other our ours ourselves out over own same she should so some such than that
+the their theirs them themselves then there these they this those through to too under
+until up very was we were what when where which while who whom why will with would you
+your yours yourself yourselves im ive its dont doesnt cant wont isnt arent thats theres
+s t d ll m re ve rt amp via http https www com co
+""".split())
+
+
+class CollocationScorer:
+    """Streaming PMI gate that only lets collocations through.
+
+    Pointwise mutual information compares how often an n-gram occurs
+    with how often its words would line up by chance,
+    ``log2(c(gram) * N^(n-1) / prod c(word))``. An n-gram is held in a
+    bounded ``pending`` counter until it has been seen ``min_count``
+    times with a PMI of at least ``min_pmi``; it is then admitted, its
+    pending occurrences are released at once and every later occurrence
+    passes straight through. When ``pending`` outgrows ``capacity`` only
+    its most frequent half is kept, and word counts are halved every
+    ``decay_every`` words so the statistics follow the stream.
+    """
+
+    def __init__(self, min_pmi=3.0, min_count=3, capacity=100000, decay_every=1000000):
+        self.min_pmi = min_pmi
+        self.min_count = min_count
+        self.capacity = capacity
+        self.decay_every = decay_every
+        self.word_counts = Counter()
+        self.total = 0
+        self.pending = {}
+        self.admitted = {}
+        self._since_decay = 0
+
+    def observe(self, words):
+        """Count the words of one text"""
+        self.word_counts.update(words)
+        self.total += len(words)
+        self._since_decay += len(words)
+        if self._since_decay >= self.decay_every:
+            self._decay()
+
+    def admit(self, grams):
+        """Occurrences of ``grams`` to count now, repeated for released ones"""
+        admitted = self.admitted
+        pending = self.pending
+        out = []
+        for gram in grams:
+            if gram in admitted:
+                out.append(gram)
+                continue
+            count = pending.get(gram, 0) + 1
+            if count >= self.min_count and self.pmi(gram, count) >= self.min_pmi:
+                pending.pop(gram, None)
+                admitted[gram] = True
+                out.extend([gram] * count)
+            else:
+                pending[gram] = count
+        if len(pending) > self.capacity:
+            self.pending = dict(heapq.nlargest(self.capacity // 2, pending.items(), key=itemgetter(1)))
+        if len(admitted) > self.capacity:
+            # Forget the oldest admissions; they can qualify again
+            for gram in list(admitted)[:len(admitted) // 4]:
+                del admitted[gram]
+        return out
+
+    def pmi(self, gram, count):
+        denominator = 1
+        for word in gram:
+            denominator *= self.word_counts.get(word, 0) or 1
+        return math.log2(count * self.total ** (len(gram) - 1) / denominator)
+
+    def _decay(self):
+        self.word_counts = Counter({word: count // 2 for word, count in self.word_counts.items()
+                                    if count > 1})
+        self.total = sum(self.word_counts.values())
+        self.pending = {gram: count // 2 for gram, count in self.pending.items() if count > 1}
+        self._since_decay = 0
+
+
+class TermFilter:
+    """Drops noise before it reaches the trend counters.
+
+    An n-gram is kept only if none of its words is a URL, a number
+    (with ``strip_numbers``) or shorter than ``min_length``, and it
+    neither starts nor ends with a stopword. Dropped words break the
+    word sequence, so no n-gram spans them. An optional ``scorer`` such
+    as ``CollocationScorer`` then decides which of the remaining
+    n-grams are meaningful phrases. Numeric hashtags are dropped too.
+    """
+
+    def __init__(self, stopwords=STOPWORDS, min_length=2, strip_urls=True, strip_numbers=True,
+                 scorer=None):
+        self.stopwords = frozenset(stopwords)
+        self.min_length = min_length
+        self.strip_urls = strip_urls
+        self.strip_numbers = strip_numbers
+        self.scorer = scorer
+
+    def tags(self, tags):
+        """Hashtags or mentions worth counting"""
+        if not self.strip_numbers:
+            return tags
+        return {tag for tag in tags if not tag.isdigit()}
+
+    def ngrams(self, words, n):
+        """
+        Filtered n-grams of ``words`` as tuples.
+        ``None`` entries in ``words`` mark removed URLs.
+        """
+        min_length = self.min_length
+        strip_numbers = self.strip_numbers
+        stopwords = self.stopwords
+        grams = []
+        kept = []
+        run = 0
+        for word in words:
+            if word is None or len(word) < min_length or (strip_numbers and word.isdigit()):
+                run = 0
+                continue
+            kept.append(word)
+            run += 1
+            if run >= n:
+                gram = tuple(kept[-n:])
+                if gram[0] not in stopwords and gram[-1] not in stopwords:
+                    grams.append(gram)
+        if self.scorer is not None:
+            self.scorer.observe(kept)
+            grams = self.scorer.admit(grams)
+        return grams
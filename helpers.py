@@ -1,4 +1,6 @@
 import os
+import math
+import time
 import logging
 from datetime import datetime
 
@@ -22,4 +24,28 @@ def format_timestamp(timestamp):
             timestamp = datetime.fromisoformat(timestamp)
         except ValueError:
             return timestamp
-    return timestamp.strftime("%Y-%m-%d %H:%M:%S") 
\ No newline at end of file
+    return timestamp.strftime("%Y-%m-%d %H:%M:%S") 
+
+def to_epoch_ms(timestamp=None):
+    """Convert a datetime, ISO string or epoch value to integer epoch milliseconds.
+
+    Naive datetimes and strings are interpreted as local time, matching
+    ``datetime.now()``. ``None`` means now. Sub-millisecond parts are
+    rounded half up; the schema backfill calls this too, so stored and
+    backfilled ``timestamp_ms`` values agree.
+    """
+    if timestamp is None:
+        return math.floor(time.time() * 1000 + 0.5)
+    if isinstance(timestamp, int):
+        return timestamp
+    if isinstance(timestamp, float):
+        return math.floor(timestamp + 0.5)
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp)
+    # Whole seconds are exact in a float; round the microseconds in integers
+    seconds = int(timestamp.replace(microsecond=0).timestamp())
+    return seconds * 1000 + (timestamp.microsecond + 500) // 1000
+
+def from_epoch_ms(timestamp_ms):
+    """Convert epoch milliseconds to a naive local datetime"""
+    return datetime.fromtimestamp(timestamp_ms / 1000)
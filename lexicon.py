@@ -0,0 +1,185 @@
+import re
+
+import numpy as np
+
+# Characters TextBlob's tokenizer splits off the start and end of a word
+_PUNCTUATION = r""".,;:!?()\[\]{}`'"@#$^&*+\-|=~_“”‘’"""
+
+
+class SentimentLexicon:
+    """Array-backed copy of the pattern sentiment lexicon TextBlob scores with.
+
+    Polarity, subjectivity and intensity of every lexicon word are held in
+    NumPy arrays indexed through one dict lookup per token, and texts are
+    tokenized with a single precompiled regex (or, when they hold an
+    emoticon or abbreviation, by pattern's own tokenizer). ``score_batch``
+    reproduces TextBlob's ``PatternAnalyzer``: texts made only of plain
+    lexicon words are averaged in one vectorized pass, and texts with modifiers
+    ("very"), negations, exclamation marks or emoticons go through the
+    same left-to-right rules pattern applies.
+    """
+
+    def __init__(self, sentiment=None):
+        if sentiment is None:
+            from textblob.en import sentiment
+        if dict.__len__(sentiment) == 0:
+            sentiment.load()
+
+        words = list(dict.keys(sentiment))
+        scores = [dict.__getitem__(sentiment, word)[None] for word in words]
+        self.index = {word: position for position, word in enumerate(words)}
+        self.polarity = np.array([score[0] for score in scores], dtype=np.float64)
+        self.subjectivity = np.array([score[1] for score in scores], dtype=np.float64)
+        self.intensity = np.array([score[2] for score in scores], dtype=np.float64)
+        self.is_modifier = np.array([
+            any(tag in dict.__getitem__(sentiment, word) for tag in sentiment.modifiers)
+            for word in words
+        ], dtype=bool)
+        self.negations = frozenset(sentiment.negations)
+        self.modifier = sentiment.modifier
+
+        from textblob._text import ABBREVIATIONS, EMOTICONS, PUNCTUATION
+        self.emoticons = {}
+        for (_, polarity), faces in EMOTICONS.items():
+            for face in faces:
+                # Pattern only checks non-alphabetic tokens for emoticons
+                if not face.isalpha():
+                    self.emoticons[face.lower()] = polarity
+
+        # Tokens that make a text's score depend on word order
+        self._special = frozenset(
+            [word for word, modifier in zip(words, self.is_modifier) if modifier]
+        ) | self.negations | frozenset(self.emoticons) | {'!', '(!)'}
+
+        # Python-list views for the sequential path; scalar access on
+        # NumPy arrays is slower than on lists
+        self._p = self.polarity.tolist()
+        self._s = self.subjectivity.tolist()
+        self._i = self.intensity.tolist()
+        self._m = self.is_modifier.tolist()
+
+        # Pattern splits leading punctuation other than periods off a word,
+        # so ".great" stays one (unknown) token
+        self._token_re = re.compile(
+            r'(\( ?! ?\))'
+            rf'|(\.[^\s\'"“”‘’]*[^\s{_PUNCTUATION}]|[^\s{_PUNCTUATION}](?:[^\s\'"“”‘’]*[^\s{_PUNCTUATION}])?)'
+            r'|(!|\.\.\.)'
+        )
+        # Pattern glues emoticons back together from its punctuation-split
+        # tokens with a case-sensitive regex (":D" is a grin, ":d" is not)
+        # and keeps a period on abbreviations ("Mr.", "It.", "o.o."), which
+        # changes how far a modifier or negation reaches. Texts where either
+        # could happen are tokenized by pattern itself: one face character
+        # after another, optionally spaced, ending where pattern ends a
+        # token, or a one- or two-letter abbreviation
+        end = rf"(?=[\s{_PUNCTUATION}]|n't|$)"
+        faces = sorted(set().union(*EMOTICONS.values()), key=len, reverse=True)
+        short = '|'.join(re.escape(abbreviation[:-1]) for abbreviation in ABBREVIATIONS
+                         if len(abbreviation) == 3 and abbreviation.endswith('.'))
+        self._irregular_re = re.compile('|'.join(
+            [r'\s*'.join(re.escape(char) for char in face) + ('' if face[-1] in PUNCTUATION else end)
+             for face in faces if not face.isalpha()]
+            + [rf'(?<![^\s{_PUNCTUATION.replace(".", "")}])(?:[A-Za-z]|[A-Z][b-df-hj-np-tv-xz|]|{short})\.']
+        ))
+        self._find_tokens = sentiment.tokenizer
+
+    def __getstate__(self):
+        # Pattern's modifier test is a lambda, which cannot be pickled; an
+        # unpickled copy (as sent to analysis workers) uses TextBlob's
+        state = self.__dict__.copy()
+        del state['modifier'], state['_find_tokens']
+        return state
+
+    def __setstate__(self, state):
+        from textblob.en import sentiment
+        self.__dict__.update(state)
+        self.modifier = sentiment.modifier
+        self._find_tokens = sentiment.tokenizer
+
+    def tokenize(self, text):
+        """Lowercased tokens of ``text`` as TextBlob's tokenizer would assess them"""
+        if self._irregular_re.search(text):
+            return ' '.join(self._find_tokens(text)).lower().split()
+        # Ellipses stay tokens: pattern lets them end a modifier's scope.
+        # Like pattern, only a lowercase "n't" is split off
+        text = text.replace("n't", " n t").lower()
+        return [sarcasm or word or bang
+                for sarcasm, word, bang in self._token_re.findall(text)]
+
+    def score_batch(self, texts):
+        """(polarity, subjectivity) for every text, in order"""
+        results = [None] * len(texts)
+        index = self.index
+        special = self._special
+        simple_ids = []
+        simple_rows = []
+        simple_slots = []
+
+        for slot, text in enumerate(texts):
+            tokens = self.tokenize(text)
+            if special.isdisjoint(tokens):
+                ids = [index[token] for token in tokens if token in index]
+                simple_ids.extend(ids)
+                simple_rows.extend([len(simple_slots)] * len(ids))
+                simple_slots.append(slot)
+            else:
+                results[slot] = self._score_sequential(tokens)
+
+        if simple_slots:
+            ids = np.array(simple_ids, dtype=np.intp)
+            rows = np.array(simple_rows, dtype=np.intp)
+            size = len(simple_slots)
+            counts = np.bincount(rows, minlength=size)
+            divisor = np.maximum(counts, 1)
+            polarity = np.bincount(rows, weights=self.polarity[ids], minlength=size) / divisor
+            subjectivity = np.bincount(rows, weights=self.subjectivity[ids], minlength=size) / divisor
+            for slot, p, s in zip(simple_slots, polarity.tolist(), subjectivity.tolist()):
+                results[slot] = (p, s)
+
+        return results
+
+    def _score_sequential(self, tokens):
+        """Pattern's assessment rules for untagged words, one token at a time"""
+        index = self.index
+        negations = self.negations
+        assessments = []  # [polarity, subjectivity, intensity, negated]
+        modifier = None
+        negation = None
+        for word in tokens:
+            position = index.get(word)
+            if position is not None:
+                p, s, i = self._p[position], self._s[position], self._i[position]
+                if modifier is None:
+                    assessments.append([p, s, i, False])
+                else:
+                    last = assessments[-1]
+                    last[0] = max(-1.0, min(p * last[2], 1.0))
+                    last[1] = max(-1.0, min(s * last[2], 1.0))
+                    last[2] = i
+                if negation is not None:
+                    assessments[-1][2] = 1.0 / assessments[-1][2]
+                    assessments[-1][3] = True
+                modifier = word if self._m[position] else None
+                negation = word if word in negations else None
+            else:
+                if word in negations:
+                    negation = word
+                elif negation and len(word.strip("'")) > 1:
+                    negation = None
+                if negation is not None and modifier is not None and self.modifier(modifier):
+                    assessments[-1][3] = True
+                    negation = None
+                elif modifier and len(word) > 2:
+                    modifier = None
+                if word == '!' and assessments:
+                    assessments[-1][0] = max(-1.0, min(assessments[-1][0] * 1.25, 1.0))
+                elif word == '(!)':
+                    assessments.append([0.0, 1.0, 1.0, False])
+                elif word in self.emoticons:
+                    assessments.append([self.emoticons[word], 1.0, 1.0, False])
+
+        if not assessments:
+            return 0.0, 0.0
+        polarity = sum(a[0] * -0.5 if a[3] else a[0] for a in assessments)
+        subjectivity = sum(a[1] for a in assessments)
+        return polarity / len(assessments), subjectivity / len(assessments)
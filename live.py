@@ -0,0 +1,271 @@
+"""
+Server-sent events feed for the dashboard's push mode.
+
+Instead of every chart polling for a whole new figure, the browser keeps
+one ``EventSource`` open and receives only what changed since the
+snapshot it last saw: new or updated per-minute points, and the trend,
+bursting and recent-tweet lists only when they differ. ``LIVE_SCRIPT``
+applies the points with ``Plotly.extendTraces`` (updating in place the
+minute that is still filling up) and restyles the small bar charts.
+"""
+import json
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+from utils.helpers import to_epoch_ms
+
+# Minutes shown by the sentiment and volume charts, as in polling mode
+SENTIMENT_MINUTES = 60
+VOLUME_MINUTES = 30
+
+
+def minute_label(bucket_ms):
+    """Local-time x value of a per-minute bucket"""
+    return datetime.fromtimestamp(bucket_ms / 1000).strftime('%Y-%m-%d %H:%M')
+
+
+def polarity_color(mean):
+    return 'green' if mean > 0 else 'red' if mean < 0 else 'gray'
+
+
+def _window(minutes, length, now_ms):
+    since_ms = now_ms - length * 60 * 1000
+    since_ms -= since_ms % (60 * 1000)
+    return [row for row in minutes if row['bucket_ms'] >= since_ms]
+
+
+def _round(value):
+    return None if value is None else round(value, 4)
+
+
+def delta(old, new, now_ms=None):
+    """
+    Update bringing a client that shows snapshot data ``old`` to ``new``.
+    With ``old`` None it carries everything and has ``reset`` set.
+    """
+    now_ms = to_epoch_ms() if now_ms is None else now_ms
+    seen = {row['bucket_ms']: row for row in old['minutes']} if old else {}
+    changed = [row for row in new['minutes'] if seen.get(row['bucket_ms']) != row]
+    update = {
+        'reset': old is None,
+        'status': {'tweet_count': new['tweet_count'], 'refreshed_at': new['refreshed_at']},
+        'sentiment': [
+            [minute_label(row['bucket_ms']), _round(row['polarity_mean']),
+             _round(row['polarity_std']), row['tweet_count'], polarity_color(row['polarity_mean'])]
+            for row in _window(changed, SENTIMENT_MINUTES, now_ms)
+            if row['polarity_mean'] is not None
+        ],
+        'volume': [
+            [minute_label(row['bucket_ms']), row['tweet_count']]
+            for row in _window(changed, VOLUME_MINUTES, now_ms)
+        ],
+    }
+    if old is None or old['trends'] != new['trends']:
+        update['trends'] = [[topic, count] for topic, count in new['trends']]
+    if old is None or old['bursting'] != new['bursting']:
+        update['bursting'] = [[topic, _round(score), count] for topic, score, count in new['bursting']]
+    if old is None or old['recent_tweets'] != new['recent_tweets']:
+        update['tweets'] = [dict(tweet) for tweet in new['recent_tweets']]
+    return update
+
+
+class LiveFeed:
+    """Streams snapshot updates from a ``SnapshotCache`` as server-sent events.
+
+    Every client waits on the cache for the next published version and
+    is sent the delta from the version it has. Clients move in lockstep,
+    so each encoded delta is kept in a small table and built only once
+    per version. A client whose version has been evicted from the cache
+    (for instance after reconnecting late) gets a full reset instead.
+    """
+
+    def __init__(self, cache, keepalive=15.0, max_events=16):
+        self.cache = cache
+        self.keepalive = keepalive
+        self.max_events = max_events
+        self._events = OrderedDict()
+        self._lock = threading.Lock()
+        self.clients = 0
+        self.events_sent = 0
+        self.bytes_sent = 0
+
+    def event(self, snapshot, since=0):
+        """Encoded SSE message moving a client from version ``since`` to ``snapshot``"""
+        old = self.cache.get(since) if since else None
+        key = (since if old else 0, snapshot.version)
+        with self._lock:
+            message = self._events.get(key)
+        if message is None:
+            update = delta(old.data if old else None, snapshot.data)
+            update['version'] = snapshot.version
+            message = (f"id: {snapshot.version}\nevent: update\n"
+                       f"data: {json.dumps(update, separators=(',', ':'))}\n\n")
+            with self._lock:
+                self._events[key] = message
+                while len(self._events) > self.max_events:
+                    self._events.popitem(last=False)
+        return message
+
+    def stream(self, since=0):
+        """Generator of SSE messages for one client, starting after version ``since``"""
+        with self._lock:
+            self.clients += 1
+        try:
+            while True:
+                snapshot = self.cache.wait(since, self.keepalive)
+                if snapshot is None:
+                    # Comment line: keeps proxies from timing out, detects closed clients
+                    yield ': keepalive\n\n'
+                    continue
+                message = self.event(snapshot, since)
+                since = snapshot.version
+                with self._lock:
+                    self.events_sent += 1
+                    self.bytes_sent += len(message)
+                yield message
+        finally:
+            with self._lock:
+                self.clients -= 1
+
+    def stats(self):
+        return {
+            'clients': self.clients,
+            'events_sent': self.events_sent,
+            'bytes_sent': self.bytes_sent,
+        }
+
+
+# Browser side of the feed: applies each update to the already rendered
+# graphs without going through Dash callbacks
+LIVE_SCRIPT = r"""
+(function () {
+    var SENTIMENT_MINUTES = %(sentiment_minutes)d;
+    var VOLUME_MINUTES = %(volume_minutes)d;
+
+    function plot(id) {
+        var el = document.getElementById(id);
+        if (!el) return null;
+        return el.classList.contains('js-plotly-plot') ? el : el.querySelector('.js-plotly-plot');
+    }
+
+    function ready() {
+        return window.Plotly && ['sentiment-graph', 'trends-graph', 'burst-graph', 'volume-graph']
+            .every(function (id) { return plot(id) && plot(id).data; });
+    }
+
+    // Merge [x, ...values] points into trace 0: known minutes are updated
+    // in place, later ones appended with extendTraces
+    function mergePoints(gd, points, columns, maxPoints, reset) {
+        var trace = gd.data[0];
+        if (reset) {
+            var empty = {};
+            columns.forEach(function (path) { empty[path] = [[]]; });
+            Plotly.restyle(gd, empty, [0]);
+        }
+        var arrays = columns.map(function (path) {
+            return path.split('.').reduce(function (obj, key) { return obj[key]; }, trace);
+        });
+        var append = columns.map(function () { return []; });
+        var redraw = false;
+        points.forEach(function (point) {
+            var xs = arrays[0];
+            var index = xs.indexOf(point[0]);
+            if (index < 0 && xs.length && point[0] < xs[xs.length - 1]) {
+                // Late minute before the newest one shown: insert it in order
+                index = 0;
+                while (xs[index] < point[0]) index++;
+                arrays.forEach(function (array, i) { array.splice(index, 0, point[i]); });
+                redraw = true;
+            } else if (index >= 0) {
+                arrays.forEach(function (array, i) { array[index] = point[i]; });
+                redraw = true;
+            } else {
+                append.forEach(function (array, i) { array.push(point[i]); });
+            }
+        });
+        if (redraw) Plotly.redraw(gd);
+        if (append[0].length) {
+            var update = {};
+            columns.forEach(function (path, i) { update[path] = [append[i]]; });
+            Plotly.extendTraces(gd, update, [0], maxPoints);
+        }
+    }
+
+    function replaceBars(gd, rows, text) {
+        var update = {
+            x: [rows.map(function (row) { return row[1]; })],
+            y: [rows.map(function (row) { return row[0]; })]
+        };
+        if (text) update.text = [rows.map(function (row) { return row[2] + ' mentions'; })];
+        Plotly.restyle(gd, update, [0]);
+    }
+
+    function renderTweets(rows) {
+        var container = document.getElementById('recent-tweets-table');
+        container.textContent = '';
+        if (!rows.length) {
+            var empty = document.createElement('div');
+            empty.className = 'text-center text-muted my-4';
+            empty.textContent = 'No tweets available yet. Waiting for data...';
+            container.appendChild(empty);
+            return;
+        }
+        var columns = ['text', 'user', 'sentiment', 'timestamp'];
+        var table = document.createElement('table');
+        table.className = 'table table-striped table-bordered table-hover';
+        var head = table.createTHead().insertRow();
+        columns.forEach(function (column) {
+            var th = document.createElement('th');
+            th.textContent = column;
+            head.appendChild(th);
+        });
+        var body = table.createTBody();
+        rows.forEach(function (row) {
+            var tr = body.insertRow();
+            columns.forEach(function (column) { tr.insertCell().textContent = row[column]; });
+        });
+        var wrapper = document.createElement('div');
+        wrapper.className = 'table-responsive';
+        wrapper.appendChild(table);
+        container.appendChild(wrapper);
+    }
+
+    function apply(update) {
+        var status = update.status;
+        var connected = status.tweet_count > 0;
+        document.getElementById('stream-status').textContent = connected
+            ? 'Twitter Stream Status: Connected (Twitter API Error - Using Sample Data)'
+            : 'Twitter Stream Status: Waiting for data...';
+        document.getElementById('last-update-time').textContent = connected
+            ? 'Last Updated: ' + status.refreshed_at : 'Last Updated: Never';
+
+        mergePoints(plot('sentiment-graph'), update.sentiment,
+                    ['x', 'y', 'error_y.array', 'customdata', 'marker.color'],
+                    SENTIMENT_MINUTES, update.reset);
+        mergePoints(plot('volume-graph'), update.volume, ['x', 'y'], VOLUME_MINUTES, update.reset);
+        if (update.trends) replaceBars(plot('trends-graph'), update.trends, false);
+        if (update.bursting) replaceBars(plot('burst-graph'), update.bursting, true);
+        if (update.tweets) renderTweets(update.tweets);
+    }
+
+    function connect() {
+        if (!ready()) {
+            setTimeout(connect, 250);
+            return;
+        }
+        // The browser reconnects on its own, sending the last event id,
+        // so the server can resume with a delta
+        var source = new EventSource('%(stream_path)s');
+        source.addEventListener('update', function (event) {
+            try {
+                apply(JSON.parse(event.data));
+            } catch (e) {
+                console.error('Error applying live update', e);
+            }
+        });
+    }
+
+    connect();
+})();
+"""
@@ -0,0 +1,377 @@
+"""
+Deterministic synthetic load and NDJSON replay for the ingestion pipeline.
+
+``SyntheticTweets`` draws words, hashtags, mentions and users from
+Zipf-distributed vocabularies with a seeded RNG, so the same seed always
+produces the same tweets. An arrival schedule pairs each tweet with the
+second (from the start of the run) it is due:
+
+- ``synthetic_arrivals`` follows a rate profile such as ``constant``,
+  ``burst`` or ``ramp`` (see ``parse_profile``);
+- ``replay_arrivals`` keeps the recorded spacing of an NDJSON file (as
+  written by ``storage.export`` or the ingest spill file), ``speed``
+  times faster.
+
+``LoadGenerator`` feeds a schedule into a sink such as
+``IngestQueue.put``. Open-loop mode sends every tweet when it is due
+regardless of how the pipeline keeps up; max-throughput mode ignores the
+schedule and sends as fast as the sink accepts. Every tweet is stamped
+with the time it was due, so ``LatencyRecorder`` measures end-to-end
+latency from then, including any time the generator itself fell behind.
+
+Load-test the pipeline with:
+
+    python -m ingestion.loadgen --profile burst:200:2000:30:5 --duration 60
+"""
+import argparse
+import bisect
+import itertools
+import json
+import random
+import tempfile
+import threading
+import time
+import os
+from datetime import datetime
+
+# Real words mixed into the synthetic vocabulary so sentiment and phrase
+# analysis have something to find
+TOPIC_WORDS = """
+python data science machine learning ai model neural network deep training cloud
+analytics pipeline dashboard stream api code release open source research paper
+startup product launch team conference talk tutorial benchmark gpu chip robot
+""".split()
+SENTIMENT_WORDS = """
+great amazing awesome excellent love happy best wonderful brilliant impressive
+good nice fun useful bad terrible awful worst hate sad broken slow disappointing
+boring poor annoying wrong not very really so never
+""".split()
+
+
+class Zipf:
+    """Seeded sampler of ``items`` where the k-th is picked with weight 1/k^s"""
+
+    def __init__(self, items, s=1.1, rng=None):
+        self.items = list(items)
+        self.rng = rng or random.Random()
+        self.cum_weights = list(itertools.accumulate(1.0 / (k ** s) for k in range(1, len(self.items) + 1)))
+        self.total = self.cum_weights[-1]
+
+    def sample(self, k=1):
+        return self.rng.choices(self.items, cum_weights=self.cum_weights, k=k)
+
+    def one(self):
+        return self.items[bisect.bisect(self.cum_weights, self.rng.random() * self.total)]
+
+
+class SyntheticTweets:
+    """Endless iterator of reproducible synthetic tweet dicts.
+
+    Text is ``words`` Zipf-distributed words (real topic and sentiment
+    words spread through a synthetic vocabulary), plus up to
+    ``max_hashtags`` hashtags and an occasional mention, each from its
+    own Zipf distribution. A ``retweet_rate`` share of tweets are
+    instead retweets ("RT @user: text") of one of the last
+    ``retweet_pool`` original tweets, the pool's slots again Zipf-popular.
+    """
+
+    def __init__(self, seed=0, vocabulary=20000, hashtags=2000, users=50000, s=1.1,
+                 words=(6, 18), max_hashtags=3, mention_rate=0.3, retweet_rate=0.0, retweet_pool=1000):
+        self.rng = random.Random(seed)
+        vocab = [f"w{i}" for i in range(vocabulary - len(TOPIC_WORDS) - len(SENTIMENT_WORDS))]
+        for word in TOPIC_WORDS + SENTIMENT_WORDS:
+            vocab.insert(self.rng.randrange(min(len(vocab), 500)), word)
+        self.words = Zipf(vocab, s, self.rng)
+        self.hashtags = Zipf([f"tag{i}" for i in range(hashtags)], s, self.rng)
+        self.users = Zipf([f"user{i}" for i in range(users)], s, self.rng)
+        self.min_words, self.max_words = words
+        self.max_hashtags = max_hashtags
+        self.mention_rate = mention_rate
+        self.retweet_rate = retweet_rate
+        self.originals = []
+        self.retweet_slots = Zipf(range(retweet_pool), s, self.rng)
+        self._next_slot = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        rng = self.rng
+        if self.retweet_rate and self.originals and rng.random() < self.retweet_rate:
+            user, text = self.originals[self.retweet_slots.one() % len(self.originals)]
+            return {
+                'text': f"RT @{user}: {text}",
+                'user': self.users.one(),
+                'retweet_count': 0,
+                'favorite_count': 0,
+            }
+        parts = self.words.sample(rng.randint(self.min_words, self.max_words))
+        parts.extend('#' + tag for tag in self.hashtags.sample(rng.randint(0, self.max_hashtags)))
+        if rng.random() < self.mention_rate:
+            parts.append('@' + self.users.one())
+        tweet = {
+            'text': ' '.join(parts),
+            'user': self.users.one(),
+            'retweet_count': int(rng.paretovariate(1.5)) - 1,
+            'favorite_count': int(rng.paretovariate(1.2)) - 1,
+        }
+        if self.retweet_rate:
+            # Ring buffer of recent originals
+            if len(self.originals) < len(self.retweet_slots.items):
+                self.originals.append((tweet['user'], tweet['text']))
+            else:
+                self.originals[self._next_slot] = (tweet['user'], tweet['text'])
+                self._next_slot = (self._next_slot + 1) % len(self.originals)
+        return tweet
+
+
+def constant(tps):
+    """Rate profile: ``tps`` tweets per second throughout"""
+    return lambda t: tps
+
+
+def burst(base_tps, peak_tps, every, length):
+    """Rate profile: ``base_tps``, rising to ``peak_tps`` for ``length`` seconds every ``every`` seconds"""
+    return lambda t: peak_tps if t % every >= every - length else base_tps
+
+
+def ramp(start_tps, end_tps, over):
+    """Rate profile: linear from ``start_tps`` to ``end_tps`` over ``over`` seconds, then flat"""
+    return lambda t: start_tps + (end_tps - start_tps) * min(t / over, 1.0)
+
+
+PROFILES = {'constant': constant, 'burst': burst, 'ramp': ramp}
+
+
+def parse_profile(spec):
+    """Rate profile from text such as 'constant:500', 'burst:200:2000:60:5' or 'ramp:10:1000:120'"""
+    name, *args = spec.split(':')
+    if name not in PROFILES:
+        raise ValueError(f"Unknown rate profile: {name}")
+    return PROFILES[name](*(float(arg) for arg in args))
+
+
+def synthetic_arrivals(tweets, profile):
+    """(due second, tweet) pairs for ``tweets`` arriving at ``profile(t)`` per second"""
+    t = 0.0
+    for tweet in tweets:
+        rate = profile(t)
+        if rate <= 0:
+            # Idle: look again a little later
+            t += 0.1
+            continue
+        yield t, tweet
+        t += 1.0 / rate
+
+
+def replay_arrivals(path, speed=1.0):
+    """
+    (due second, tweet) pairs replaying an NDJSON file ``speed`` times
+    faster than recorded; with ``speed`` 0 every tweet is due at once.
+    Spill-file lines ([timestamp, tweet] pairs) are accepted too.
+    """
+    first = None
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if isinstance(record, list):
+                stamp, tweet = record
+            else:
+                tweet = record
+                stamp = record.get('timestamp_ms')
+                stamp = stamp / 1000 if stamp is not None else _epoch(record.get('timestamp'))
+            if first is None:
+                first = stamp
+            due = (stamp - first) / speed if speed and stamp is not None else 0.0
+            yield max(due, 0.0), {
+                'text': tweet.get('text', ''),
+                'user': tweet.get('user', 'unknown'),
+                'retweet_count': tweet.get('retweet_count', 0),
+                'favorite_count': tweet.get('favorite_count', 0),
+            }
+
+
+def _epoch(timestamp):
+    if timestamp is None:
+        return None
+    return datetime.fromisoformat(timestamp).timestamp()
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+class LatencyRecorder:
+    """Collects end-to-end latency of processed tweets stamped by LoadGenerator"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = []
+
+    def __call__(self, tweets):
+        now = time.time()
+        latencies = [now - tweet['due_at'] for tweet in tweets if 'due_at' in tweet]
+        with self._lock:
+            self.latencies.extend(latencies)
+
+    def __len__(self):
+        return len(self.latencies)
+
+    def summary(self):
+        with self._lock:
+            values = sorted(self.latencies)
+        summary = {f"p{pct:g}": percentile(values, pct) for pct in (50, 90, 99, 99.9)}
+        summary['max'] = values[-1] if values else 0.0
+        summary['count'] = len(values)
+        return summary
+
+
+class LoadGenerator:
+    """Sends a tweet arrival schedule into a sink, open-loop or at maximum throughput.
+
+    ``sink(tweet)`` returns False when it rejects a tweet (a full or
+    closed IngestQueue). Stops after ``duration`` seconds, ``limit``
+    tweets, the end of the schedule or ``stop()``.
+    """
+
+    MODES = ('open', 'max')
+
+    def __init__(self, arrivals, mode='open', duration=None, limit=None):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown load mode: {mode}")
+        self.arrivals = arrivals
+        self.mode = mode
+        self.duration = duration
+        self.limit = limit
+        self.sent = 0
+        self.rejected = 0
+        self.max_behind = 0.0
+        self.started = None
+        self.finished = None
+        self._stop = threading.Event()
+
+    def run(self, sink):
+        """Send until done; returns the number of tweets accepted"""
+        self.started = time.time()
+        start = time.perf_counter()
+        open_loop = self.mode == 'open'
+        for due, tweet in self.arrivals:
+            if self._stop.is_set() or (self.limit is not None and self.sent + self.rejected >= self.limit):
+                break
+            if self.duration is not None and (due if open_loop else time.perf_counter() - start) >= self.duration:
+                break
+            if open_loop:
+                wait = due - (time.perf_counter() - start)
+                if wait > 0:
+                    if self._stop.wait(wait):
+                        break
+                else:
+                    self.max_behind = max(self.max_behind, -wait)
+                tweet['due_at'] = self.started + due
+            else:
+                tweet['due_at'] = time.time()
+            tweet['timestamp'] = datetime.now().isoformat()
+            try:
+                accepted = sink(tweet)
+            except Exception as e:
+                print(f"Error sending generated tweet: {e}")
+                accepted = False
+            if accepted is False:
+                self.rejected += 1
+            else:
+                self.sent += 1
+        self.finished = time.time()
+        return self.sent
+
+    def stop(self):
+        self._stop.set()
+
+    def report(self):
+        elapsed = (self.finished or time.time()) - (self.started or time.time())
+        return {
+            'mode': self.mode,
+            'sent': self.sent,
+            'rejected': self.rejected,
+            'elapsed': elapsed,
+            'offered_tps': self.sent / elapsed if elapsed else 0.0,
+            'max_behind': self.max_behind,
+        }
+
+
+def main(argv=None):
+    from ingestion.buffer import IngestQueue
+    from ingestion.stream_listener import StreamListener
+    from processing.analyzer import Analyzer
+    from processing.workers import AnalysisPool
+    from storage.database import Database
+
+    parser = argparse.ArgumentParser(description="Drive the ingestion pipeline with synthetic or replayed load")
+    parser.add_argument('--profile', default='constant:1000',
+                        help="rate profile, e.g. constant:1000, burst:200:2000:30:5, ramp:10:5000:60")
+    parser.add_argument('--mode', choices=LoadGenerator.MODES, default='open')
+    parser.add_argument('--duration', type=float, default=30.0)
+    parser.add_argument('--limit', type=int, default=None, help="stop after this many tweets")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--retweet-rate', type=float, default=0.0, help="share of synthetic tweets that are retweets")
+    parser.add_argument('--replay', help="NDJSON file to replay instead of synthetic tweets")
+    parser.add_argument('--speed', type=float, default=1.0, help="replay speed-up (0: as fast as possible)")
+    parser.add_argument('--db', help="database to write to (default: a scratch file)")
+    parser.add_argument('--workers', type=int, default=0, help="analysis worker processes")
+    parser.add_argument('--consumers', type=int, default=1)
+    parser.add_argument('--batch-size', type=int, default=256)
+    parser.add_argument('--queue-size', type=int, default=10000)
+    parser.add_argument('--policy', default='block', choices=('block', 'drop_oldest', 'spill'))
+    args = parser.parse_args(argv)
+
+    if args.replay:
+        arrivals = replay_arrivals(args.replay, args.speed)
+    else:
+        arrivals = synthetic_arrivals(SyntheticTweets(args.seed, retweet_rate=args.retweet_rate),
+                                      parse_profile(args.profile))
+
+    scratch = None
+    if args.db is None:
+        scratch = tempfile.TemporaryDirectory()
+        args.db = os.path.join(scratch.name, 'loadgen.db')
+    analyzer = Analyzer()
+    latency = LatencyRecorder()
+    listener = StreamListener(
+        analyzer=analyzer,
+        database=Database(args.db),
+        pool=AnalysisPool(analyzer, workers=args.workers) if args.workers else None,
+        queue=IngestQueue(maxsize=args.queue_size, policy=args.policy,
+                          spill_path=os.path.join(os.path.dirname(args.db) or '.', 'loadgen_spill.ndjson')),
+        consumers=args.consumers,
+        batch_size=args.batch_size,
+        load_generator=LoadGenerator(arrivals, args.mode, args.duration, args.limit),
+        on_processed=latency
+    )
+    listener.start()
+    generator = listener.load_generator
+    listener.sample_thread.join()
+    queue_metrics = listener.queue.metrics()
+    listener.stop()
+
+    report = generator.report()
+    elapsed = time.time() - generator.started
+    print(f"sent {report['sent']} tweets in {report['elapsed']:.1f} s ({report['offered_tps']:,.0f}/s offered, "
+          f"{report['rejected']} rejected, up to {report['max_behind'] * 1000:.0f} ms behind schedule)")
+    summary = latency.summary()
+    print(f"processed {summary['count']} in {elapsed:.1f} s ({summary['count'] / elapsed:,.0f}/s); "
+          f"end-to-end latency p50 {summary['p50'] * 1000:.1f} ms, p90 {summary['p90'] * 1000:.1f} ms, "
+          f"p99 {summary['p99'] * 1000:.1f} ms, max {summary['max'] * 1000:.1f} ms")
+    print(f"queue: max lag {queue_metrics['max_lag'] * 1000:.1f} ms, dropped {queue_metrics['dropped']}, "
+          f"spilled {queue_metrics['spilled']}, block timeouts {queue_metrics['block_timeouts']}")
+    if scratch is not None:
+        scratch.cleanup()
+    return report, summary
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,269 @@
+"""
+Low-overhead pipeline metrics exposed in the Prometheus text format.
+
+Histograms record durations in fixed log-linear buckets, HDR style:
+four sub-buckets per power of two of microseconds, so a recording is a
+``bit_length`` and an increment and any quantile is within about 20% of
+the true value. The exported ``le`` buckets are the powers of two from
+1 µs to about a minute. Counters only go up; gauges hold a set value or
+read one from a callback when scraped.
+
+Hot paths fetch their metric once at import and call ``observe`` with a
+``time.perf_counter`` difference:
+
+    STORE_TIME = metrics.stage_timer('store')
+    ...
+    start = time.perf_counter()
+    store(rows)
+    STORE_TIME.observe(time.perf_counter() - start)
+
+``REGISTRY.enabled = False`` turns every recording into a no-op.
+"""
+import threading
+import time
+
+# Internal buckets: values below 4 µs get one each, then 4 per power of two
+SUB_BUCKETS = 4
+MAX_POWER = 36  # about 19 hours
+BUCKET_COUNT = SUB_BUCKETS * MAX_POWER
+EXPORT_POWERS = range(0, 27)  # le = 1 µs ... 67 s
+
+
+def _bucket(value_us):
+    if value_us < SUB_BUCKETS:
+        return max(value_us, 0)
+    shift = value_us.bit_length() - 3
+    return min((shift + 1) * SUB_BUCKETS + (value_us >> shift) - SUB_BUCKETS, BUCKET_COUNT - 1)
+
+
+def _upper_us(index):
+    """Exclusive upper bound of an internal bucket in microseconds"""
+    if index < SUB_BUCKETS:
+        return index + 1
+    shift = index // SUB_BUCKETS - 1
+    return (index % SUB_BUCKETS + SUB_BUCKETS + 1) << shift
+
+
+def _format_labels(labels, extra=None):
+    items = list(labels)
+    if extra:
+        items.append(extra)
+    if not items:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in items) + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
+
+
+class Counter:
+    """Monotonically increasing count"""
+
+    kind = 'counter'
+
+    def __init__(self, registry):
+        self.registry = registry
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        if self.registry.enabled:
+            with self._lock:
+                self.value += amount
+
+    def samples(self, name, labels):
+        yield name, _format_labels(labels), self.value
+
+
+class Gauge:
+    """Current value, either set or read from ``fn()`` at scrape time"""
+
+    kind = 'gauge'
+
+    def __init__(self, registry, fn=None):
+        self.registry = registry
+        self.fn = fn
+        self.value = 0
+
+    def set(self, value):
+        self.value = value
+
+    def get(self):
+        if self.fn is None:
+            return self.value
+        try:
+            return self.fn()
+        except Exception:
+            return float('nan')
+
+    def samples(self, name, labels):
+        yield name, _format_labels(labels), self.get()
+
+
+class Histogram:
+    """Distribution of durations in seconds, in HDR-style log-linear buckets"""
+
+    kind = 'histogram'
+
+    def __init__(self, registry):
+        self.registry = registry
+        self.counts = [0] * BUCKET_COUNT
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        if not self.registry.enabled:
+            return
+        # _bucket inlined; this is on the hot path
+        value_us = int(seconds * 1000000)
+        if value_us < SUB_BUCKETS:
+            index = max(value_us, 0)
+        else:
+            shift = value_us.bit_length() - 3
+            index = min((shift + 1) * SUB_BUCKETS + (value_us >> shift) - SUB_BUCKETS, BUCKET_COUNT - 1)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += seconds
+
+    def time(self):
+        """Context manager observing the duration of its block"""
+        return _Timer(self)
+
+    def quantile(self, q):
+        """Upper bound in seconds of the bucket holding quantile ``q`` (0-1)"""
+        with self._lock:
+            counts = list(self.counts)
+            total = self.count
+        if not total:
+            return 0.0
+        rank = q * total
+        seen = 0
+        for index, count in enumerate(counts):
+            seen += count
+            if count and seen >= rank:
+                return _upper_us(index) / 1000000
+        return _upper_us(BUCKET_COUNT - 1) / 1000000
+
+    def stats(self):
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'p50': self.quantile(0.5),
+            'p99': self.quantile(0.99),
+        }
+
+    def samples(self, name, labels):
+        with self._lock:
+            counts = list(self.counts)
+            total = self.count
+            total_sum = self.sum
+        cumulative = 0
+        index = 0
+        for power in EXPORT_POWERS:
+            bound = 1 << power
+            while index < BUCKET_COUNT and _upper_us(index) <= bound:
+                cumulative += counts[index]
+                index += 1
+            yield f'{name}_bucket', _format_labels(labels, ('le', repr(bound / 1000000))), cumulative
+        yield f'{name}_bucket', _format_labels(labels, ('le', '+Inf')), total
+        yield f'{name}_sum', _format_labels(labels), total_sum
+        yield f'{name}_count', _format_labels(labels), total
+
+
+class _Timer:
+    __slots__ = ('histogram', 'start')
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start)
+
+
+class Registry:
+    """Named metric families, each with one child per label set"""
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._families = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, help_text, labels, **kwargs):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            family = self._families.get(name)
+            if family is None:
+                family = self._families[name] = (cls, help_text, {})
+            elif family[0] is not cls:
+                raise ValueError(f"Metric {name} is already registered as a {family[0].kind}")
+            children = family[2]
+            metric = children.get(key)
+            if metric is None:
+                metric = children[key] = cls(self, **kwargs)
+            return metric
+
+    def counter(self, name, help_text='', **labels):
+        return self._get(Counter, name, help_text, labels)
+
+    def histogram(self, name, help_text='', **labels):
+        return self._get(Histogram, name, help_text, labels)
+
+    def gauge(self, name, help_text='', fn=None, **labels):
+        """Gauge for ``labels``; a new ``fn`` replaces the previous one"""
+        gauge = self._get(Gauge, name, help_text, labels)
+        if fn is not None:
+            gauge.fn = fn
+        return gauge
+
+    def render(self):
+        """Every metric in the Prometheus text exposition format"""
+        with self._lock:
+            families = [(name, cls, help_text, list(children.items()))
+                        for name, (cls, help_text, children) in sorted(self._families.items())]
+        lines = []
+        for name, cls, help_text, children in families:
+            if help_text:
+                lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {cls.kind}')
+            for labels, metric in children:
+                for sample_name, label_text, value in metric.samples(name, labels):
+                    lines.append(f'{sample_name}{label_text} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+REGISTRY = Registry()
+counter = REGISTRY.counter
+histogram = REGISTRY.histogram
+gauge = REGISTRY.gauge
+render = REGISTRY.render
+
+# Shared by the instrumented modules
+STAGE_SECONDS = 'pipeline_stage_seconds'
+STAGE_HELP = 'Time spent in each pipeline stage per call'
+ERRORS = 'pipeline_errors_total'
+ERRORS_HELP = 'Errors caught by each pipeline stage'
+
+
+def stage_timer(stage):
+    return histogram(STAGE_SECONDS, STAGE_HELP, stage=stage)
+
+
+def error_counter(stage):
+    return counter(ERRORS, ERRORS_HELP, stage=stage)
@@ -0,0 +1,238 @@
+"""
+Versioned schema migrations for the tweets database.
+
+Schema changes are tracked with ``PRAGMA user_version`` and applied when a
+``Database`` is opened. Changes that have to rewrite existing rows register
+a backfill job instead of doing the work inline; jobs are processed in
+small ``id``-range chunks, each in its own short transaction, so ingestion
+keeps running while an old database file is upgraded.
+
+Run the pending backfills of a database to completion with:
+
+    python -m storage.migrations src/default.db
+"""
+import sys
+import time
+import threading
+import logging
+from storage import rollups
+from utils.helpers import to_epoch_ms
+
+logger = logging.getLogger(__name__)
+
+
+def _typed_sentiment(conn):
+    """Typed sentiment columns and a normalized hashtag/mention table"""
+    columns = {row[1] for row in conn.execute('PRAGMA table_info(tweets)')}
+    for name, column_type in (('polarity', 'REAL'),
+                              ('subjectivity', 'REAL'),
+                              ('sentiment_label', 'TEXT')):
+        if name not in columns:
+            conn.execute(f'ALTER TABLE tweets ADD COLUMN {name} {column_type}')
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS tweet_terms (
+            tweet_id INTEGER NOT NULL,
+            term TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            PRIMARY KEY (tweet_id, kind, term)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_tweet_terms_term ON tweet_terms(kind, term)')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_timestamp_sentiment
+        ON tweets(timestamp, sentiment_label, polarity)
+    ''')
+    _register_backfill(conn, 'typed_sentiment')
+
+
+def _backfill_typed_sentiment(conn, first_id, last_id):
+    conn.execute('''
+        UPDATE tweets SET
+            polarity = json_extract(sentiment, '$.polarity'),
+            subjectivity = json_extract(sentiment, '$.subjectivity'),
+            sentiment_label = json_extract(sentiment, '$.sentiment')
+        WHERE id BETWEEN ? AND ?
+          AND sentiment_label IS NULL
+          AND json_valid(sentiment)
+    ''', (first_id, last_id))
+    for kind, path in (('hashtag', '$.hashtags'), ('mention', '$.mentions')):
+        conn.execute(f'''
+            INSERT OR IGNORE INTO tweet_terms (tweet_id, term, kind)
+            SELECT tweets.id, terms.value, '{kind}'
+            FROM tweets, json_each(tweets.trends, '{path}') AS terms
+            WHERE tweets.id BETWEEN ? AND ?
+              AND json_valid(tweets.trends)
+        ''', (first_id, last_id))
+
+
+def _epoch_timestamps(conn):
+    """Integer epoch-millisecond timestamps with a covering time index"""
+    columns = {row[1] for row in conn.execute('PRAGMA table_info(tweets)')}
+    if 'timestamp_ms' not in columns:
+        conn.execute('ALTER TABLE tweets ADD COLUMN timestamp_ms INTEGER')
+
+    # Text timestamps are only kept for display; nothing filters on them now
+    conn.execute('DROP INDEX IF EXISTS idx_timestamp')
+    conn.execute('DROP INDEX IF EXISTS idx_timestamp_sentiment')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_timestamp_ms
+        ON tweets(timestamp_ms, sentiment_label, polarity)
+    ''')
+    _register_backfill(conn, 'epoch_timestamps')
+
+
+def _text_to_epoch_ms(timestamp):
+    """``to_epoch_ms`` for SQL: NULL for missing or unparseable text"""
+    if not isinstance(timestamp, str):
+        return None
+    try:
+        return to_epoch_ms(timestamp)
+    except ValueError:
+        return None
+
+
+def _backfill_epoch_timestamps(conn, first_id, last_id):
+    # The same conversion (and rounding) as rows written since
+    conn.create_function('to_epoch_ms', 1, _text_to_epoch_ms, deterministic=True)
+    conn.execute('''
+        UPDATE tweets
+        SET timestamp_ms = to_epoch_ms(timestamp)
+        WHERE id BETWEEN ? AND ?
+          AND timestamp_ms IS NULL
+    ''', (first_id, last_id))
+
+
+def _rollup_tables(conn):
+    """Per-minute, per-hour and per-day rollups of counts, sentiment and terms"""
+    rollups.create_tables(conn)
+    _register_backfill(conn, 'rollups')
+
+
+def _export_index(conn):
+    """(timestamp_ms, id) index for keyset-paginated exports"""
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_timestamp_ms_id ON tweets(timestamp_ms, id)')
+
+
+# (version, schema change) in the order they are applied
+MIGRATIONS = [
+    (1, _typed_sentiment),
+    (2, _epoch_timestamps),
+    (3, _rollup_tables),
+    (4, _export_index),
+]
+
+# backfill job name -> function(conn, first_id, last_id), in the order
+# they run; later jobs may read columns earlier ones fill in
+BACKFILLS = {
+    'typed_sentiment': _backfill_typed_sentiment,
+    'epoch_timestamps': _backfill_epoch_timestamps,
+    'rollups': rollups.backfill,
+}
+
+
+def _register_backfill(conn, name):
+    """Queue a backfill over every row that exists when the schema changes"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS migration_backfills (
+            name TEXT PRIMARY KEY,
+            next_id INTEGER NOT NULL,
+            last_id INTEGER NOT NULL
+        )
+    ''')
+    first_id, last_id = conn.execute('SELECT MIN(id), MAX(id) FROM tweets').fetchone()
+    if last_id is not None:
+        conn.execute(
+            'INSERT OR REPLACE INTO migration_backfills (name, next_id, last_id) VALUES (?, ?, ?)',
+            (name, first_id, last_id)
+        )
+
+
+def migrate(conn):
+    """Apply pending schema migrations; returns the resulting schema version"""
+    version = conn.execute('PRAGMA user_version').fetchone()[0]
+    for target, step in MIGRATIONS:
+        if target <= version:
+            continue
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            step(conn)
+            conn.execute(f'PRAGMA user_version = {target}')
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        logger.info(f"Applied schema migration {target}: {step.__doc__}")
+        version = target
+    return version
+
+
+def pending_backfills(conn):
+    """Names of backfill jobs that still have rows to process"""
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'migration_backfills'"
+    ).fetchone()
+    if not exists:
+        return []
+    names = [row[0] for row in conn.execute('SELECT name FROM migration_backfills')]
+    order = list(BACKFILLS)
+    return sorted(names, key=order.index)
+
+
+def run_backfills(conn, chunk_size=5000, pause=0.01):
+    """Process pending backfill jobs in id-range chunks; returns rows scanned"""
+    scanned = 0
+    for name in pending_backfills(conn):
+        backfill = BACKFILLS[name]
+        while True:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                next_id, last_id = conn.execute(
+                    'SELECT next_id, last_id FROM migration_backfills WHERE name = ?', (name,)
+                ).fetchone()
+                chunk_end = min(next_id + chunk_size - 1, last_id)
+                backfill(conn, next_id, chunk_end)
+                if chunk_end >= last_id:
+                    conn.execute('DELETE FROM migration_backfills WHERE name = ?', (name,))
+                else:
+                    conn.execute('UPDATE migration_backfills SET next_id = ? WHERE name = ?',
+                                 (chunk_end + 1, name))
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            scanned += chunk_end - next_id + 1
+            if chunk_end >= last_id:
+                logger.info(f"Backfill {name} complete")
+                break
+            # Give the ingestion writer a chance to take the lock
+            time.sleep(pause)
+    return scanned
+
+
+def start_backfill(pool, chunk_size=5000, pause=0.01):
+    """Run pending backfills on a background thread, if there are any"""
+    if not pending_backfills(pool.writer()):
+        return None
+
+    def worker():
+        try:
+            run_backfills(pool.writer(), chunk_size=chunk_size, pause=pause)
+        except Exception as e:
+            logger.error(f"Error running schema backfill: {e}")
+        finally:
+            pool.close_thread()
+
+    thread = threading.Thread(target=worker, name='schema-backfill')
+    thread.daemon = True
+    thread.start()
+    return thread
+
+
+if __name__ == '__main__':
+    from storage.connection import get_pool
+
+    logging.basicConfig(level=logging.INFO)
+    db_conn = get_pool(sys.argv[1] if len(sys.argv) > 1 else 'src/default.db').writer()
+    print(f"Schema version: {migrate(db_conn)}")
+    print(f"Rows backfilled: {run_backfills(db_conn, pause=0)}")
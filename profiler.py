@@ -0,0 +1,201 @@
+"""
+On-demand sampling profiler for the running pipeline.
+
+A background thread wakes every ``interval`` seconds, reads every other
+thread's current stack from ``sys._current_frames()`` and counts each
+distinct stack. Nothing is traced or instrumented and no thread is
+stopped; the sampled threads only lose the GIL for the few microseconds
+a stack walk takes. After ``seconds`` the counts are written in the
+collapsed-stack format (``thread;outer;...;inner count`` per line), which
+flamegraph.pl, speedscope and inferno render as flame graphs.
+
+Start a 30 second profile of a running app with ``kill -USR1 <pid>`` or,
+when ``ADMIN_TOKEN`` is set, ``curl -X POST -H 'X-Admin-Token: <token>'
+'localhost:5000/admin/profile?seconds=30'`` (1 to 300 seconds).
+"""
+import fnmatch
+import logging
+import os
+import re
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from utils.helpers import ensure_directory_exists
+
+logger = logging.getLogger(__name__)
+
+
+class SamplingProfiler:
+    """Samples thread stacks for a while and writes them as collapsed stacks.
+
+    Only one profile runs at a time. ``threads`` limits sampling to
+    threads whose names match one of the glob patterns (default: all).
+    """
+
+    def __init__(self, output_dir='src/storage/data/profiles', interval=0.01, threads=None):
+        self.output_dir = output_dir
+        self.interval = interval
+        self.threads = threads
+        self.last_result = None
+        self.started = None
+        self.seconds = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self._labels = {}
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, seconds=30, interval=None, threads=None):
+        """Start profiling in the background; returns False if a profile is already running"""
+        with self._lock:
+            if self.running:
+                return False
+            self.started = time.time()
+            self.seconds = seconds
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run,
+                args=(seconds, interval or self.interval, threads or self.threads),
+                name='sampling-profiler'
+            )
+            self._thread.daemon = True
+            self._thread.start()
+        logger.info(f"Profiling for {seconds} s")
+        return True
+
+    def stop(self, timeout=None):
+        """End the running profile early; its samples are still written"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def status(self):
+        return {
+            'running': self.running,
+            'started': self.started,
+            'seconds': self.seconds,
+            'last_result': self.last_result,
+        }
+
+    def sample(self, seconds, interval=None, threads=None):
+        """Profile on the calling thread; returns (collapsed stack counts, samples taken)"""
+        interval = interval or self.interval
+        patterns = threads or self.threads
+        own = threading.get_ident()
+        counts = Counter()
+        names = {}
+        deadline = time.perf_counter() + seconds
+        next_sample = time.perf_counter()
+        samples = 0
+        while not self._stop.is_set():
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            frames = sys._current_frames()
+            if not frames.keys() <= names.keys():
+                names = {thread.ident: self._thread_name(thread.name) for thread in threading.enumerate()}
+            for ident, frame in frames.items():
+                if ident == own:
+                    continue
+                name = names.get(ident, f'thread-{ident}')
+                if patterns and not any(fnmatch.fnmatch(name, pattern) for pattern in patterns):
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(self._label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(name)
+                counts[';'.join(reversed(stack))] += 1
+            # Don't keep other threads' frames alive between samples
+            frames = frame = None
+            samples += 1
+            next_sample += interval
+            delay = next_sample - time.perf_counter()
+            if delay > 0:
+                self._stop.wait(delay)
+            else:
+                # Fell behind; skip the missed ticks rather than bursting
+                next_sample = time.perf_counter()
+        return counts, samples
+
+    def write(self, counts, path):
+        """Write collapsed stacks, most frequent first"""
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in counts.most_common():
+                f.write(f"{stack} {count}\n")
+
+    @staticmethod
+    def summarize(counts, limit=15):
+        """Samples per thread and the functions most often on top of a stack"""
+        threads = Counter()
+        leaves = Counter()
+        for stack, count in counts.items():
+            frames = stack.split(';')
+            threads[frames[0]] += count
+            leaves[frames[-1]] += count
+        return {
+            'threads': dict(threads.most_common()),
+            'top_frames': leaves.most_common(limit),
+        }
+
+    def _run(self, seconds, interval, threads):
+        try:
+            start = time.perf_counter()
+            counts, samples = self.sample(seconds, interval, threads)
+            elapsed = time.perf_counter() - start
+            ensure_directory_exists(self.output_dir)
+            path = os.path.join(self.output_dir, datetime.now().strftime('profile-%Y%m%d-%H%M%S.collapsed'))
+            self.write(counts, path)
+            self.last_result = dict(
+                self.summarize(counts),
+                path=path,
+                samples=samples,
+                elapsed=elapsed,
+                interval=interval,
+            )
+            logger.info(f"Profile of {samples} samples over {elapsed:.1f} s written to {path}")
+        except Exception as e:
+            logger.error(f"Error while profiling: {e}")
+
+    def _label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            name = getattr(code, 'co_qualname', code.co_name)
+            label = f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(';', ':')
+            self._labels[code] = label
+        return label
+
+    @staticmethod
+    def _thread_name(name):
+        # Merge short-lived request threads: "Thread-12 (process_request_thread)"
+        return re.sub(r'^Thread-\d+', 'Thread', name).replace(';', ':')
+
+
+def install_signal_handler(profiler, seconds=30, signum=None):
+    """
+    Start a ``seconds`` profile whenever the process receives ``signum``
+    (default SIGUSR1). Must be called from the main thread; returns False
+    where the signal does not exist.
+    """
+    if signum is None:
+        signum = getattr(signal, 'SIGUSR1', None)
+    if signum is None:
+        return False
+
+    def handler(signum, frame):
+        # The handler runs on the main thread between bytecodes, possibly
+        # while it holds a lock start() or logging needs; start from a
+        # fresh thread instead
+        starter = threading.Thread(target=profiler.start, args=(seconds,), name='profiler-signal')
+        starter.daemon = True
+        starter.start()
+
+    signal.signal(signum, handler)
+    return True
+
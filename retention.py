@@ -0,0 +1,238 @@
+"""
+Incremental retention cleanup for the tweets database.
+
+Expired tweets are deleted in small ``id``-range chunks, each in its own
+short ``BEGIN IMMEDIATE`` transaction with a pause in between, so the
+ingestion writer never waits long for the write lock. Chunks only cover
+ids up to the newest expired tweet, found with one read-only scan of the
+timestamp index. Tweets a pending rollup backfill has not reached yet
+are kept, so their counts are never lost from the rollup tables, which
+hold the aggregates of expired tweets. Per-minute rollups are pruned
+with the tweets, six hours of buckets at a time; hourly and daily ones
+are kept.
+
+If the database uses ``auto_vacuum = INCREMENTAL`` the freed pages are
+returned to the file system a few at a time after each run.
+
+Run a cleanup once with:
+
+    python -m storage.retention src/default.db --days 7
+"""
+import argparse
+import sys
+import threading
+import time
+import logging
+from utils.helpers import to_epoch_ms
+from storage import migrations
+from storage import rollups
+
+logger = logging.getLogger(__name__)
+
+HOUR_MS = 60 * 60 * 1000
+DAY_MS = 24 * HOUR_MS
+
+
+def _expired_range(conn, cutoff_ms):
+    """(first, last) id that can hold expired tweets, or None"""
+    first_id, last_id = conn.execute(
+        'SELECT MIN(id), MAX(id) FROM tweets WHERE timestamp_ms < ?', (cutoff_ms,)
+    ).fetchone()
+    if first_id is None:
+        return None
+    if 'rollups' in migrations.pending_backfills(conn):
+        next_id, = conn.execute(
+            "SELECT next_id FROM migration_backfills WHERE name = 'rollups'"
+        ).fetchone()
+        last_id = min(last_id, next_id - 1)
+        if last_id < first_id:
+            return None
+    return first_id, last_id
+
+
+def _transaction(conn, stats, work):
+    """Run ``work(conn)`` in one write transaction, timing how long it holds the lock"""
+    conn.execute('BEGIN IMMEDIATE')
+    start = time.perf_counter()
+    try:
+        result = work(conn)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    held = time.perf_counter() - start
+    stats['transactions'] += 1
+    stats['max_lock_held'] = max(stats['max_lock_held'], held)
+    return result
+
+
+def purge(conn, cutoff_ms, chunk_size=2000, pause=0.01, minute_rollup_cutoff_ms=None,
+          vacuum_pages=1000):
+    """
+    Delete tweets (and their terms) with timestamp_ms < ``cutoff_ms`` in
+    id chunks of ``chunk_size``, sleeping ``pause`` seconds between them.
+    Per-minute rollups before ``minute_rollup_cutoff_ms`` (default
+    ``cutoff_ms``) are pruned too. Returns a stats dict with rows_deleted,
+    transactions, max_lock_held and elapsed (seconds), rows_per_second
+    and pages_vacuumed.
+    """
+    stats = {'rows_deleted': 0, 'transactions': 0, 'max_lock_held': 0.0, 'pages_vacuumed': 0}
+    start = time.perf_counter()
+
+    expired = _expired_range(conn, cutoff_ms)
+    if expired is not None:
+        first_id, last_id = expired
+
+        def delete_chunk(conn):
+            conn.execute('''
+                DELETE FROM tweet_terms WHERE tweet_id IN (
+                    SELECT id FROM tweets WHERE id BETWEEN ? AND ? AND timestamp_ms < ?
+                )
+            ''', (chunk_start, chunk_end, cutoff_ms))
+            return conn.execute('''
+                DELETE FROM tweets WHERE id BETWEEN ? AND ? AND timestamp_ms < ?
+            ''', (chunk_start, chunk_end, cutoff_ms)).rowcount
+
+        for chunk_start in range(first_id, last_id + 1, chunk_size):
+            chunk_end = min(chunk_start + chunk_size - 1, last_id)
+            stats['rows_deleted'] += _transaction(conn, stats, delete_chunk)
+            # Give the ingestion writer a chance to take the lock
+            time.sleep(pause)
+
+    if minute_rollup_cutoff_ms is None:
+        minute_rollup_cutoff_ms = cutoff_ms
+    oldest_ms, = conn.execute(
+        "SELECT MIN(bucket_ms) FROM tweet_rollups WHERE period = 'minute'"
+    ).fetchone()
+    if oldest_ms is not None:
+        # Six hours of minute buckets per transaction
+        step = 6 * HOUR_MS
+        for before_ms in range(oldest_ms + step, minute_rollup_cutoff_ms + step, step):
+            before_ms = min(before_ms, minute_rollup_cutoff_ms)
+            _transaction(conn, stats, lambda conn: rollups.prune(conn, 'minute', before_ms))
+            time.sleep(pause)
+
+    if vacuum_pages and conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 2:
+        free_pages = conn.execute('PRAGMA freelist_count').fetchone()[0]
+        while free_pages:
+            # executescript steps the pragma to completion; execute would
+            # stop after the first page
+            start_step = time.perf_counter()
+            conn.executescript(f'BEGIN IMMEDIATE; PRAGMA incremental_vacuum({vacuum_pages}); COMMIT;')
+            stats['transactions'] += 1
+            stats['max_lock_held'] = max(stats['max_lock_held'], time.perf_counter() - start_step)
+            remaining = conn.execute('PRAGMA freelist_count').fetchone()[0]
+            if remaining >= free_pages:
+                break
+            stats['pages_vacuumed'] += free_pages - remaining
+            free_pages = remaining
+            time.sleep(pause)
+
+    stats['elapsed'] = time.perf_counter() - start
+    stats['rows_per_second'] = stats['rows_deleted'] / stats['elapsed'] if stats['elapsed'] else 0.0
+    return stats
+
+
+def enable_incremental_vacuum(conn):
+    """
+    Switch an existing database to ``auto_vacuum = INCREMENTAL``. This
+    rebuilds the whole file with VACUUM, so run it offline.
+    """
+    conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+    conn.execute('VACUUM')
+
+
+class RetentionManager:
+    """Background thread running ``purge`` every ``interval`` seconds.
+
+    Keeps tweets for ``days`` days and per-minute rollups for
+    ``minute_rollup_days`` (default: the same). The stats of the last
+    run are in ``last_stats`` and running totals in ``stats()``.
+    """
+
+    def __init__(self, pool, days=7, interval=3600, chunk_size=2000, pause=0.01,
+                 minute_rollup_days=None, vacuum_pages=1000):
+        self.pool = pool
+        self.days = days
+        self.interval = interval
+        self.chunk_size = chunk_size
+        self.pause = pause
+        self.minute_rollup_days = days if minute_rollup_days is None else minute_rollup_days
+        self.vacuum_pages = vacuum_pages
+        self.runs = 0
+        self.errors = 0
+        self.rows_deleted = 0
+        self.max_lock_held = 0.0
+        self.last_stats = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='retention')
+        self._thread.daemon = True
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def run_once(self):
+        """Purge expired data now, on the calling thread; returns the run's stats"""
+        now_ms = to_epoch_ms()
+        stats = purge(
+            self.pool.writer(),
+            now_ms - int(self.days * DAY_MS),
+            chunk_size=self.chunk_size,
+            pause=self.pause,
+            minute_rollup_cutoff_ms=now_ms - int(self.minute_rollup_days * DAY_MS),
+            vacuum_pages=self.vacuum_pages
+        )
+        self.runs += 1
+        self.rows_deleted += stats['rows_deleted']
+        self.max_lock_held = max(self.max_lock_held, stats['max_lock_held'])
+        self.last_stats = stats
+        logger.info(
+            f"Retention removed {stats['rows_deleted']} tweets older than {self.days} days "
+            f"({stats['rows_per_second']:.0f} rows/s, longest lock {stats['max_lock_held'] * 1000:.1f} ms)"
+        )
+        return stats
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+
+    def stats(self):
+        return {
+            'runs': self.runs,
+            'errors': self.errors,
+            'rows_deleted': self.rows_deleted,
+            'max_lock_held': self.max_lock_held,
+            'last_run': self.last_stats,
+        }
+
+    def _run(self):
+        try:
+            while not self._stop.is_set():
+                try:
+                    self.run_once()
+                except Exception as e:
+                    self.errors += 1
+                    logger.error(f"Error running retention cleanup: {e}")
+                self._stop.wait(self.interval)
+        finally:
+            self.pool.close_thread()
+
+
+if __name__ == '__main__':
+    from storage.connection import get_pool
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Delete expired tweets in small batches")
+    parser.add_argument('db_path', nargs='?', default='src/default.db')
+    parser.add_argument('--days', type=float, default=7)
+    parser.add_argument('--chunk-size', type=int, default=2000)
+    parser.add_argument('--enable-incremental-vacuum', action='store_true',
+                        help="switch the file to auto_vacuum=INCREMENTAL first (rewrites it)")
+    args = parser.parse_args(sys.argv[1:])
+
+    pool = get_pool(args.db_path)
+    if args.enable_incremental_vacuum:
+        enable_incremental_vacuum(pool.writer())
+    print(RetentionManager(pool, days=args.days, chunk_size=args.chunk_size).run_once())
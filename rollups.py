@@ -0,0 +1,206 @@
+"""
+Pre-aggregated per-minute, per-hour and per-day tweet statistics.
+
+``tweet_rollups`` holds one row per period and bucket with the tweet
+count, sentiment label counts and the polarity sum and sum of squares
+(so mean and variance can be derived), and ``term_rollups`` the
+hashtag/mention counts per bucket. Both are updated in the same
+transaction that inserts a batch of tweets, so charts read a few small
+rows instead of re-aggregating the raw table. Buckets are aligned to UTC
+epoch boundaries and keyed by their start in epoch milliseconds.
+"""
+import math
+from collections import defaultdict
+
+# period name -> bucket length in milliseconds
+PERIODS = {
+    'minute': 60 * 1000,
+    'hour': 60 * 60 * 1000,
+    'day': 24 * 60 * 60 * 1000,
+}
+
+UPSERT_TWEET_ROLLUP_SQL = '''
+    INSERT INTO tweet_rollups (
+        period, bucket_ms, tweet_count, positive, negative, neutral,
+        scored_count, polarity_sum, polarity_sq_sum
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (period, bucket_ms) DO UPDATE SET
+        tweet_count = tweet_count + excluded.tweet_count,
+        positive = positive + excluded.positive,
+        negative = negative + excluded.negative,
+        neutral = neutral + excluded.neutral,
+        scored_count = scored_count + excluded.scored_count,
+        polarity_sum = polarity_sum + excluded.polarity_sum,
+        polarity_sq_sum = polarity_sq_sum + excluded.polarity_sq_sum
+'''
+
+UPSERT_TERM_ROLLUP_SQL = '''
+    INSERT INTO term_rollups (period, bucket_ms, kind, term, count)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT (period, bucket_ms, kind, term) DO UPDATE SET
+        count = count + excluded.count
+'''
+
+
+def create_tables(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS tweet_rollups (
+            period TEXT NOT NULL,
+            bucket_ms INTEGER NOT NULL,
+            tweet_count INTEGER NOT NULL DEFAULT 0,
+            positive INTEGER NOT NULL DEFAULT 0,
+            negative INTEGER NOT NULL DEFAULT 0,
+            neutral INTEGER NOT NULL DEFAULT 0,
+            scored_count INTEGER NOT NULL DEFAULT 0,
+            polarity_sum REAL NOT NULL DEFAULT 0,
+            polarity_sq_sum REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (period, bucket_ms)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS term_rollups (
+            period TEXT NOT NULL,
+            bucket_ms INTEGER NOT NULL,
+            kind TEXT NOT NULL,
+            term TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (period, bucket_ms, kind, term)
+        ) WITHOUT ROWID
+    ''')
+
+
+def apply(conn, tweets):
+    """
+    Add tweets to every period's rollups.
+    ``tweets`` is an iterable of (timestamp_ms, polarity, sentiment_label,
+    terms) where terms are (term, kind) pairs.
+    """
+    totals = defaultdict(lambda: [0, 0, 0, 0, 0, 0.0, 0.0])
+    term_counts = defaultdict(int)
+    for timestamp_ms, polarity, label, terms in tweets:
+        for period, length in PERIODS.items():
+            key = (period, timestamp_ms - timestamp_ms % length)
+            row = totals[key]
+            row[0] += 1
+            if label == 'positive':
+                row[1] += 1
+            elif label == 'negative':
+                row[2] += 1
+            elif label == 'neutral':
+                row[3] += 1
+            if polarity is not None:
+                row[4] += 1
+                row[5] += polarity
+                row[6] += polarity * polarity
+            for term, kind in terms:
+                term_counts[key + (kind, term)] += 1
+
+    conn.executemany(UPSERT_TWEET_ROLLUP_SQL, [key + tuple(row) for key, row in totals.items()])
+    if term_counts:
+        conn.executemany(UPSERT_TERM_ROLLUP_SQL,
+                         [key + (count,) for key, count in term_counts.items()])
+
+
+def backfill(conn, first_id, last_id):
+    """Roll up stored tweets with ids in [first_id, last_id]"""
+    for period, length in PERIODS.items():
+        # "WHERE true" keeps the upsert's ON CONFLICT from parsing as a join clause
+        conn.execute(f'''
+            INSERT INTO tweet_rollups (
+                period, bucket_ms, tweet_count, positive, negative, neutral,
+                scored_count, polarity_sum, polarity_sq_sum
+            )
+            SELECT '{period}', timestamp_ms - timestamp_ms % {length}, COUNT(*),
+                   COUNT(CASE WHEN sentiment_label = 'positive' THEN 1 END),
+                   COUNT(CASE WHEN sentiment_label = 'negative' THEN 1 END),
+                   COUNT(CASE WHEN sentiment_label = 'neutral' THEN 1 END),
+                   COUNT(polarity), TOTAL(polarity), TOTAL(polarity * polarity)
+            FROM tweets
+            WHERE id BETWEEN ? AND ? AND timestamp_ms IS NOT NULL AND true
+            GROUP BY 2
+            ON CONFLICT (period, bucket_ms) DO UPDATE SET
+                tweet_count = tweet_count + excluded.tweet_count,
+                positive = positive + excluded.positive,
+                negative = negative + excluded.negative,
+                neutral = neutral + excluded.neutral,
+                scored_count = scored_count + excluded.scored_count,
+                polarity_sum = polarity_sum + excluded.polarity_sum,
+                polarity_sq_sum = polarity_sq_sum + excluded.polarity_sq_sum
+        ''', (first_id, last_id))
+        conn.execute(f'''
+            INSERT INTO term_rollups (period, bucket_ms, kind, term, count)
+            SELECT '{period}', tweets.timestamp_ms - tweets.timestamp_ms % {length},
+                   tweet_terms.kind, tweet_terms.term, COUNT(*)
+            FROM tweet_terms JOIN tweets ON tweets.id = tweet_terms.tweet_id
+            WHERE tweet_terms.tweet_id BETWEEN ? AND ? AND tweets.timestamp_ms IS NOT NULL AND true
+            GROUP BY 2, 3, 4
+            ON CONFLICT (period, bucket_ms, kind, term) DO UPDATE SET
+                count = count + excluded.count
+        ''', (first_id, last_id))
+
+
+def prune(conn, period, before_ms):
+    """Delete one period's rollups for buckets that start before ``before_ms``"""
+    conn.execute('DELETE FROM tweet_rollups WHERE period = ? AND bucket_ms < ?', (period, before_ms))
+    conn.execute('DELETE FROM term_rollups WHERE period = ? AND bucket_ms < ?', (period, before_ms))
+
+
+def series(conn, period='minute', since_ms=0):
+    """
+    Per-bucket statistics from ``since_ms`` on, oldest first.
+    Each entry is a dict with bucket_ms, tweet_count, label counts and
+    polarity mean/std (None when no tweet in the bucket was scored).
+    """
+    rows = conn.execute('''
+        SELECT bucket_ms, tweet_count, positive, negative, neutral,
+               scored_count, polarity_sum, polarity_sq_sum
+        FROM tweet_rollups
+        WHERE period = ? AND bucket_ms >= ?
+        ORDER BY bucket_ms
+    ''', (period, since_ms - since_ms % PERIODS[period])).fetchall()
+    return [_stats(row) for row in rows]
+
+
+def totals(conn, period='day', since_ms=0):
+    """Statistics summed over every bucket from ``since_ms`` on"""
+    row = conn.execute('''
+        SELECT NULL, COALESCE(SUM(tweet_count), 0), COALESCE(SUM(positive), 0),
+               COALESCE(SUM(negative), 0), COALESCE(SUM(neutral), 0),
+               COALESCE(SUM(scored_count), 0), TOTAL(polarity_sum), TOTAL(polarity_sq_sum)
+        FROM tweet_rollups
+        WHERE period = ? AND bucket_ms >= ?
+    ''', (period, since_ms - since_ms % PERIODS[period])).fetchone()
+    return _stats(row)
+
+
+def top_terms(conn, period='hour', since_ms=0, kind=None, limit=10):
+    """Most frequent (term, kind, count) from ``since_ms`` on"""
+    query = '''
+        SELECT term, kind, SUM(count) AS total
+        FROM term_rollups
+        WHERE period = ? AND bucket_ms >= ?
+    '''
+    params = [period, since_ms - since_ms % PERIODS[period]]
+    if kind:
+        query += ' AND kind = ?'
+        params.append(kind)
+    query += ' GROUP BY kind, term ORDER BY total DESC LIMIT ?'
+    params.append(limit)
+    return conn.execute(query, params).fetchall()
+
+
+def _stats(row):
+    bucket_ms, count, positive, negative, neutral, scored, total, squares = row
+    mean = std = None
+    if scored:
+        mean = total / scored
+        std = math.sqrt(max(0.0, squares / scored - mean * mean))
+    return {
+        'bucket_ms': bucket_ms,
+        'tweet_count': count,
+        'positive': positive,
+        'negative': negative,
+        'neutral': neutral,
+        'polarity_mean': mean,
+        'polarity_std': std,
+    }
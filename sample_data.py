@@ -1,66 +1,42 @@
-import sqlite3
-import json
 from datetime import datetime, timedelta
+import argparse
+import itertools
 import random
+from ingestion.loadgen import SyntheticTweets
+from processing.analyzer import Analyzer
+from storage.database import Database
 
-def generate_sample_data():
+def generate_sample_data(tweets=100, seed=0, db_path='src/default.db'):
     """Generate sample data for the dashboard"""
-    # Connect to database
-    conn = sqlite3.connect('src/default.db')
-    cursor = conn.cursor()
-    
-    # Create tweets table if it doesn't exist
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS tweets (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        text TEXT,
-        user TEXT,
-        timestamp DATETIME,
-        sentiment JSON
-    )
-    ''')
-    
-    # Sample topics and sentiments
-    topics = ['Python', 'Data Science', 'AI', 'Machine Learning', 
-             'Analytics', 'Big Data', 'Deep Learning', 'NLP']
-    
-    sentiments = ['positive', 'negative', 'neutral']
-    users = ['data_enthusiast', 'ai_lover', 'ml_expert', 'tech_guru', 'python_dev']
-    
-    # Generate sample tweets for the last 24 hours
+    # Open the database; this creates and migrates the schema if needed
+    database = Database(db_path)
+    analyzer = Analyzer()
+    rng = random.Random(seed)
+
+    # The same seeded tweets the load generator produces
+    batch = list(itertools.islice(SyntheticTweets(seed), tweets))
+    sentiments = analyzer.analyze_sentiment_batch([tweet['text'] for tweet in batch])
+
+    # Spread the tweets over the last 24 hours
     now = datetime.now()
-    for i in range(100):  # Generate 100 sample tweets
-        # Random timestamp within last 24 hours
-        timestamp = now - timedelta(
-            hours=random.randint(0, 23),
-            minutes=random.randint(0, 59),
-            seconds=random.randint(0, 59)
-        )
-        
-        # Generate random tweet text
-        topic1 = random.choice(topics)
-        topic2 = random.choice(topics)
-        text = f"Really interesting developments in {topic1} and its applications in {topic2}! #Tech #Innovation"
-        
-        # Generate random sentiment
-        sentiment = random.choice(sentiments)
-        polarity = random.uniform(-1, 1)
-        sentiment_data = {
+    for tweet, sentiment in zip(batch, sentiments):
+        hashtags, mentions, _ = analyzer.extract_trends(tweet['text'])
+        tweet.update({
+            'timestamp': (now - timedelta(seconds=rng.uniform(0, 24 * 60 * 60))).isoformat(),
             'sentiment': sentiment,
-            'polarity': polarity
-        }
-        
-        # Insert tweet into database
-        cursor.execute('''
-        INSERT INTO tweets (text, user, timestamp, sentiment)
-        VALUES (?, ?, ?, ?)
-        ''', (text, random.choice(users), timestamp.strftime('%Y-%m-%d %H:%M:%S'), 
-              json.dumps(sentiment_data)))
-    
-    # Commit changes and close connection
-    conn.commit()
-    conn.close()
+            'trends': {'hashtags': list(hashtags), 'mentions': list(mentions)}
+        })
+        # Queue tweet for the database writer
+        database.store(tweet)
+
+    # Flush buffered rows and close the writer
+    database.close()
     print("Sample data generated successfully!")
 
 if __name__ == '__main__':
-    generate_sample_data() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Fill the database with synthetic tweets")
+    parser.add_argument('--tweets', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--db', default='src/default.db')
+    args = parser.parse_args()
+    generate_sample_data(args.tweets, args.seed, args.db)
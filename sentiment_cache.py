@@ -0,0 +1,130 @@
+"""
+Bounded cache of sentiment scores for repeated tweet texts.
+
+Retweets and copy-pasted tweets repeat the same text many times, and
+scoring it again always gives the same result. Keys are a 16-byte
+BLAKE2 digest of the text with runs of whitespace collapsed: TextBlob
+and ``SentimentLexicon`` both split on whitespace, so texts that differ
+only there score the same. Blank lines are kept, since pattern ends a
+sentence there and that can keep an emoticon from forming. Letter case
+is kept too: pattern recognizes ":D" but not ":d". Anything else, such
+as a retweet's "RT @user:" prefix, can change the score (the mentioned
+name may be a sentiment word) and stays part of the key.
+
+Entries are evicted least recently used first. Call ``invalidate``
+whenever the sentiment model or lexicon changes.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+def normalize(text):
+    if '\n' in text:
+        paragraphs = text.replace('\r\n', '\n').split('\n\n')
+        return '\n\n'.join(' '.join(paragraph.split()) for paragraph in paragraphs)
+    return ' '.join(text.split())
+
+
+class SentimentCache:
+    """LRU map from normalized-text digests to (polarity, subjectivity) pairs"""
+
+    def __init__(self, maxsize=100000):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(text):
+        return hashlib.blake2b(normalize(text).encode('utf-8'), digest_size=16).digest()
+
+    def get(self, key):
+        """Cached (polarity, subjectivity) for ``key``, or None"""
+        with self._lock:
+            scores = self._entries.get(key)
+            if scores is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return scores
+
+    def get_many(self, keys):
+        """``get`` for a list of keys under one lock acquisition"""
+        with self._lock:
+            entries = self._entries
+            found = [entries.get(key) for key in keys]
+            hits = 0
+            for key, scores in zip(keys, found):
+                if scores is not None:
+                    entries.move_to_end(key)
+                    hits += 1
+            self.hits += hits
+            self.misses += len(keys) - hits
+            return found
+
+    def score_batch(self, texts, score):
+        """
+        (polarity, subjectivity) for every text, in order. Only the
+        distinct texts not cached yet are passed to ``score``, a function
+        scoring a list of texts such as ``SentimentLexicon.score_batch``.
+        """
+        keys = [self.key(text) for text in texts]
+        scores = self.get_many(keys)
+        missing = {}
+        for i, found in enumerate(scores):
+            if found is None:
+                missing.setdefault(keys[i], []).append(i)
+        if missing:
+            unscored = list(missing.values())
+            repeats = sum(map(len, unscored)) - len(unscored)
+            if repeats:
+                # Repeats within the batch are served from the first one's score
+                with self._lock:
+                    self.hits += repeats
+                    self.misses -= repeats
+            computed = score([texts[positions[0]] for positions in unscored])
+            for positions, result in zip(unscored, computed):
+                for i in positions:
+                    scores[i] = result
+            self.put_many(zip(missing, computed))
+        return scores
+
+    def put(self, key, scores):
+        self.put_many([(key, scores)])
+
+    def put_many(self, items):
+        """Store (key, scores) pairs under one lock acquisition"""
+        with self._lock:
+            entries = self._entries
+            for key, scores in items:
+                entries[key] = scores
+                entries.move_to_end(key)
+            while len(entries) > self.maxsize:
+                entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self):
+        """Drop every entry, e.g. after the lexicon or model changed"""
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+        }
@@ -0,0 +1,223 @@
+import heapq
+import math
+import random
+from collections import Counter
+from datetime import datetime, timedelta
+from operator import itemgetter
+
+import numpy as np
+
+
+class WindowedCountMinSketch:
+    """Count-Min Sketch over a sliding window of time-bucketed slices.
+
+    Each bucket of the window gets its own ``depth x width`` counter slice
+    and a running ``total`` slice holds their sum, so expiring a bucket is
+    one array subtraction. Estimates never undercount and, with
+    probability ``1 - delta``, overcount by at most ``epsilon`` times the
+    number of events in the window.
+
+    Size the sketch either by ``memory_bytes`` (all slices together) or by
+    ``epsilon``; ``memory_bytes`` wins when both are given. Widths are
+    rounded to a power of two so rows can use multiply-shift hashing,
+    which vectorizes over a whole batch of items.
+    """
+
+    def __init__(self, window=timedelta(hours=24), bucket=timedelta(hours=1),
+                 memory_bytes=16 * 1024 * 1024, epsilon=None, delta=0.01, seed=0):
+        self._bucket_seconds = bucket.total_seconds()
+        self.slices = int(math.ceil(window.total_seconds() / self._bucket_seconds))
+        self.depth = max(1, int(math.ceil(math.log(1.0 / delta))))
+        if memory_bytes:
+            # One slice per bucket plus the running total, 4-byte counters
+            bits = int(math.log2(max(16, memory_bytes // (4 * self.depth * (self.slices + 1)))))
+        elif epsilon:
+            bits = int(math.ceil(math.log2(math.e / epsilon)))
+        else:
+            raise ValueError("Either memory_bytes or epsilon is required")
+        self.width = 1 << bits
+        self.epsilon = math.e / self.width
+        self.delta = delta
+
+        rng = random.Random(seed)
+        self._multipliers = np.array([rng.getrandbits(64) | 1 for _ in range(self.depth)],
+                                     dtype=np.uint64)[:, None]
+        self._offsets = np.array([rng.getrandbits(64) for _ in range(self.depth)],
+                                 dtype=np.uint64)[:, None]
+        self._shift = np.uint64(64 - bits)
+        self._rows = np.arange(self.depth)
+        self._ring = np.zeros((self.slices, self.depth, self.width), dtype=np.int32)
+        self._slice_counts = np.zeros(self.slices, dtype=np.int64)
+        self.total = np.zeros((self.depth, self.width), dtype=np.int32)
+        self.count = 0
+        self._current = None
+
+    @property
+    def memory_bytes(self):
+        return self._ring.nbytes + self.total.nbytes
+
+    def error_bound(self):
+        """Maximum overcount of any estimate, with probability 1 - delta"""
+        return self.epsilon * self.count
+
+    def add_many(self, items, timestamp=None, counts=None):
+        """Count every item in ``items`` at the same time; returns their columns.
+
+        ``counts`` optionally gives a per-item count (default 1 each).
+        """
+        slot = self._advance(timestamp)
+        columns = self.columns(items)
+        rows = np.broadcast_to(self._rows[:, None], columns.shape)
+        if counts is None:
+            counts = np.ones(len(items), dtype=np.int32)
+        else:
+            counts = np.asarray(counts, dtype=np.int32)
+        weights = np.broadcast_to(counts, columns.shape)
+        np.add.at(self._ring[slot], (rows, columns), weights)
+        np.add.at(self.total, (rows, columns), weights)
+        added = int(counts.sum())
+        self._slice_counts[slot] += added
+        self.count += added
+        return columns
+
+    def estimate(self, item):
+        """Estimated count of ``item`` in the window"""
+        return int(self.estimate_columns(self.columns([item]))[0])
+
+    def estimate_columns(self, columns):
+        """Estimated counts for items already hashed with ``columns``"""
+        return self.total[self._rows[:, None], columns].min(axis=0)
+
+    def columns(self, items):
+        """``depth x len(items)`` array of the counter each item maps to per row"""
+        hashes = np.fromiter((hash(item) for item in items), dtype=np.int64, count=len(items))
+        with np.errstate(over='ignore'):
+            mixed = self._multipliers * hashes.view(np.uint64) + self._offsets
+        return (mixed >> self._shift).astype(np.intp)
+
+    def expire(self, now=None):
+        """Clear slices that have fallen out of the window"""
+        self._advance(now)
+
+    def _advance(self, timestamp):
+        """Move the window forward to ``timestamp``; returns its ring slot"""
+        if timestamp is None:
+            timestamp = datetime.now()
+        if isinstance(timestamp, datetime):
+            timestamp = timestamp.timestamp()
+        index = int(timestamp // self._bucket_seconds)
+        if self._current is None:
+            self._current = index
+        elif index > self._current:
+            # Clear every slot the window has moved past, at most a full lap
+            for stale in range(max(self._current + 1, index - self.slices + 1), index + 1):
+                self._clear(stale % self.slices)
+            self._current = index
+        elif index <= self._current - self.slices:
+            # Older than the window; count it in the oldest live slot
+            index = self._current - self.slices + 1
+        return index % self.slices
+
+    def _clear(self, slot):
+        if self._slice_counts[slot]:
+            self.total -= self._ring[slot]
+            self.count -= int(self._slice_counts[slot])
+            self._ring[slot].fill(0)
+            self._slice_counts[slot] = 0
+
+
+class ApproximateTrendCounter:
+    """Bounded-memory trend counting: windowed Count-Min Sketch plus heavy hitters.
+
+    The sketch answers "how often was X seen in the window" for any X; a
+    fixed-size candidate table remembers which items are worth asking
+    about. A new item replaces the weakest candidate once its estimate
+    beats it, and candidates are re-estimated whenever the window moves.
+    Exposes the same ``update``/``expire``/``top_items`` interface as
+    ``SlidingWindowCounter``.
+    """
+
+    def __init__(self, window=timedelta(hours=24), bucket=timedelta(hours=1), top_k=10,
+                 capacity=1000, memory_bytes=16 * 1024 * 1024, epsilon=None, delta=0.01):
+        self.sketch = WindowedCountMinSketch(window, bucket, memory_bytes, epsilon, delta)
+        self.top_k = top_k
+        self.capacity = capacity
+        # Approximate counts for the tracked heavy-hitter candidates only
+        self.totals = {}
+        self._heap = []
+
+    def add(self, item, timestamp=None, count=1):
+        self.update((item,), timestamp, count)
+
+    def update(self, items, timestamp=None, count=1):
+        """Count every item in ``items`` at the same time"""
+        counts = Counter(items)
+        if count != 1:
+            for item in counts:
+                counts[item] *= count
+        self.update_counts(counts, timestamp)
+
+    def update_counts(self, counts, timestamp=None):
+        """Add a mapping of item -> count, all at the same time"""
+        if not counts:
+            return
+        items = list(counts)
+        weights = list(counts.values())
+        before = self.sketch._current
+        columns = self.sketch.add_many(items, timestamp, weights)
+        if self.sketch._current != before:
+            self._refresh()
+        for item, estimate in zip(items, self.sketch.estimate_columns(columns).tolist()):
+            self._offer(item, estimate)
+
+    def expire(self, now=None):
+        before = self.sketch._current
+        self.sketch.expire(now)
+        if self.sketch._current != before:
+            self._refresh()
+
+    def top_items(self):
+        """Top-K (item, estimated count) pairs, highest first"""
+        return heapq.nlargest(self.top_k, self.totals.items(), key=itemgetter(1))
+
+    def most_common(self, n=None):
+        return heapq.nlargest(n or len(self.totals), self.totals.items(), key=itemgetter(1))
+
+    def error_bound(self):
+        return self.sketch.error_bound()
+
+    def __len__(self):
+        return len(self.totals)
+
+    def _offer(self, item, estimate):
+        totals = self.totals
+        if item not in totals and len(totals) >= self.capacity:
+            min_estimate, min_item = self._peek_min()
+            if estimate <= min_estimate:
+                return
+            heapq.heappop(self._heap)
+            del totals[min_item]
+        totals[item] = estimate
+        heapq.heappush(self._heap, (estimate, id(item), item))
+        if len(self._heap) > 4 * self.capacity:
+            self._rebuild_heap()
+
+    def _peek_min(self):
+        heap = self._heap
+        while True:
+            estimate, _, item = heap[0]
+            if self.totals.get(item) == estimate:
+                return estimate, item
+            heapq.heappop(heap)
+
+    def _refresh(self):
+        """Re-estimate candidates after the window moved; drop the ones gone to zero"""
+        estimates = [(item, self.sketch.estimate(item)) for item in self.totals]
+        # Updated in place: Analyzer.trends holds a reference to this dict
+        self.totals.clear()
+        self.totals.update((item, count) for item, count in estimates if count > 0)
+        self._rebuild_heap()
+
+    def _rebuild_heap(self):
+        self._heap = [(count, id(item), item) for item, count in self.totals.items()]
+        heapq.heapify(self._heap)
@@ -1,13 +1,65 @@
 import tweepy
 import json
 from datetime import datetime
+import functools
+import threading
 import time
-import random
+from ingestion.buffer import IngestQueue
+from ingestion.loadgen import LoadGenerator, SyntheticTweets, constant, synthetic_arrivals
+from utils import metrics
+
+ANALYZE_TIME = metrics.stage_timer('analyze')
+STORE_TIME = metrics.stage_timer('store')
+TWEETS_OUT = metrics.counter('pipeline_tweets_out_total', 'Tweets analyzed and handed to the database')
+TWEETS_IN = {
+    source: metrics.counter('pipeline_tweets_in_total', 'Tweets accepted into the ingest queue', source=source)
+    for source in ('stream', 'generator')
+}
+TWEETS_REJECTED = {
+    source: metrics.counter('pipeline_tweets_rejected_total', 'Tweets the ingest queue refused', source=source)
+    for source in ('stream', 'generator')
+}
+BATCH_ERRORS = metrics.error_counter('consume')
+INGEST_ERRORS = metrics.error_counter('ingest')
+# IngestQueue.metrics() field -> (gauge name, help)
+QUEUE_GAUGES = {
+    'depth': ('ingest_queue_depth', 'Tweets waiting in the ingest queue, including spilled ones'),
+    'oldest_age': ('ingest_queue_oldest_age_seconds', 'Seconds the oldest queued tweet has waited'),
+    'last_lag': ('ingest_queue_last_lag_seconds', 'Seconds the oldest tweet of the last batch waited'),
+    'dropped': ('ingest_queue_dropped', 'Tweets the ingest queue dropped so far'),
+    'spilled': ('ingest_queue_spilled', 'Tweets the ingest queue spilled to disk so far'),
+    'block_timeouts': ('ingest_queue_block_timeouts', 'Tweets that gave up waiting for room in the ingest queue'),
+}
 
 class StreamListener(tweepy.StreamingClient):
-    def __init__(self, api=None, analyzer=None, database=None):
+    def __init__(self, api=None, analyzer=None, database=None, pool=None,
+                 queue=None, consumers=1, batch_size=256, load_generator=None, on_processed=None):
+        """
+        Args:
+            queue (IngestQueue): Buffer between the stream callback and the
+                consumer threads that analyze and store tweets (defaults
+                to a blocking queue of 10000 tweets)
+            consumers (int): Number of consumer threads
+            batch_size (int): Most tweets a consumer takes off the queue
+                at once
+            load_generator (LoadGenerator): Source of tweets when there
+                is no Twitter stream (defaults to a synthetic tweet every
+                2 seconds)
+            on_processed (callable): Called with every batch of tweets
+                once it has been analyzed and handed to the database
+        """
         self.analyzer = analyzer
         self.database = database
+        self.pool = pool
+        self.queue = queue if queue is not None else IngestQueue()
+        self.consumers = consumers
+        self.batch_size = batch_size
+        self.load_generator = load_generator
+        self.on_processed = on_processed
+        self.consumer_threads = []
+        self._analysis_lock = threading.Lock()
+        for field, (name, help_text) in QUEUE_GAUGES.items():
+            metrics.gauge(name, help_text, fn=self._queue_metric(field))
         self.running = False
         self.use_sample_data = True  # Default to sample data
         try:
@@ -19,29 +71,6 @@ class StreamListener(tweepy.StreamingClient):
         except Exception as e:
             print(f"Error initializing Twitter stream: {e}. Using sample data.")
 
-    def _generate_sample_tweet(self):
-        """Generate sample tweet data for testing"""
-        sample_texts = [
-            "Excited to learn about #AI and #MachineLearning today!",
-            "Just finished a great #Python project on #DataScience",
-            "The future of #Technology is in artificial intelligence",
-            "Working on deep learning models with #TensorFlow",
-            "Big data analytics is transforming business #Innovation",
-            "Neural networks are amazing for #ComputerVision tasks",
-            "Learning about natural language processing #NLP",
-            "Cloud computing and #AI are the perfect combination",
-            "Data visualization makes insights clearer #DataViz",
-            "Building robust machine learning pipelines #MLOps"
-        ]
-        
-        return {
-            'text': random.choice(sample_texts),
-            'timestamp': datetime.now().isoformat(),
-            'user': f"sample_user_{random.randint(1, 1000)}",
-            'retweet_count': random.randint(0, 100),
-            'favorite_count': random.randint(0, 200)
-        }
-
     def on_tweet(self, tweet):
         if not self.running:
             return False
@@ -57,25 +86,73 @@ class StreamListener(tweepy.StreamingClient):
                     'favorite_count': getattr(tweet, 'public_metrics', {}).get('like_count', 0)
                 }
 
-                # Analyze sentiment and trends
-                if self.analyzer:
-                    sentiment = self.analyzer.analyze_sentiment(tweet.text)
-                    trends = self.analyzer.analyze_trends(tweet.text)
-                    processed_data.update({
-                        'sentiment': sentiment,
-                        'trends': trends
-                    })
-
-                # Store in database
-                if self.database:
-                    self.database.store(processed_data)
-
+                self._enqueue('stream', processed_data)
                 return True
 
         except Exception as e:
+            INGEST_ERRORS.inc()
             print(f"Error processing tweet: {e}")
         return True
 
+    def _enqueue(self, source, tweet):
+        """Queue one incoming tweet, counting it per source"""
+        accepted = self.queue.put(tweet)
+        (TWEETS_IN if accepted else TWEETS_REJECTED)[source].inc()
+        return accepted
+
+    def _queue_metric(self, name):
+        """Scrape-time reader of one ingest queue figure"""
+        if name == 'depth':
+            return lambda: len(self.queue)
+        return lambda: self.queue.metrics()[name]
+
+    def _start_consumers(self):
+        """Start the threads that drain the ingest queue"""
+        self.consumer_threads = [t for t in self.consumer_threads if t.is_alive()]
+        for i in range(len(self.consumer_threads), self.consumers):
+            thread = threading.Thread(target=self._consume, name=f'ingest-consumer-{i}')
+            thread.daemon = True
+            thread.start()
+            self.consumer_threads.append(thread)
+
+    def _consume(self):
+        """Analyze and store queued tweets until the queue is closed and drained"""
+        while True:
+            batch = self.queue.get_batch(self.batch_size, timeout=0.5)
+            if batch:
+                try:
+                    self._process_batch(batch)
+                except Exception as e:
+                    BATCH_ERRORS.inc()
+                    print(f"Error processing tweet batch: {e}")
+            elif self.queue.closed:
+                return
+
+    def _process_batch(self, tweets):
+        """Analyze sentiment and trends for a list of tweet dicts and store them"""
+        start = time.perf_counter()
+        if self.pool:
+            self.pool.analyze(tweets)
+        elif self.analyzer:
+            # The trend window is shared by every consumer thread
+            with self._analysis_lock:
+                for tweet in tweets:
+                    tweet.update({
+                        'sentiment': self.analyzer.analyze_sentiment(tweet['text']),
+                        'trends': self.analyzer.analyze_trends(tweet['text'])
+                    })
+                self.analyzer.publish_trends()
+        ANALYZE_TIME.observe(time.perf_counter() - start)
+
+        if self.database:
+            start = time.perf_counter()
+            for tweet in tweets:
+                self.database.store(tweet)
+            STORE_TIME.observe(time.perf_counter() - start)
+        TWEETS_OUT.inc(len(tweets))
+        if self.on_processed is not None:
+            self.on_processed(tweets)
+
     def on_error(self, status):
         print(f'Error: {status}')
         if status == 420:  # Rate limit reached
@@ -90,6 +167,7 @@ class StreamListener(tweepy.StreamingClient):
             track_keywords = ['python', 'data science', 'AI', 'machine learning']
         
         self.running = True
+        self._start_consumers()
         
         if self.use_sample_data:
             print("Using sample data stream")
@@ -116,27 +194,18 @@ class StreamListener(tweepy.StreamingClient):
             self._start_sample_stream()
 
     def _start_sample_stream(self):
-        """Start generating sample data"""
+        """Start feeding generated or replayed tweets into the queue"""
+        if self.load_generator is None:
+            self.load_generator = LoadGenerator(synthetic_arrivals(SyntheticTweets(), constant(0.5)))
+
         def sample_stream():
-            while self.running:
-                try:
-                    sample_tweet = self._generate_sample_tweet()
-                    if self.analyzer:
-                        sentiment = self.analyzer.analyze_sentiment(sample_tweet['text'])
-                        trends = self.analyzer.analyze_trends(sample_tweet['text'])
-                        sample_tweet.update({
-                            'sentiment': sentiment,
-                            'trends': trends
-                        })
-                    if self.database:
-                        self.database.store(sample_tweet)
-                    time.sleep(2)  # Generate a new tweet every 2 seconds
-                except Exception as e:
-                    print(f"Error in sample stream: {e}")
-                    time.sleep(5)  # Wait longer on error
+            try:
+                self.load_generator.run(functools.partial(self._enqueue, 'generator'))
+            except Exception as e:
+                INGEST_ERRORS.inc()
+                print(f"Error in sample stream: {e}")
 
-        import threading
-        self.sample_thread = threading.Thread(target=sample_stream)
+        self.sample_thread = threading.Thread(target=sample_stream, name='load-generator')
         self.sample_thread.daemon = True
         self.sample_thread.start()
 
@@ -144,4 +213,18 @@ class StreamListener(tweepy.StreamingClient):
         """Stop the stream"""
         self.running = False
         if not self.use_sample_data:
-            self.disconnect() 
\ No newline at end of file
+            self.disconnect()
+        if self.load_generator is not None:
+            self.load_generator.stop()
+        sample_thread = getattr(self, 'sample_thread', None)
+        if sample_thread and sample_thread.is_alive():
+            sample_thread.join(timeout=5)
+        # Let the consumers drain what is already queued
+        self.queue.close()
+        for thread in self.consumer_threads:
+            thread.join(timeout=30)
+        if self.pool:
+            self.pool.close()
+        if self.database:
+            # Make sure rows still buffered by the batched writer hit disk
+            self.database.close() 
\ No newline at end of file
@@ -1,44 +1,31 @@
-import sqlite3
 import time
 from datetime import datetime
 import os
+from storage.connection import get_pool
+from storage import rollups
 
 def get_recent_tweets(db_path='src/default.db'):
     try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
+        cursor = get_pool(db_path).reader().cursor()
         cursor.execute("""
-            SELECT text, user, timestamp, sentiment
+            SELECT text, user, timestamp, sentiment_label
             FROM tweets
-            ORDER BY timestamp DESC
+            ORDER BY timestamp_ms DESC
             LIMIT 5
         """)
         return cursor.fetchall()
     except Exception as e:
         print(f"Error: {e}")
         return []
-    finally:
-        if conn:
-            conn.close()
 
 def get_sentiment_stats(db_path='src/default.db'):
     try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT 
-                json_extract(sentiment, '$.sentiment') as sentiment,
-                COUNT(*) as count
-            FROM tweets
-            GROUP BY sentiment
-        """)
-        return cursor.fetchall()
+        totals = rollups.totals(get_pool(db_path).reader(), 'day')
+        return [(label, totals[label]) for label in ('positive', 'negative', 'neutral')
+                if totals[label]]
     except Exception as e:
         print(f"Error: {e}")
         return []
-    finally:
-        if conn:
-            conn.close()
 
 def print_divider():
     print("-" * 80)
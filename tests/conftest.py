@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Tests import the pipeline the way app.py does: ``processing.analyzer``,
+# ``storage.database`` and so on, from src/
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, 'src'), ROOT]
@@ -0,0 +1,39 @@
+import pytest
+
+TOKEN = {'X-Admin-Token': 'secret'}
+
+
+@pytest.fixture(scope='module')
+def client(tmp_path_factory):
+    with pytest.MonkeyPatch.context() as patch:
+        patch.chdir(tmp_path_factory.mktemp('app'))
+        for name in ('API_KEY', 'API_SECRET_KEY', 'ACCESS_TOKEN', 'ACCESS_TOKEN_SECRET', 'BEARER_TOKEN'):
+            patch.setenv(name, 'test')
+        patch.setenv('ANALYSIS_WORKERS', '0')
+        import app
+        patch.setattr(app.config, 'ADMIN_TOKEN', 'secret')
+        flask_app, _ = app.create_app()
+        yield flask_app.test_client(), app.config
+
+
+def test_admin_routes_need_the_token(client):
+    client, _ = client
+    assert client.get('/admin/profile').status_code == 403
+    assert client.get('/admin/profile', headers={'X-Admin-Token': 'wrong'}).status_code == 403
+    assert client.get('/admin/profile', headers=TOKEN).status_code == 200
+
+
+def test_admin_routes_are_off_without_a_token(client, monkeypatch):
+    client, config = client
+    monkeypatch.setattr(config, 'ADMIN_TOKEN', None)
+    assert client.get('/admin/profile').status_code == 404
+    assert client.post('/admin/profile?seconds=5').status_code == 404
+    assert client.get('/admin/profile/latest.collapsed').status_code == 404
+
+
+@pytest.mark.parametrize('seconds', ['0', '0.5', '300.5', '86400', '-1', 'nan', 'soon'])
+def test_profile_seconds_out_of_range_is_rejected(client, seconds):
+    client, _ = client
+    response = client.post(f'/admin/profile?seconds={seconds}', headers=TOKEN)
+    assert response.status_code == 400
+    assert client.get('/admin/profile', headers=TOKEN).get_json()['running'] is False
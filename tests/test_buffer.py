@@ -0,0 +1,69 @@
+from ingestion.buffer import IngestQueue
+
+
+def spill_queue(tmp_path, maxsize=3):
+    return IngestQueue(maxsize=maxsize, policy='spill', spill_path=str(tmp_path / 'spill.ndjson'))
+
+
+def test_spill_keeps_order(tmp_path):
+    queue = spill_queue(tmp_path)
+    for i in range(10):
+        assert queue.put(i)
+    assert queue.metrics()['spilled'] == 7
+    taken = []
+    while len(queue):
+        taken += queue.get_batch(2, timeout=0)
+    assert taken == list(range(10))
+
+
+def test_restart_after_partial_drain_does_not_redeliver(tmp_path):
+    queue = spill_queue(tmp_path)
+    for i in range(10):
+        queue.put(i)
+    # Memory, then the first three spilled items read back
+    assert queue.get_batch(3, timeout=0) == [0, 1, 2]
+    assert queue.get_batch(3, timeout=0) == [3, 4, 5]
+    assert queue.get_batch(1, timeout=0) == [6]
+    # Crash with 7 and 8 read back into memory and 9 still on disk
+    restarted = spill_queue(tmp_path)
+    assert len(restarted) == 1
+    assert restarted.get_batch(10, timeout=0) == [9]
+
+
+def test_restart_after_full_drain_starts_empty(tmp_path):
+    queue = spill_queue(tmp_path)
+    for i in range(6):
+        queue.put(i)
+    taken = []
+    while len(queue):
+        taken += queue.get_batch(10, timeout=0)
+    assert taken == list(range(6))
+    assert len(spill_queue(tmp_path)) == 0
+
+
+def test_stale_offset_past_the_end_is_ignored(tmp_path):
+    (tmp_path / 'spill.ndjson.offset').write_text('999')
+    queue = spill_queue(tmp_path)
+    for i in range(5):
+        queue.put(i)
+    restarted = spill_queue(tmp_path)
+    assert restarted.get_batch(10, timeout=0) == [3, 4]
+
+
+def test_block_times_out_and_drops_without_a_spill_path():
+    queue = IngestQueue(maxsize=2, block_timeout=0.01)
+    assert queue.put(0) and queue.put(1)
+    assert not queue.put(2)
+    metrics = queue.metrics()
+    assert (metrics['block_timeouts'], metrics['dropped'], metrics['depth']) == (1, 1, 2)
+
+
+def test_block_times_out_and_spills_in_order(tmp_path):
+    queue = IngestQueue(maxsize=2, spill_path=str(tmp_path / 'spill.ndjson'), block_timeout=0.01)
+    assert all(queue.put(i) for i in range(2))
+    assert queue.put(2)
+    # Only the first overflowing put waits; later ones follow it to disk
+    assert queue.put(3)
+    metrics = queue.metrics()
+    assert (metrics['block_timeouts'], metrics['spilled'], metrics['dropped']) == (1, 2, 0)
+    assert queue.get_batch(10, timeout=0) + queue.get_batch(10, timeout=0) == [0, 1, 2, 3]
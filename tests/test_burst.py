@@ -0,0 +1,61 @@
+import random
+
+import numpy as np
+import pytest
+
+from processing.burst import BurstDetector
+
+
+def feed(detector, minute, counts):
+    detector.update_counts(counts, minute * 60 + 1)
+
+
+def close(detector, minute):
+    detector.advance((minute + 1) * 60)
+
+
+def bursting_terms(detector):
+    return {term for term, _, _ in detector.bursting}
+
+
+def test_steady_term_never_bursts():
+    rng = random.Random(0)
+    detector = BurstDetector()
+    for minute in range(300):
+        # The first minute is partial, as right after startup
+        rate = 20 if minute == 0 else 40
+        feed(detector, minute, {'steady': rate + rng.randint(-4, 4)})
+        close(detector, minute)
+        assert 'steady' not in bursting_terms(detector), minute
+
+
+def test_term_first_seen_at_volume_does_not_burst():
+    detector = BurstDetector(warmup=10)
+    for minute in range(10):
+        feed(detector, minute, {'new': 500 if minute == 0 else 50})
+        close(detector, minute)
+        assert detector.bursting == []
+
+
+def test_spike_bursts():
+    detector = BurstDetector()
+    for minute in range(60):
+        feed(detector, minute, {'term': 10 + minute % 3, 'other': 5})
+        close(detector, minute)
+    feed(detector, 60, {'term': 60, 'other': 5})
+    close(detector, 60)
+    assert bursting_terms(detector) == {'term'}
+
+
+@pytest.mark.parametrize('seen', [[0, 3, 4, 70, 71, 140], [0, 50, 51, 52, 200], list(range(0, 120, 7))])
+def test_silent_minutes_match_explicit_zeros(seen):
+    lazy, explicit = BurstDetector(prune_every=10 ** 6), BurstDetector(prune_every=10 ** 6)
+    for minute in range(seen[-1] + 1):
+        count = 3 + minute % 5 if minute in seen else 0
+        if count:
+            feed(lazy, minute, {'term': count})
+        feed(explicit, minute, {'term': count})
+    close(lazy, seen[-1])
+    close(explicit, seen[-1])
+    np.testing.assert_allclose(lazy.mean[:1], explicit.mean[:1])
+    np.testing.assert_allclose(lazy.var[:1], explicit.var[:1])
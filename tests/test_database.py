@@ -0,0 +1,76 @@
+import threading
+import time
+
+import pytest
+
+from storage.connection import ConnectionPool
+from storage.database import BatchWriter
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = ConnectionPool(str(tmp_path / 'test.db'))
+    conn = pool.writer()
+    conn.execute('CREATE TABLE rows (value INTEGER NOT NULL)')
+    conn.commit()
+    yield pool
+    pool.close_all()
+
+
+def insert_rows(conn, rows):
+    conn.executemany('INSERT INTO rows (value) VALUES (?)', [(int(row),) for row in rows])
+
+
+def count_rows(pool):
+    return pool.reader().execute('SELECT COUNT(*) FROM rows').fetchone()[0]
+
+
+def test_writes_batches(pool):
+    writer = BatchWriter(pool, insert_rows, batch_size=10, flush_interval=0.01)
+    for value in range(25):
+        writer.put(value)
+    assert writer.flush(timeout=5)
+    assert writer.rows_written == 25
+    assert count_rows(pool) == 25
+    writer.close(timeout=5)
+
+
+def test_survives_a_failing_batch(pool):
+    writer = BatchWriter(pool, insert_rows, batch_size=100, flush_interval=0.01)
+    writer.put('not a number')  # int() raises ValueError inside write_batch
+    writer.put(1)
+    assert writer.flush(timeout=5)
+    assert writer.rows_failed == 2
+
+    writer.put(2)
+    assert writer.flush(timeout=5)
+    assert writer.rows_written == 1
+    assert count_rows(pool) == 1
+    writer.close(timeout=5)
+
+
+def test_releases_flush_callers_when_the_writer_dies():
+    gate = threading.Event()
+
+    class BrokenPool:
+        def writer(self):
+            gate.wait(5)
+            raise RuntimeError("no connection")
+
+        def close_thread(self):
+            pass
+
+    writer = BatchWriter(BrokenPool(), insert_rows)
+    writer.put(1)
+    flusher = threading.Thread(target=writer.flush)
+    flusher.start()
+    deadline = time.monotonic() + 5
+    while writer.pending < 2 and time.monotonic() < deadline:  # the row and the flush event
+        time.sleep(0.001)
+    gate.set()
+    flusher.join(5)
+    assert not flusher.is_alive()
+    assert writer.rows_failed == 1
+    assert writer.flush(timeout=1) is False
+    with pytest.raises(RuntimeError):
+        writer.put(2)
@@ -0,0 +1,32 @@
+import sqlite3
+from datetime import datetime, timedelta
+
+from storage import migrations
+from utils.helpers import from_epoch_ms, to_epoch_ms
+
+BASE = datetime(2024, 3, 9, 23, 59, 59)
+STAMPS = [BASE + timedelta(microseconds=micros)
+          for micros in (0, 1, 499, 500, 999, 123456, 123499, 123500, 999499, 999500, 999999)]
+
+
+def test_rounds_half_up():
+    base = to_epoch_ms(BASE)
+    assert [to_epoch_ms(stamp) - base for stamp in STAMPS] == [0, 0, 0, 1, 1, 123, 123, 124, 999, 1000, 1000]
+    assert to_epoch_ms(1700000000123.5) == 1700000000124
+    assert to_epoch_ms(1700000000123) == 1700000000123
+
+
+def test_round_trips_millisecond_text():
+    for stamp in STAMPS:
+        ms = to_epoch_ms(stamp)
+        assert to_epoch_ms(from_epoch_ms(ms).isoformat(timespec='milliseconds')) == ms
+
+
+def test_backfill_matches_insert_path():
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE tweets (id INTEGER PRIMARY KEY, timestamp TEXT, timestamp_ms INTEGER)')
+    texts = [stamp.isoformat() for stamp in STAMPS] + [str(BASE), 'not a time', None]
+    conn.executemany('INSERT INTO tweets (timestamp) VALUES (?)', [(text,) for text in texts])
+    migrations._backfill_epoch_timestamps(conn, 1, len(texts))
+    stored = [row[0] for row in conn.execute('SELECT timestamp_ms FROM tweets ORDER BY id')]
+    assert stored == [to_epoch_ms(stamp) for stamp in STAMPS] + [to_epoch_ms(BASE), None, None]
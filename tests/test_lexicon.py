@@ -0,0 +1,69 @@
+import pickle
+import random
+
+import pytest
+from textblob import TextBlob
+from textblob._text import EMOTICONS
+from textblob.en import sentiment
+
+from processing.lexicon import SentimentLexicon
+
+FACES = sorted(set().union(*EMOTICONS.values()))
+WORDS = ["good", "great", "bad", "terrible", "not", "never", "very", "really", "!", "...", "(!)",
+         "isn't", "don't", "it's", "the", "a", "x", "d", "o", "U.S.", "Mr.", "a.m.", "etc.",
+         "#good", "@bad", "http://t.co/abc", ":", "-", ")", "("]
+SEPARATORS = [" ", " ", " ", "", ".", ",", "!", "\n", "...", " .", '"', "'"]
+
+
+@pytest.fixture(scope='module')
+def lexicon():
+    return SentimentLexicon()
+
+
+def textblob_scores(text):
+    return tuple(TextBlob(text).sentiment[:2])
+
+
+def random_texts(count, seed=0):
+    """Texts mixing lexicon words, negations, modifiers and emoticons in
+    every letter case, glued by spaces or punctuation"""
+    rng = random.Random(seed)
+    vocabulary = list(dict.keys(sentiment)) if dict.__len__(sentiment) else []
+    for _ in range(count):
+        tokens = []
+        for _ in range(rng.randint(1, 8)):
+            roll = rng.random()
+            if roll < 0.3:
+                face = rng.choice(FACES)
+                tokens.append(rng.choice([face, face.lower(), face.upper(), ' '.join(face)]))
+            else:
+                word = rng.choice(WORDS if roll < 0.8 or not vocabulary else vocabulary)
+                tokens.append(rng.choice([word, word, word.upper(), word.capitalize()]))
+        yield ''.join(token + rng.choice(SEPARATORS) for token in tokens)
+
+
+@pytest.mark.parametrize('text', [
+    ':D', ':d', '=D', '=d', ':D great', ':d great', 'so good :-D', 'so good :-d',
+    'great :D!', ':-)x', 'a:)', ':P', ':p', 'XD', 'xD', '<3', 'o.O', 'o.o.', 'O.O', 'x-d',
+    "ISN'T good", "isn't good", 'really Mr. good', 'not It. good', '...great', '.bad news',
+    'very very good!', 'not very good (!)', 'the movie was not bad ...', '',
+])
+def test_matches_textblob_on_edge_cases(lexicon, text):
+    assert lexicon.score_batch([text])[0] == pytest.approx(textblob_scores(text), abs=1e-12)
+
+
+def test_matches_textblob_on_random_texts(lexicon):
+    texts = list(random_texts(5000))
+    mismatches = [
+        (text, want, got)
+        for text, want, got in zip(texts, map(textblob_scores, texts), lexicon.score_batch(texts))
+        if max(abs(want[0] - got[0]), abs(want[1] - got[1])) > 1e-12
+    ]
+    assert mismatches == []
+
+
+def test_pickled_copy_scores_the_same():
+    lexicon = SentimentLexicon()
+    copy = pickle.loads(pickle.dumps(lexicon))
+    texts = ["very good :D", "not bad at all!", "Mr. Smith is great", "meh"]
+    assert copy.score_batch(texts) == lexicon.score_batch(texts)
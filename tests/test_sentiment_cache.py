@@ -0,0 +1,48 @@
+import pytest
+
+from processing.analyzer import Analyzer
+from processing.sentiment_cache import SentimentCache
+
+# Each group scores the same under a case- or whitespace-blind key
+VARIANTS = [
+    ['=d', '=D'],
+    [':d great', ':D great', ':D  great'],
+    ['so good :-d', 'so good :-D', 'SO GOOD :-D'],
+    ["isn't good", "ISN'T good", "isn't\tgood"],
+    ['a :\n\nD b', 'a : D b', 'a :\nD b', 'a :\r\n\r\nD b'],
+]
+
+
+@pytest.mark.parametrize('texts', VARIANTS)
+def test_cached_scores_match_uncached(texts):
+    cached = Analyzer(sentiment_cache_size=100)
+    uncached = Analyzer(sentiment_cache_size=0)
+    for text in texts:
+        assert cached.analyze_sentiment(text) == uncached.analyze_sentiment(text), text
+
+
+@pytest.mark.parametrize('texts', VARIANTS)
+def test_cached_batch_scores_match_uncached(texts):
+    cached = Analyzer(sentiment_cache_size=100)
+    uncached = Analyzer(sentiment_cache_size=0)
+    batch = texts + texts[::-1]
+    assert cached.analyze_sentiment_batch(batch) == uncached.analyze_sentiment_batch(batch)
+    assert cached.analyze_sentiment_batch(batch) == uncached.analyze_sentiment_batch(batch)
+
+
+def test_whitespace_variants_share_an_entry():
+    cache = SentimentCache()
+    assert cache.key('good  day\t:)') == cache.key(' good day :) ')
+    assert cache.key('good day :D') != cache.key('good day :d')
+    assert cache.key('a :\n\nD') != cache.key('a : D')
+
+
+def test_evicts_least_recently_used():
+    cache = SentimentCache(maxsize=2)
+    cache.put('a', (0.1, 0.1))
+    cache.put('b', (0.2, 0.2))
+    cache.get('a')
+    cache.put('c', (0.3, 0.3))
+    assert cache.get('b') is None
+    assert cache.get_many(['a', 'c']) == [(0.1, 0.1), (0.3, 0.3)]
+    assert cache.stats()['evictions'] == 1
@@ -0,0 +1,67 @@
+import itertools
+import random
+from collections import Counter
+from datetime import datetime, timedelta
+
+from processing.analyzer import Analyzer
+from processing.sketch import ApproximateTrendCounter
+from processing.window import SlidingWindowCounter
+
+
+def zipf_stream(count, seed=1, vocabulary=20000, rate=1000.0):
+    """(seconds, items) per tweet with Zipf-distributed words, ``rate`` tweets a minute"""
+    rng = random.Random(seed)
+    words = [f"w{i}" for i in range(vocabulary)]
+    cumulative = list(itertools.accumulate(1.0 / (rank + 1) for rank in range(vocabulary)))
+    for i in range(count):
+        yield i * 60.0 / rate, rng.choices(words, cum_weights=cumulative, k=rng.randint(6, 18))
+
+
+def test_top_k_matches_exact_counts():
+    window = timedelta(minutes=5)
+    bucket = timedelta(minutes=1)
+    k = 10
+    # The sketch holds the current bucket and the ones before it that fit
+    # the window; the exact counter also keeps a partly expired bucket, so
+    # give it a bucket less to count the same events
+    exact = SlidingWindowCounter(window - bucket, bucket=bucket, top_k=k)
+    approx = ApproximateTrendCounter(window, bucket=bucket, top_k=k,
+                                     capacity=500, memory_bytes=2 * 1024 * 1024)
+    checkpoints = []
+    for i, (timestamp, items) in enumerate(zipf_stream(16000, rate=2000.0), start=1):
+        exact.expire(timestamp)
+        exact.update(items, timestamp)
+        approx.expire(timestamp)
+        approx.update(items, timestamp)
+        if i % 2000 == 0:
+            truth = {item for item, _ in exact.top_items()}
+            got = approx.top_items()
+            hits = len(truth & {item for item, _ in got})
+            overcount = max(count - exact.totals.get(item, 0) for item, count in got)
+            checkpoints.append((hits / len(truth), hits / len(got), overcount, approx.error_bound()))
+
+    assert min(recall for recall, _, _, _ in checkpoints) >= 0.9
+    assert min(precision for _, precision, _, _ in checkpoints) >= 0.9
+    for _, _, overcount, bound in checkpoints:
+        assert 0 <= overcount <= bound
+
+
+def test_estimates_never_undercount():
+    approx = ApproximateTrendCounter(timedelta(hours=1), bucket=timedelta(minutes=5),
+                                     capacity=50, memory_bytes=64 * 1024)
+    exact = Counter()
+    for timestamp, items in zipf_stream(3000, vocabulary=500):
+        approx.update(items, timestamp)
+        exact.update(items)
+    for item, count in approx.most_common():
+        assert count >= exact[item]
+
+
+def test_analyzer_trends_follow_the_window():
+    analyzer = Analyzer(approximate=True, sketch_memory=256 * 1024)
+    start = datetime(2024, 1, 1)
+    analyzer.record_trends(Counter({'#a': 3, '#b': 1}), start)
+    # Moving into a new hour bucket re-estimates every candidate
+    analyzer.record_trends(Counter({'#a': 2, '#c': 5}), start + timedelta(hours=2))
+    assert analyzer.trends is analyzer.window.totals
+    assert {item: analyzer.trends.get(item) for item in ('#a', '#b', '#c')} == {'#a': 5, '#b': 1, '#c': 5}
@@ -0,0 +1,43 @@
+import random
+from collections import Counter
+from datetime import timedelta
+
+import pytest
+
+from processing.topk import TopK
+from processing.window import SlidingWindowCounter
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_matches_a_full_sort(seed):
+    rng = random.Random(seed)
+    k = rng.randint(1, 6)
+    window = SlidingWindowCounter(timedelta(seconds=rng.randint(2, 20)), timedelta(seconds=1), top_k=k)
+    vocabulary = [f'w{i}' for i in range(rng.randint(1, 60))] + [('a', 'b'), ('c', 'd')]
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    for step in range(500):
+        now = step * rng.choice([0.05, 0.25, 0.5, 1.5])
+        window.expire(now)
+        if rng.random() < 0.5:
+            window.update(rng.choices(vocabulary, weights, k=rng.randint(0, 8)), now, count=rng.choice([1, 1, 3]))
+        else:
+            window.update_counts(Counter(rng.choices(vocabulary, weights, k=rng.randint(0, 12))), now)
+        top = window.top_items()
+        assert [count for _, count in top] == sorted(window.totals.values(), reverse=True)[:k]
+        assert all(window.totals[item] == count for item, count in top)
+
+
+def test_expiry_does_not_rescan_the_counts(monkeypatch):
+    rebuilds = []
+    rebuild = TopK._rebuild
+    monkeypatch.setattr(TopK, '_rebuild', lambda self: rebuilds.append(1) or rebuild(self))
+    rng = random.Random(1)
+    vocabulary = [f'w{i}' for i in range(20000)]
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    window = SlidingWindowCounter(timedelta(minutes=5), timedelta(minutes=1), top_k=10)
+    for i in range(20000):
+        now = i * 0.06  # 1000 events a minute for 20 minutes
+        window.expire(now)
+        window.update(rng.choices(vocabulary, weights, k=5), now)
+    assert [count for _, count in window.top_items()] == sorted(window.totals.values(), reverse=True)[:10]
+    assert rebuilds == []
@@ -0,0 +1,39 @@
+import sys
+import threading
+import time
+from collections import Counter
+
+from benchmarks.stress_trend_snapshot import MARKERS, reader, writer
+from processing.analyzer import Analyzer
+
+
+def test_concurrent_readers_never_see_torn_snapshots():
+    # Switch threads often so readers land in the middle of writes
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-5)
+    try:
+        analyzer = Analyzer(top_k=10)
+        lock = threading.Lock()
+        stop = threading.Event()
+        writer_stats = [Counter() for _ in range(2)]
+        reader_stats = [Counter() for _ in range(4)]
+        threads = [threading.Thread(target=writer, args=(analyzer, lock, stop, i, stats))
+                   for i, stats in enumerate(writer_stats)]
+        threads += [threading.Thread(target=reader, args=(analyzer, stop, False, stats))
+                    for stats in reader_stats]
+        for thread in threads:
+            thread.start()
+        time.sleep(1.5)
+        stop.set()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+
+    writes = sum(stats['writes'] for stats in writer_stats)
+    totals = sum(reader_stats, Counter())
+    assert writes > 10 and totals['reads'] > 100
+    assert (totals['errors'], totals['torn'], totals['unsorted'], totals['regressions']) == (0, 0, 0, 0)
+    # The last snapshot has every batch, nothing more
+    top = dict(analyzer.trend_snapshot().top_trends)
+    assert {top[marker] for marker in MARKERS} == {50 * writes}
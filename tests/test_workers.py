@@ -0,0 +1,62 @@
+from processing.analyzer import Analyzer
+from processing.lexicon import SentimentLexicon
+from processing.workers import AnalysisPool
+
+TEXTS = ["so good :D #python", "RT @dev: not bad at all", "terrible day", "so good :D #python"] * 32
+
+
+def analyze(workers, cache_size):
+    pool = AnalysisPool(Analyzer(sentiment_cache_size=cache_size), workers=workers, chunk_size=16)
+    try:
+        tweets = pool.analyze([{'text': text} for text in TEXTS])
+        return [tweet['sentiment'] for tweet in tweets], pool
+    finally:
+        pool.close()
+
+
+def test_worker_results_match_in_process():
+    expected, _ = analyze(0, 0)
+    got, _ = analyze(1, 0)
+    assert got == expected
+
+
+def test_workers_use_their_sentiment_cache():
+    expected, _ = analyze(0, 0)
+    got, pool = analyze(1, 100)
+    assert got == expected
+    stats = pool.cache_stats()
+    assert stats['misses'] == 3
+    assert stats['hits'] == len(TEXTS) - 3
+    assert stats['size'] == 3
+
+
+def test_in_process_pool_uses_the_analyzer_cache():
+    pool = AnalysisPool(Analyzer(sentiment_cache_size=100), workers=0)
+    pool.analyze([{'text': text} for text in TEXTS])
+    assert pool.analyzer.sentiment_cache.stats()['hits'] == len(TEXTS) - 3
+
+
+def test_invalidate_empties_the_worker_caches():
+    analyzer = Analyzer(sentiment_cache_size=100)
+    pool = AnalysisPool(analyzer, workers=1, chunk_size=16)
+    try:
+        pool.analyze([{'text': text} for text in TEXTS])
+        analyzer.reload_sentiment()
+        pool.analyze([{'text': TEXTS[0]}])
+        assert pool.cache_stats() == {'hits': 0, 'misses': 1, 'evictions': 0, 'size': 1}
+    finally:
+        pool.close()
+
+
+def test_invalidate_sends_the_new_lexicon_to_the_workers():
+    lexicon = SentimentLexicon()
+    terrible = lexicon.index['terrible']
+    lexicon.polarity[terrible] = lexicon._p[terrible] = 1.0
+    analyzer = Analyzer(sentiment_cache_size=100)
+    pool = AnalysisPool(analyzer, workers=1)
+    try:
+        assert pool.analyze([{'text': 'terrible day'}])[0]['sentiment']['polarity'] < 0
+        analyzer.reload_sentiment(lexicon)
+        assert pool.analyze([{'text': 'terrible day'}])[0]['sentiment']['polarity'] == 1.0
+    finally:
+        pool.close()
@@ -0,0 +1,95 @@
+import re
+import sys
+
+# One pass finds every word; a leading # or @ marks hashtags and mentions.
+# Matches the same words as \b\w+\b, and the same tags as #(\w+) / @(\w+).
+_TOKEN_RE = re.compile(r'([#@]?)(\w+)')
+# Same, with URLs matched whole so a term filter can drop them
+_URL_TOKEN_RE = re.compile(r'(https?://\S+|www\.\S+)|([#@]?)(\w+)')
+
+
+def phrase(item):
+    """Display form of a trend key: n-gram tuples are joined with spaces"""
+    return ' '.join(item) if type(item) is tuple else item
+
+
+class TrendTokenizer:
+    """Single-pass extraction of hashtags, mentions, words and n-grams.
+
+    Text is lowercased and scanned once with a precompiled pattern.
+    Words are interned, so every occurrence of a word across tweets and
+    the n-gram keys built from it share one string object, and n-grams
+    are tuples of those words built with ``zip`` rather than freshly
+    joined strings. Use ``phrase`` to turn a key back into display text.
+
+    With a ``term_filter`` (see ``processing.filters.TermFilter``) URLs,
+    numbers, short words and stopword-edged or low-scoring n-grams are
+    left out of the trend keys.
+    """
+
+    def __init__(self, n=3, term_filter=None):
+        if n < 1:
+            raise ValueError("n-gram size must be at least 1")
+        self.n = n
+        self.term_filter = term_filter
+        self._strip_urls = term_filter is not None and term_filter.strip_urls
+
+    def tokenize(self, text):
+        """(hashtags, mentions, words) of ``text``; tags as sets, words in order"""
+        if self._strip_urls:
+            return self._tokenize_without_urls(text)
+        hashtags = set()
+        mentions = set()
+        words = []
+        intern = sys.intern
+        for prefix, word in _TOKEN_RE.findall(text.lower()):
+            word = intern(word)
+            words.append(word)
+            if prefix == '#':
+                hashtags.add(word)
+            elif prefix == '@':
+                mentions.add(word)
+        return hashtags, mentions, words
+
+    def _tokenize_without_urls(self, text):
+        """Like ``tokenize``, with ``None`` in ``words`` where each URL was"""
+        hashtags = set()
+        mentions = set()
+        words = []
+        intern = sys.intern
+        for url, prefix, word in _URL_TOKEN_RE.findall(text.lower()):
+            if url:
+                words.append(None)
+                continue
+            word = intern(word)
+            words.append(word)
+            if prefix == '#':
+                hashtags.add(word)
+            elif prefix == '@':
+                mentions.add(word)
+        return hashtags, mentions, words
+
+    def ngrams(self, words):
+        """Every run of ``n`` consecutive words, as tuples"""
+        if self.term_filter is not None:
+            return self.term_filter.ngrams(words, self.n)
+        if self.n == 1:
+            return [(word,) for word in words]
+        return list(zip(*[words[i:] for i in range(self.n)]))
+
+    def extract(self, text):
+        """
+        Trend keys of ``text``.
+        Returns (hashtags, mentions, items): items holds '#tag' and
+        '@mention' strings followed by the n-gram tuples. Hashtags and
+        mentions are returned unfiltered; the filter only affects items.
+        """
+        hashtags, mentions, words = self.tokenize(text)
+        tags, people = hashtags, mentions
+        if self.term_filter is not None:
+            tags = self.term_filter.tags(hashtags)
+            people = self.term_filter.tags(mentions)
+        items = ['#' + tag for tag in tags]
+        items.extend('@' + mention for mention in people)
+        items.extend(self.ngrams(words))
+        return hashtags, mentions, items
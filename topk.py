@@ -0,0 +1,201 @@
+import heapq
+import itertools
+from operator import itemgetter
+
+
+class TopK:
+    """Incrementally maintained top-K view over a mapping of counts.
+
+    The tracked members live in a dict plus a lazily invalidated min-heap.
+    Non-members counting at least ``floor``, about half the K-th count, sit
+    in a lazily invalidated max-heap; the long tail below it is never
+    indexed. An increment costs O(1) below the floor and O(log n) above
+    it, where n is the number of items above the floor. A decrement of a
+    non-member costs O(1): its max-heap entry now overstates the count and
+    is corrected when it reaches the top. A decrement of a member swaps it
+    for the strongest non-member while that one counts more, so a window
+    bucket expiring does not rescan the vocabulary. Only when the K-th
+    count falls below the floor, as when the leading trends collapse, is
+    the view rebuilt with one ``nlargest`` pass over the counts.
+    """
+
+    def __init__(self, counts, k=10):
+        self.counts = counts
+        self.k = k
+        self._top = {}
+        self._heap = []
+        # Non-members counting at least _floor, as (-count, seq, item);
+        # each such item's newest entry is never below its count
+        self._rest = []
+        self._rest_limit = 1024
+        self._floor = 1
+        self._seq = itertools.count()
+        self._cache = None
+
+    def increment(self, item):
+        """Record that ``item``'s count went up"""
+        count = self.counts.get(item, 0)
+        top = self._top
+        if item in top or len(top) < self.k:
+            top[item] = count
+            self._push(count, item)
+        else:
+            min_count, min_item = self._peek_min()
+            if min_count >= 4 * self._floor:
+                self._raise_floor(min_count)
+            if count <= min_count:
+                if count >= self._floor:
+                    self._push_rest(count, item)
+                return
+            heapq.heappop(self._heap)
+            del top[min_item]
+            self._push_rest(min_count, min_item)
+            top[item] = count
+            self._push(count, item)
+        self._cache = None
+
+    def increment_many(self, items):
+        """Record that every item in ``items`` went up.
+
+        Items that cannot enter the top-K are compared against a cached
+        minimum instead of a heap peek each.
+        """
+        top = self._top
+        counts = self.counts
+        floor = self._floor
+        threshold = None
+        for item in items:
+            if item not in top and len(top) >= self.k:
+                if threshold is None:
+                    threshold = self._peek_min()[0]
+                    if threshold >= 4 * floor:
+                        self._raise_floor(threshold)
+                        floor = self._floor
+                count = counts.get(item, 0)
+                if count <= threshold:
+                    if count >= floor:
+                        self._push_rest(count, item)
+                    continue
+            self.increment(item)
+            threshold = None
+
+    def decrement(self, item):
+        """Record that ``item``'s count went down (or reached zero)"""
+        top = self._top
+        if item not in top:
+            return
+        count = self.counts.get(item, 0)
+        if count > 0:
+            top[item] = count
+            self._push(count, item)
+        else:
+            del top[item]
+        self._cache = None
+        self._promote()
+        if len(top) < self.k:
+            # Every item above the floor is a member; any left are below it
+            if self._floor > 1 and len(self.counts) > len(top):
+                self._rebuild()
+        else:
+            min_count = self._peek_min()[0]
+            if min_count < self._floor:
+                self._rebuild()
+            elif min_count >= 4 * self._floor:
+                self._raise_floor(min_count)
+
+    def items(self):
+        """Current top-K as (item, count) pairs, highest count first"""
+        if self._cache is None:
+            self._cache = sorted(self._top.items(), key=itemgetter(1), reverse=True)
+        return self._cache
+
+    def _promote(self):
+        """Swap in the strongest non-members while they beat the weakest member"""
+        top = self._top
+        while True:
+            best = self._peek_rest()
+            if best is None:
+                return
+            count, item = best
+            if len(top) >= self.k:
+                min_count, min_item = self._peek_min()
+                if count <= min_count:
+                    return
+                heapq.heappop(self._heap)
+                del top[min_item]
+                heapq.heappop(self._rest)
+                self._push_rest(min_count, min_item)
+            else:
+                heapq.heappop(self._rest)
+            top[item] = count
+            self._push(count, item)
+
+    def _raise_floor(self, min_count):
+        # Only stops indexing items that cannot enter the top-K; their
+        # entries are dropped as they surface or at the next compaction
+        self._floor = min_count // 2
+        self._rest_limit = 1024
+        self._compact_rest()
+
+    def _push(self, count, item):
+        heapq.heappush(self._heap, (count, next(self._seq), item))
+        if len(self._heap) > 4 * self.k + 64:
+            self._compact()
+
+    def _push_rest(self, count, item):
+        heapq.heappush(self._rest, (-count, next(self._seq), item))
+        if len(self._rest) > self._rest_limit:
+            self._compact_rest()
+
+    def _peek_min(self):
+        heap = self._heap
+        top = self._top
+        while True:
+            count, _, item = heap[0]
+            if top.get(item) == count:
+                return count, item
+            heapq.heappop(heap)
+
+    def _peek_rest(self):
+        """Strongest non-member above the floor as (count, item), or None"""
+        rest = self._rest
+        top = self._top
+        counts = self.counts
+        floor = self._floor
+        while rest:
+            negative, _, item = rest[0]
+            count = counts.get(item, 0)
+            if item in top or count < floor or count > -negative:
+                # A member, below the floor, or superseded by a newer entry
+                heapq.heappop(rest)
+            elif count < -negative:
+                # Decremented since it was pushed; reinsert at its count
+                heapq.heapreplace(rest, (-count, next(self._seq), item))
+            else:
+                return count, item
+        return None
+
+    def _compact(self):
+        self._heap = [(count, next(self._seq), item) for item, count in self._top.items()]
+        heapq.heapify(self._heap)
+
+    def _compact_rest(self):
+        """One entry per indexed non-member, at its current count"""
+        top = self._top
+        counts = self.counts
+        floor = self._floor
+        indexed = {item for _, _, item in self._rest}
+        self._rest = [(-counts[item], next(self._seq), item) for item in indexed
+                      if item not in top and counts.get(item, 0) >= floor]
+        heapq.heapify(self._rest)
+        self._rest_limit = 2 * len(self._rest) + 1024
+
+    def _rebuild(self):
+        top = self._top = dict(heapq.nlargest(self.k, self.counts.items(), key=itemgetter(1)))
+        self._compact()
+        self._floor = max(1, min(top.values()) // 2) if len(top) >= self.k else 1
+        floor = self._floor
+        self._rest = [(-count, next(self._seq), item) for item, count in self.counts.items()
+                      if count >= floor and item not in top]
+        heapq.heapify(self._rest)
+        self._rest_limit = 2 * len(self._rest) + 1024
@@ -0,0 +1,116 @@
+from collections import Counter, deque
+from datetime import datetime, timedelta
+import bisect
+from processing.topk import TopK
+
+
+class SlidingWindowCounter:
+    """Count items over a sliding time window using time-bucketed Counters.
+
+    Events are added to the Counter of the bucket their timestamp falls in
+    and to a running ``totals`` Counter. When a bucket falls out of the
+    window its counts are subtracted from ``totals`` in one pass, so both
+    insertion and expiry cost amortized O(1) per event and memory grows
+    with the number of distinct items per bucket, not with event count.
+
+    With ``top_k`` set, a ``TopK`` view of the totals is kept up to date
+    as events arrive and expire, so the leaders can be read without
+    sorting the whole window.
+    """
+
+    def __init__(self, window=timedelta(hours=24), bucket=timedelta(minutes=1), top_k=None):
+        self.window = window
+        self.bucket = bucket
+        self._window_seconds = window.total_seconds()
+        self._bucket_seconds = bucket.total_seconds()
+        self.totals = Counter()
+        self._buckets = {}
+        self._order = deque()
+        self.top = TopK(self.totals, top_k) if top_k else None
+
+    def add(self, item, timestamp=None, count=1):
+        """Count one item at the given time (defaults to now)"""
+        self.update((item,), timestamp, count)
+
+    def update(self, items, timestamp=None, count=1):
+        """Count every item in ``items`` at the same time"""
+        index = self._bucket_index(timestamp)
+        counts = self._buckets.get(index)
+        if counts is None:
+            counts = self._new_bucket(index)
+        totals = self.totals
+        top = self.top
+        for item in items:
+            counts[item] += count
+            totals[item] += count
+            if top is not None:
+                top.increment(item)
+
+    def update_counts(self, counts, timestamp=None):
+        """Add a mapping of item -> count, all at the same time"""
+        index = self._bucket_index(timestamp)
+        bucket = self._buckets.get(index)
+        if bucket is None:
+            bucket = self._new_bucket(index)
+        bucket.update(counts)
+        self.totals.update(counts)
+        if self.top is not None:
+            self.top.increment_many(counts)
+
+    def expire(self, now=None):
+        """Drop buckets that have fallen out of the window; returns items expired"""
+        cutoff = self._to_seconds(now) - self._window_seconds
+        expired = 0
+        while self._order and (self._order[0] + 1) * self._bucket_seconds <= cutoff:
+            counts = self._buckets.pop(self._order.popleft())
+            for item, count in counts.items():
+                remaining = self.totals[item] - count
+                if remaining > 0:
+                    self.totals[item] = remaining
+                else:
+                    del self.totals[item]
+                if self.top is not None:
+                    self.top.decrement(item)
+                expired += count
+        return expired
+
+    def most_common(self, n=None):
+        return self.totals.most_common(n)
+
+    def top_items(self):
+        """Top-K (item, count) pairs from the incremental view"""
+        if self.top is None:
+            raise ValueError("SlidingWindowCounter was created without top_k")
+        return self.top.items()
+
+    def __len__(self):
+        return len(self.totals)
+
+    def __contains__(self, item):
+        return item in self.totals
+
+    def __getitem__(self, item):
+        return self.totals[item]
+
+    def _new_bucket(self, index):
+        counts = Counter()
+        self._buckets[index] = counts
+        if not self._order or index > self._order[-1]:
+            self._order.append(index)
+        else:
+            # Late event for a bucket we have not seen yet; keep buckets ordered
+            order = list(self._order)
+            bisect.insort(order, index)
+            self._order = deque(order)
+        return counts
+
+    def _bucket_index(self, timestamp):
+        return int(self._to_seconds(timestamp) // self._bucket_seconds)
+
+    @staticmethod
+    def _to_seconds(timestamp):
+        if timestamp is None:
+            timestamp = datetime.now()
+        if isinstance(timestamp, datetime):
+            return timestamp.timestamp()
+        return float(timestamp)
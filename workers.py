@@ -0,0 +1,179 @@
+import multiprocessing
+import os
+import threading
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from processing.lexicon import SentimentLexicon
+from processing.sentiment_cache import SentimentCache
+from utils import metrics
+
+# Lexicon, trend tokenizer and sentiment cache of the current worker process
+_lexicon = None
+_tokenizer = None
+_cache = None
+
+CACHE_STATS = ('hits', 'misses', 'evictions', 'size')
+
+
+def _init_worker(tokenizer=None, cache_size=0, lexicon=None):
+    global _lexicon, _tokenizer, _cache
+    if lexicon is not None:
+        _lexicon = lexicon
+    elif _lexicon is None:
+        _lexicon = SentimentLexicon()
+    if tokenizer is not None:
+        _tokenizer = tokenizer
+    if cache_size and _cache is None:
+        _cache = SentimentCache(cache_size)
+
+
+def analyze_chunk(texts, tokenizer=None, cache=None, lexicon=None):
+    """
+    Score and extract trends for a chunk of tweet texts.
+    Returns (scores, extracted, counts, cache_stats): a (polarity,
+    subjectivity) pair and a (hashtags, mentions) pair per text, in
+    order, the chunk's combined trend item counts, and the stats of this
+    worker's sentiment cache (None when ``cache`` is given or there is
+    none).
+    """
+    _init_worker()
+    tokenizer = tokenizer or _tokenizer
+    if lexicon is None:
+        lexicon = _lexicon
+    cache_stats = None
+    if cache is None and _cache is not None:
+        scores = _cache.score_batch(texts, lexicon.score_batch)
+        cache_stats = dict(_cache.stats(), pid=os.getpid())
+    elif cache is not None:
+        scores = cache.score_batch(texts, lexicon.score_batch)
+    else:
+        scores = lexicon.score_batch(texts)
+    extracted = []
+    counts = Counter()
+    for text in texts:
+        hashtags, mentions, items = tokenizer.extract(text)
+        counts.update(items)
+        extracted.append((hashtags, mentions))
+    return scores, extracted, counts, cache_stats
+
+
+class AnalysisPool:
+    """Sentiment and trend analysis spread over worker processes.
+
+    Tweets are split into chunks of ``chunk_size`` and mapped over a
+    ``ProcessPoolExecutor``; results come back in submission order. Each
+    worker returns its chunk's trend counts, which are merged into the
+    shared ``Analyzer`` window in the parent, so trend state lives in one
+    place. With ``workers=0`` chunks are analyzed in the calling thread.
+
+    Each worker gets a copy of the analyzer's tokenizer when it starts,
+    so a stateful term filter (such as a collocation scorer) learns from
+    the share of the stream that worker sees. Likewise each worker keeps
+    its own sentiment cache the size of the analyzer's, so repeats hit
+    once they have reached the same worker; the ``sentiment_cache_*``
+    gauges then report the workers' caches summed.
+
+    ``invalidate`` (called by ``Analyzer.reload_sentiment``) replaces the
+    workers with fresh ones, so no cached score or lexicon outlives a
+    reload; chunks already submitted finish on the old workers.
+    """
+
+    def __init__(self, analyzer, workers=None, chunk_size=256):
+        self.analyzer = analyzer
+        self.workers = os.cpu_count() if workers is None else workers
+        self.chunk_size = chunk_size
+        self._executor = None
+        # Guards swapping the executor against chunks being submitted
+        self._executor_lock = threading.Lock()
+        # Bumped by invalidate; results of older workers are not counted
+        self._generation = 0
+        # Serializes merges into the shared trend window
+        self._merge_lock = threading.Lock()
+        # Latest sentiment cache stats of each worker process, by pid
+        self._cache_stats = {}
+        cache = analyzer.sentiment_cache
+        self._cache_size = cache.maxsize if cache is not None else 0
+        if self.workers > 0:
+            self._executor = self._start(analyzer.lexicon)
+            if self._cache_size:
+                for name in CACHE_STATS:
+                    metrics.gauge(f'sentiment_cache_{name}', f'Sentiment cache {name}',
+                                  fn=lambda name=name: self.cache_stats()[name])
+        analyzer.reload_listeners.append(self.invalidate)
+
+    def _start(self, lexicon):
+        # Spawned workers: forking a process with live writer and
+        # backfill threads can copy their locks mid-use
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(self.analyzer.tokenizer, self._cache_size, lexicon)
+        )
+
+    def analyze(self, tweets):
+        """
+        Add 'sentiment' and 'trends' to every tweet dict, in place.
+        Returns the same list.
+        """
+        if not tweets:
+            return tweets
+        texts = [tweet['text'] for tweet in tweets]
+        chunks = [texts[i:i + self.chunk_size] for i in range(0, len(texts), self.chunk_size)]
+        with self._executor_lock:
+            executor = self._executor
+            generation = self._generation
+            if executor is not None:
+                results = executor.map(analyze_chunk, chunks)
+        if executor is None:
+            # The analyzer's own tokenizer may keep state; one thread at a time
+            with self._merge_lock:
+                results = [analyze_chunk(chunk, self.analyzer.tokenizer, self.analyzer.sentiment_cache,
+                                         self.analyzer.lexicon)
+                           for chunk in chunks]
+
+        position = 0
+        for scores, extracted, counts, cache_stats in results:
+            if cache_stats is not None and generation == self._generation:
+                self._cache_stats[cache_stats.pop('pid')] = cache_stats
+            timestamp = datetime.now()
+            with self._merge_lock:
+                self.analyzer.record_trends(counts, timestamp)
+                for (polarity, subjectivity), (hashtags, mentions) in zip(scores, extracted):
+                    tweets[position].update({
+                        'sentiment': self.analyzer.sentiment_result(polarity, subjectivity),
+                        'trends': self.analyzer.trend_result(hashtags, mentions, timestamp)
+                    })
+                    position += 1
+        return tweets
+
+    def cache_stats(self):
+        """Sentiment cache stats summed over the worker processes"""
+        workers = list(self._cache_stats.values())
+        return {name: sum(stats[name] for stats in workers) for name in CACHE_STATS}
+
+    def invalidate(self, lexicon=None):
+        """
+        Start over with empty worker caches and ``lexicon`` (default:
+        rebuild TextBlob's), after the lexicon or model changed
+        """
+        global _lexicon
+        # The in-process path falls back to this process's lexicon
+        _lexicon = None
+        with self._executor_lock:
+            old = self._executor
+            if old is not None:
+                self._executor = self._start(lexicon)
+            self._generation += 1
+            self._cache_stats.clear()
+        if old is not None:
+            old.shutdown(wait=True)
+
+    def close(self):
+        """Shut down the worker processes"""
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)